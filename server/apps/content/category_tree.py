@@ -0,0 +1,60 @@
+"""
+缓存的分类树
+
+一次查询加载全部分类，在内存中组装为嵌套结构并缓存：
+- roots: 启用的顶级分类，节点格式与 NewsCategorySerializer 输出一致
+- nodes: {id: 节点}，供单个分类取子树
+- full_names: {id: "父 > 子"}，供 get_full_name 使用
+ContentCategory 保存/删除时(见 signals.py)清除缓存，下次访问重建。
+"""
+from django.core.cache import cache
+from server.db_routing import primary_reads
+
+from .models import ContentCategory
+
+CATEGORY_TREE_CACHE_KEY = 'content:category_tree'
+CATEGORY_TREE_TIMEOUT = 60 * 60 * 24
+CATEGORY_NODE_FIELDS = ('id', 'name', 'name_en', 'description', 'icon_url', 'color_code')
+
+
+def build_category_tree():
+    categories = list(ContentCategory.objects.all())
+    by_id = {category.pk: category for category in categories}
+
+    full_names = {}
+    for category in categories:
+        path, seen, current = [], set(), category
+        # 沿父链向上拼接路径，遇到环或悬空父分类即停止
+        while current is not None and current.pk not in seen:
+            seen.add(current.pk)
+            path.append(current.name)
+            current = by_id.get(current.parent_id)
+        full_names[category.pk] = ' > '.join(reversed(path))
+
+    # 按默认排序遍历，子节点顺序与 obj.children.all() 一致
+    nodes = {
+        category.pk: dict({field: getattr(category, field) for field in CATEGORY_NODE_FIELDS}, children=[])
+        for category in categories if category.is_active
+    }
+    roots = []
+    for category in categories:
+        if not category.is_active:
+            continue
+        if category.parent_id is None:
+            roots.append(nodes[category.pk])
+        elif category.parent_id in nodes:
+            nodes[category.parent_id]['children'].append(nodes[category.pk])
+    return {'roots': roots, 'nodes': nodes, 'full_names': full_names}
+
+
+def get_category_tree():
+    tree = cache.get(CATEGORY_TREE_CACHE_KEY)
+    if tree is None:
+        with primary_reads():
+            tree = build_category_tree()
+        cache.set(CATEGORY_TREE_CACHE_KEY, tree, CATEGORY_TREE_TIMEOUT)
+    return tree
+
+
+def invalidate_category_tree():
+    cache.delete(CATEGORY_TREE_CACHE_KEY)
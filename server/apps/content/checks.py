@@ -0,0 +1,26 @@
+"""
+内容模块的系统检查
+
+版本化响应缓存、物化Feed列表、计数缓存等依赖进程间共享的缓存，
+进程内缓存(LocMem)下其他 worker 与管理命令的写入无法使缓存失效。
+属于部署检查，由 manage.py check --deploy 执行。
+"""
+from django.conf import settings
+from django.core.checks import Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if settings.DEBUG or backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        '默认缓存是进程内缓存，多进程部署时各进程的缓存失效互不可见，会返回过期数据',
+        hint='设置 REDIS_URL 使用共享的 Redis 缓存',
+        id='content.W001',
+    )]
@@ -0,0 +1,40 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def fingerprint_queryset(queryset, field='updated_at'):
+    """查询集的廉价指纹：(最大更新时间, 行数)，一次聚合查询"""
+    result = queryset.aggregate(last_modified=Max(field), total=Count('id'))
+    return result['last_modified'], result['total']
+
+
+class ConditionalGetMixin:
+    """
+    条件GET：根据 get_conditional_validators() 返回的校验值生成 ETag / Last-Modified，
+    命中 If-None-Match / If-Modified-Since 时直接返回304，不执行序列化
+    """
+    def get_conditional_validators(self):
+        """返回 (etag来源列表, last_modified)，任一为 None 表示不提供该校验值"""
+        raise NotImplementedError
+
+    def build_etag(self, parts):
+        query = sorted(self.request.query_params.lists())
+        digest = hashlib.md5(repr((parts, query)).encode()).hexdigest()
+        return quote_etag(digest)
+
+    def get(self, request, *args, **kwargs):
+        parts, last_modified = self.get_conditional_validators()
+        etag = self.build_etag(parts) if parts is not None else None
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            if etag:
+                response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
@@ -0,0 +1,120 @@
+"""
+分页总数缓存
+
+按筛选组合(计数SQL)缓存 COUNT 结果，并记录计算时 RawNews 的版本号：
+- 版本号未变：缓存值即精确值
+- 版本号已变：先返回旧值(标记为非精确)，后台线程异步重算
+- estimate 模式：无缓存时不做完整计数，PostgreSQL 取规划器估算行数，其他数据库做封顶计数
+首次访问且无缓存时同步计数一次。
+"""
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connection, connections
+from server.db_routing import primary_reads
+
+from .response_cache import get_model_versions, model_label
+
+logger = logging.getLogger(__name__)
+
+COUNT_CACHE_TIMEOUT = 60 * 60
+COUNT_REFRESH_LOCK_TIMEOUT = 60
+COUNT_ESTIMATE_CAP = 10000
+
+refresh_in_background = True
+refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='count-refresh')
+
+
+def count_cache_key(queryset):
+    """以去掉排序、投影后的查询SQL区分筛选组合；无法生成SQL时返回 None"""
+    try:
+        sql, params = queryset.order_by().values_list('pk').query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    raw = repr((queryset.db, sql, params))
+    return 'content:count:%s' % hashlib.md5(raw.encode()).hexdigest()
+
+
+def current_version(queryset):
+    return get_model_versions([model_label(queryset.model)])[0]
+
+
+def refresh_count(queryset, key, version):
+    total = queryset.count()
+    cache.set(key, {'count': total, 'version': version}, COUNT_CACHE_TIMEOUT)
+    return total
+
+
+def _refresh_in_thread(queryset, key, version):
+    try:
+        refresh_count(queryset, key, version)
+    except Exception:
+        logger.exception('异步刷新分页总数失败: %s', key)
+    finally:
+        cache.delete(key + ':lock')
+        connections.close_all()
+
+
+def schedule_refresh(queryset, key, version):
+    """同一组合同时只排队一次刷新"""
+    if not cache.add(key + ':lock', 1, COUNT_REFRESH_LOCK_TIMEOUT):
+        return
+    # 事务中未提交的数据对后台线程不可见，此时改为同步刷新
+    if refresh_in_background and not connection.in_atomic_block:
+        refresh_executor.submit(_refresh_in_thread, queryset, key, version)
+    else:
+        try:
+            refresh_count(queryset, key, version)
+        finally:
+            cache.delete(key + ':lock')
+
+
+@primary_reads()
+def get_cached_count(queryset):
+    """返回 (总数, 是否精确)"""
+    key = count_cache_key(queryset)
+    if key is None:
+        return 0, True
+    version = current_version(queryset)
+    entry = cache.get(key)
+    if entry is None:
+        return refresh_count(queryset, key, version), True
+    if entry['version'] == version:
+        return entry['count'], True
+    schedule_refresh(queryset, key, version)
+    return entry['count'], False
+
+
+def planner_estimate(queryset):
+    """PostgreSQL 规划器估算的行数；其他数据库返回 None"""
+    if connection.vendor != 'postgresql':
+        return None
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+@primary_reads()
+def estimate_count(queryset):
+    """返回 (估算总数, 是否精确)，已有缓存时直接使用缓存"""
+    key = count_cache_key(queryset)
+    if key is None:
+        return 0, True
+    version = current_version(queryset)
+    entry = cache.get(key)
+    if entry is not None:
+        if entry['version'] != version:
+            schedule_refresh(queryset, key, version)
+        return entry['count'], entry['version'] == version
+    estimate = planner_estimate(queryset)
+    if estimate is None:
+        capped = queryset.order_by()[:COUNT_ESTIMATE_CAP + 1].count()
+        if capped <= COUNT_ESTIMATE_CAP:
+            cache.set(key, {'count': capped, 'version': version}, COUNT_CACHE_TIMEOUT)
+            return capped, True
+        estimate = COUNT_ESTIMATE_CAP
+    schedule_refresh(queryset, key, version)
+    return estimate, False
@@ -0,0 +1,60 @@
+"""
+RawNews 全量/增量 NDJSON 导出
+
+按 (updated_at, id) 顺序经 .iterator(chunk_size) 流式读取（PostgreSQL 下为服务端游标），
+每块拼接为一段字节输出，内存占用与总行数无关；可选 gzip 边读边压缩。
+HTTP 接口见 ContentExportView，命令行见 manage.py export_rawnews。
+"""
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import RawNews
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FIELDS = [
+    field.attname for field in RawNews._meta.concrete_fields
+    if field.name not in ('hotness_score', 'age_bucket')
+]
+
+
+def parse_since(value):
+    """解析 ISO 8601 的 since 参数，无时区时按当前时区处理；格式错误或日期越界(如13月)返回 None"""
+    try:
+        since = parse_datetime(value)
+    except ValueError:
+        return None
+    if since is not None and timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def export_queryset(since=None):
+    queryset = RawNews.objects.all()
+    if since is not None:
+        queryset = queryset.filter(updated_at__gte=since)
+    return queryset.order_by('updated_at', 'id').values(*EXPORT_FIELDS)
+
+
+def iter_ndjson(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """逐块产出 NDJSON 字节串，每行一条记录"""
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    lines = []
+    for row in queryset.iterator(chunk_size=chunk_size):
+        lines.append(encoder.encode(row))
+        if len(lines) >= chunk_size:
+            yield ('\n'.join(lines) + '\n').encode()
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode()
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 输出 gzip 格式
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
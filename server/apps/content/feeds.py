@@ -0,0 +1,239 @@
+"""
+物化Feed排序列表
+
+按 (是否仅已处理, 分类, 类型, 排序字段) 组合在缓存中保存排好序的ID前缀，
+RawNews 保存/删除时增量维护，Feed请求只需切片ID并回表一页数据。
+全量重建见 manage.py rebuild_feed_lists。
+"""
+import bisect
+import contextlib
+import time
+
+from django.core.cache import cache
+from django.db.models import F
+from server.db_routing import primary_reads
+
+from .models import RawNews, NewsCategory
+
+FEED_ORDER_FIELDS = ('published_at', 'importance_score', 'sentiment_score')
+FEED_TYPES = [value for value, _ in RawNews.TYPE_CHOICES]
+FEED_LIST_MAX_SIZE = 1000
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+FEED_REGISTRY_KEY = 'content:feed:keys'
+# 单个组合增量维护的锁超时(秒)
+FEED_LOCK_TIMEOUT = 5
+
+
+def feed_cache_key(spec):
+    processed_only, category_id, content_type, order_field = spec
+    return 'content:feed:%d:%s:%s:%s' % (processed_only, category_id or 'all', content_type or 'all', order_field)
+
+
+def rank_key(value, pk):
+    """排序键：按字段值降序(空值在后)、id降序，升序存储便于二分插入"""
+    if value is None:
+        return (1, 0.0, -pk)
+    number = value.timestamp() if hasattr(value, 'timestamp') else float(value)
+    return (0, -number, -pk)
+
+
+def ordered_queryset(queryset, order_field):
+    return queryset.order_by(F(order_field).desc(nulls_last=True), '-id')
+
+
+def spec_queryset(spec):
+    processed_only, category_id, content_type, order_field = spec
+    queryset = RawNews.objects.all()
+    if processed_only:
+        queryset = queryset.filter(is_processed=True)
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+    if content_type:
+        queryset = queryset.filter(type=content_type)
+    return ordered_queryset(queryset, order_field)
+
+
+def spec_matches(spec, instance):
+    processed_only, category_id, content_type, _ = spec
+    if processed_only and not instance.is_processed:
+        return False
+    if category_id and instance.category_id != category_id:
+        return False
+    if content_type and instance.type != content_type:
+        return False
+    return True
+
+
+def register_spec(spec):
+    specs = cache.get(FEED_REGISTRY_KEY) or set()
+    if spec not in specs:
+        specs.add(spec)
+        cache.set(FEED_REGISTRY_KEY, specs, None)
+
+
+@primary_reads()
+def build_feed_list(spec):
+    """从数据库(主库)重建单个组合的排序列表"""
+    order_field = spec[3]
+    rows = list(spec_queryset(spec).values_list('id', order_field)[:FEED_LIST_MAX_SIZE])
+    entries = [rank_key(value, pk) for pk, value in rows]
+    total = spec_queryset(spec).count() if len(entries) >= FEED_LIST_MAX_SIZE else len(entries)
+    feed = {'entries': entries, 'total': total}
+    cache.set(feed_cache_key(spec), feed, FEED_CACHE_TIMEOUT)
+    register_spec(spec)
+    return feed
+
+
+def all_feed_specs():
+    """所有可物化的组合：推荐流(分类×类型×排序) 与 分类内容流(分类×排序)"""
+    category_ids = list(NewsCategory.objects.filter(is_active=True).values_list('id', flat=True))
+    specs = []
+    for order_field in FEED_ORDER_FIELDS:
+        for category_id in [None] + category_ids:
+            for content_type in [None] + FEED_TYPES:
+                specs.append((True, category_id, content_type, order_field))
+        for category_id in category_ids:
+            specs.append((False, category_id, None, order_field))
+    return specs
+
+
+def rebuild_feed_lists(specs=None):
+    specs = list(specs) if specs is not None else sorted(
+        set(all_feed_specs()) | (cache.get(FEED_REGISTRY_KEY) or set()), key=str
+    )
+    for spec in specs:
+        build_feed_list(spec)
+    return specs
+
+
+def instance_specs(instance):
+    """条目所属的全部组合（不论是否已物化），每个排序字段至多 8 个"""
+    processed_flags = (True, False) if instance.is_processed else (False,)
+    return {
+        (processed_only, category_id, content_type, order_field)
+        for order_field in FEED_ORDER_FIELDS
+        for processed_only in processed_flags
+        for category_id in {None, instance.category_id}
+        for content_type in {None, instance.type}
+    }
+
+
+@contextlib.contextmanager
+def feed_lock(key):
+    """
+    单个组合的互斥锁（cache.add），避免并发保存时读-改-写互相覆盖；
+    等待超时说明持锁进程异常，此时删除该列表，由下次请求从数据库重建
+    """
+    lock_key = key + ':lock'
+    deadline = time.monotonic() + FEED_LOCK_TIMEOUT
+    while not cache.add(lock_key, 1, FEED_LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            cache.delete(key)
+            yield False
+            return
+        time.sleep(0.005)
+    try:
+        yield True
+    finally:
+        cache.delete(lock_key)
+
+
+def update_feed_entries(feed, spec, instance, previous, deleted):
+    entries, total = feed['entries'], feed['total']
+    truncated = total > len(entries)
+    for index, entry in enumerate(entries):
+        if entry[2] == -instance.pk:
+            del entries[index]
+            break
+    if previous is not None and spec_matches(spec, previous):
+        total -= 1
+    if not deleted and spec_matches(spec, instance):
+        entry = rank_key(getattr(instance, spec[3]), instance.pk)
+        total += 1
+        # 截断列表只维护真实前缀，落在前缀之后的条目交给数据库回退查询
+        if not truncated or (entries and entry < entries[-1]):
+            bisect.insort(entries, entry)
+            del entries[FEED_LIST_MAX_SIZE:]
+    return {'entries': entries, 'total': total}
+
+
+def update_feed_lists(instance, previous=None, deleted=False):
+    """
+    RawNews 变更时增量维护变更前后所属的已物化组合
+    previous 为变更前的 (is_processed, category_id, type) 状态，新建时为 None
+    """
+    specs = instance_specs(instance)
+    if previous is not None:
+        specs |= instance_specs(previous)
+    keys = {feed_cache_key(spec): spec for spec in specs}
+    for key in cache.get_many(list(keys)):
+        with feed_lock(key) as locked:
+            feed = cache.get(key) if locked else None
+            if feed is not None:
+                cache.set(key, update_feed_entries(feed, keys[key], instance, previous, deleted), FEED_CACHE_TIMEOUT)
+
+
+class RankedFeed:
+    """
+    物化排序列表的惰性序列，供 Paginator 使用：
+    切片落在缓存前缀内时按ID回表，超出前缀时回退为数据库排序查询
+    """
+    def __init__(self, entries, total, queryset):
+        self.entries = entries
+        self.total = total
+        self.queryset = queryset
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = self.total if key.stop is None else key.stop
+        if stop <= len(self.entries):
+            ids = [-entry[2] for entry in self.entries[start:stop]]
+            objects = self.queryset.in_bulk(ids)
+            return [objects[pk] for pk in ids if pk in objects]
+        return list(self.queryset[start:stop])
+
+
+class IdListFeed:
+    """
+    有序ID列表的惰性序列，供 Paginator 使用：切片时按ID回表并保持顺序，
+    期间被删除或不再满足 queryset 筛选条件的条目直接跳过
+    """
+    def __init__(self, ids, queryset):
+        self.ids = ids
+        self.queryset = queryset
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        ids = self.ids[key]
+        objects = self.queryset.order_by().in_bulk(ids)
+        return [objects[pk] for pk in ids if pk in objects]
+
+
+def get_ranked_feed(queryset, order_field, category_id=None, content_type=None, processed_only=True):
+    """
+    返回 queryset 对应组合的 RankedFeed；组合不可物化时返回 None。
+    queryset 只用于回表（可带 .only() 投影），其筛选条件须与组合一致。
+    """
+    if order_field not in FEED_ORDER_FIELDS or (content_type and content_type not in FEED_TYPES):
+        return None
+    if category_id:
+        try:
+            category_id = int(category_id)
+        except (TypeError, ValueError):
+            return None
+    spec = (bool(processed_only), category_id or None, content_type or None, order_field)
+    feed = cache.get(feed_cache_key(spec))
+    if feed is None:
+        if category_id and not NewsCategory.objects.filter(pk=category_id).exists():
+            return None
+        feed = build_feed_list(spec)
+    return RankedFeed(feed['entries'], feed['total'], ordered_queryset(queryset, order_field))
@@ -0,0 +1,82 @@
+"""
+时间衰减热度分
+
+hotness = (importance + 1) / (age_hours + 2) ^ gravity
+热度随发布时间指数级衰减，由 manage.py recompute_hotness 定期批量重算。
+同时按发布时长划分年龄分桶(日/周/月/更早)，热门接口按 (分桶, 热度) 索引
+逐桶顺序读取再归并，period=day|week|month 不需要排序。
+"""
+import datetime
+
+from django.db.models import Q
+
+HOTNESS_GRAVITY = 1.8
+HOTNESS_BATCH_SIZE = 2000
+# 分桶上界，超过最后一档的归入“更早”桶
+AGE_BUCKETS = [
+    ('day', datetime.timedelta(days=1)),
+    ('week', datetime.timedelta(weeks=1)),
+    ('month', datetime.timedelta(days=30)),
+]
+AGE_BUCKET_OLDER = len(AGE_BUCKETS)
+
+
+def compute_age_bucket(published_at, now):
+    if not published_at:
+        return 0
+    age = now - published_at
+    for index, (_, limit) in enumerate(AGE_BUCKETS):
+        if age <= limit:
+            return index
+    return AGE_BUCKET_OLDER
+
+
+def period_buckets(period):
+    """返回 period 需要读取的分桶与时间窗口长度；未知 period 读取全部分桶"""
+    for index, (name, limit) in enumerate(AGE_BUCKETS):
+        if name == period:
+            return list(range(index + 1)), limit
+    return list(range(AGE_BUCKET_OLDER + 1)), None
+
+
+def compute_hotness(importance_score, published_at, now):
+    importance = float(importance_score) if importance_score is not None else 0.0
+    age_hours = max((now - published_at).total_seconds() / 3600, 0.0) if published_at else 0.0
+    return (importance + 1) / (age_hours + 2) ** HOTNESS_GRAVITY
+
+
+def compute_hotness_batch(rows, now):
+    """批量计算 [(id, importance_score, published_at)] -> [(id, hotness, age_bucket)]"""
+    return [
+        (pk, compute_hotness(importance, published_at, now), compute_age_bucket(published_at, now))
+        for pk, importance, published_at in rows
+    ]
+
+
+def stale_bucket_filter(now):
+    """已超出所在分桶时间上界的行（分桶未及时重算）"""
+    condition = Q(pk__in=[])
+    for index, (_, limit) in enumerate(AGE_BUCKETS):
+        condition |= Q(age_bucket=index, published_at__lt=now - limit)
+    return condition
+
+
+def recompute_hotness(queryset, now, batch_size=HOTNESS_BATCH_SIZE):
+    """按主键分批重算热度与年龄分桶并 bulk_update，返回更新行数"""
+    model = queryset.model
+    updated = 0
+    last_id = 0
+    while True:
+        rows = list(
+            queryset.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'importance_score', 'published_at')[:batch_size]
+        )
+        if not rows:
+            return updated
+        objs = [
+            model(id=pk, hotness_score=score, age_bucket=bucket)
+            for pk, score, bucket in compute_hotness_batch(rows, now)
+        ]
+        model.objects.bulk_update(objs, ['hotness_score', 'age_bucket'], batch_size=500)
+        updated += len(objs)
+        last_id = rows[-1][0]
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from apps.content.search_updates import UPDATE_BATCH_SIZE, IndexBusy, apply_pending_updates, index_freshness
+
+class Command(BaseCommand):
+    help = '批量应用搜索索引变更队列（--loop 常驻轮询，否则处理完当前积压后退出）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=UPDATE_BATCH_SIZE, help='每批（每个事务）处理的变更数')
+        parser.add_argument('--loop', action='store_true', help='常驻运行，队列为空时按间隔轮询')
+        parser.add_argument('--interval', type=float, default=2.0, help='轮询间隔秒数')
+
+    def handle(self, *args, **options):
+        while True:
+            applied = 0
+            try:
+                while True:
+                    count = apply_pending_updates(batch_size=options['batch_size'])
+                    applied += count
+                    if count < options['batch_size']:
+                        break
+            except IndexBusy:
+                self.stdout.write('索引正在被其他进程维护，稍后重试')
+            if applied or not options['loop']:
+                freshness = index_freshness()
+                self.stdout.write(
+                    f'已应用 {applied} 条变更，积压 {freshness["pending_updates"]} 条，'
+                    f'新鲜度滞后 {freshness["lag_seconds"]:.1f}s'
+                )
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
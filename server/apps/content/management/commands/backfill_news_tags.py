@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from apps.content.tagging import TAG_BACKFILL_BATCH_SIZE, backfill_news_tags
+from apps.content.models import RawNewsTag
+
+class Command(BaseCommand):
+    help = '根据 RawNews.tags 与 ContentTagRelation 回填标签关联表(RawNewsTag)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=TAG_BACKFILL_BATCH_SIZE, help='每批处理内容数')
+
+    def handle(self, *args, **options):
+        processed = backfill_news_tags(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'已同步 {processed} 条内容，共 {RawNewsTag.objects.count()} 条标签关联'
+        ))
@@ -0,0 +1,53 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from apps.content.models import RawNews
+from apps.content.renderers import FastJSONRenderer, orjson
+from apps.content.serializers import RawNewsSerializer
+
+class Command(BaseCommand):
+    help = 'JSON渲染器微基准：对 api_response 包装的 RawNewsSerializer 页面比较 JSONRenderer 与 FastJSONRenderer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100, help='每页条数')
+        parser.add_argument('--iterations', type=int, default=500, help='每个渲染器的渲染次数')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        # 内存中构造的页面，不访问数据库
+        items = [
+            RawNews(id=i, title=f'基准标题{i}', content='正文内容' * 200, summary='摘要' * 30, author='编辑部',
+                    source='羊咩快报', source_url=f'https://example.com/bench/{i}', published_at=now,
+                    crawled_at=now, created_at=now, updated_at=now, tags=['AI', '科技'], keywords=['推荐'],
+                    importance_score=Decimal('0.55'), sentiment_score=Decimal('0.30'), is_processed=True)
+            for i in range(options['items'])
+        ]
+        data = RawNewsSerializer(items, many=True, context={'video_contents': {}}).data
+        envelope = {"success": True, "code": 200, "message": "Success",
+                    "data": {"results": data}, "timestamp": now.isoformat()}
+
+        baseline = JSONRenderer().render(envelope)
+        if FastJSONRenderer().render(envelope) != baseline:
+            raise CommandError('FastJSONRenderer 输出与 JSONRenderer 不一致')
+
+        self.stdout.write(f'页面 {options["items"]} 条，{len(baseline)} 字节，orjson: {"是" if orjson else "否"}')
+        results = {}
+        for renderer_class in (JSONRenderer, FastJSONRenderer):
+            timings = []
+            for _ in range(options['iterations']):
+                # 与线上一致，每次请求新建渲染器实例
+                started = time.perf_counter()
+                renderer_class().render(envelope)
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            results[renderer_class] = statistics.median(timings)
+            self.stdout.write(
+                f'{renderer_class.__name__}: p50 {statistics.median(timings) * 1000:.3f}ms，'
+                f'p95 {timings[int(len(timings) * 0.95) - 1] * 1000:.3f}ms'
+            )
+        speedup = results[JSONRenderer] / results[FastJSONRenderer]
+        self.stdout.write(self.style.SUCCESS(f'加速比 {speedup:.2f}x'))
@@ -0,0 +1,67 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from apps.content.feeds import IdListFeed
+from apps.content.models import RawNews
+from apps.content.search_benchmark import benchmark_databases
+from apps.content.search_corpus import SearchCorpus
+from apps.content.search_index import SEGMENT_SIZE, search_ids
+from apps.content.search_updates import rebuild_search_index
+
+class Command(BaseCommand):
+    help = ('搜索基准测试：LIKE 查询 vs 倒排索引；'
+            '在一次性测试库中运行（与 manage.py test 相同的建库方式），不写入配置的数据库、共享缓存与线上索引')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--docs', type=int, nargs='+', default=[100000, 1000000], help='合成文档数，可指定多档')
+        parser.add_argument('--queries', type=int, default=30, help='每种方式执行的查询次数')
+        parser.add_argument('--page-size', type=int, default=20, help='每页条数')
+        parser.add_argument('--segment-size', type=int, default=SEGMENT_SIZE, help='每个索引段的文档数')
+        parser.add_argument('--workers', type=int, default=1, help='重建索引的并行进程数')
+        parser.add_argument('--batch-size', type=int, default=5000, help='写入批大小')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='测试库已存在时直接删除重建，不询问')
+
+    def handle(self, *args, **options):
+        with benchmark_databases(interactive=options['interactive']):
+            for docs in sorted(options['docs']):
+                self.run_level(docs, options)
+
+    def run_level(self, docs, options):
+        SearchCorpus.cleanup()
+        corpus = SearchCorpus()
+        started = time.perf_counter()
+        corpus.insert(docs, batch_size=options['batch_size'])
+        self.stdout.write(f'[{docs}] 写入合成内容: {time.perf_counter() - started:.1f}s')
+        started = time.perf_counter()
+        rebuild_search_index(segment_size=options['segment_size'], workers=options['workers'])
+        self.stdout.write(f'[{docs}] 重建索引: {time.perf_counter() - started:.1f}s')
+
+        base = RawNews.objects.filter(is_processed=True)
+        size = options['page_size']
+        queries = corpus.queries(options['queries'])
+        for label, run in (('LIKE 查询', self.like_page), ('倒排索引', self.index_page)):
+            timings = []
+            for q in queries:
+                started = time.perf_counter()
+                run(base, q, size)
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            self.stdout.write(
+                f'[{docs}] {label}: 首页+总数 p50 {statistics.median(timings) * 1000:.1f}ms / '
+                f'p95 {timings[int(len(timings) * 0.95) - 1] * 1000:.1f}ms / max {timings[-1] * 1000:.1f}ms'
+            )
+
+    def like_page(self, base, q, size):
+        queryset = base
+        for word in q.split():
+            queryset = queryset.filter(Q(title__icontains=word) | Q(summary__icontains=word) | Q(content__icontains=word))
+        queryset.count()
+        return list(queryset.order_by('-published_at')[:size])
+
+    def index_page(self, base, q, size):
+        feed = IdListFeed(search_ids(q) or [], base)
+        len(feed)
+        return feed[:size]
@@ -0,0 +1,49 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.content.search_benchmark import SearchBenchmark, benchmark_databases, compare_reports
+from apps.content.search_index import SEGMENT_SIZE
+
+class Command(BaseCommand):
+    help = ('搜索性能基准套件：写入合成语料，回放搜索与搜索建议请求，输出 p50/p95/p99、每请求查询数与内存(JSON)；'
+            '在一次性测试库中运行（与 manage.py test 相同的建库方式），不写入配置的数据库与共享缓存')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--docs', type=int, nargs='+', default=[10000, 100000], help='合成文档数，可指定多档')
+        parser.add_argument('--queries', type=int, default=1000, help='每个接口计时的请求数')
+        parser.add_argument('--warmup', type=int, default=50, help='每个接口不计时的预热请求数')
+        parser.add_argument('--seed', type=int, default=42, help='语料与查询的随机种子')
+        parser.add_argument('--segment-size', type=int, default=SEGMENT_SIZE, help='每个索引段的文档数')
+        parser.add_argument('--workers', type=int, default=1, help='重建索引的并行进程数')
+        parser.add_argument('--batch-size', type=int, default=5000, help='写入批大小')
+        parser.add_argument('--output', help='结果 JSON 文件路径，缺省时输出到标准输出')
+        parser.add_argument('--compare', help='与之前的结果 JSON 比较并输出变化')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='测试库已存在时直接删除重建，不询问')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'无法读取比较基准: {e}')
+        benchmark = SearchBenchmark(
+            queries=options['queries'], warmup=options['warmup'], seed=options['seed'],
+            segment_size=options['segment_size'], workers=options['workers'], batch_size=options['batch_size'],
+            log=lambda message: self.stderr.write(message),
+        )
+        with benchmark_databases(interactive=options['interactive']):
+            report = benchmark.run(sorted(options['docs']))
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(f'结果已写入 {options["output"]}')
+        else:
+            self.stdout.write(output)
+        if baseline is not None:
+            for docs, name, metric, before, after, change in compare_reports(baseline, report):
+                change_text = f'{change:+.1%}' if change is not None else '-'
+                self.stderr.write(f'[{docs}] {name} {metric}: {before} -> {after} ({change_text})')
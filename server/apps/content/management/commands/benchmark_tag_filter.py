@@ -0,0 +1,77 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from apps.content.models import RawNews
+from apps.content.search_benchmark import benchmark_databases
+from apps.content.tagging import backfill_news_tags, filter_by_tag
+
+BENCHMARK_URL_PREFIX = 'https://benchmark.invalid/tag-filter/'
+BENCHMARK_TAG_PREFIX = 'bench-tag-'
+
+class Command(BaseCommand):
+    help = ('标签筛选基准测试：JSON字段扫描 vs RawNewsTag 关联索引；'
+            '在一次性测试库中运行（与 manage.py test 相同的建库方式），不写入配置的数据库与共享缓存')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help='合成内容条数')
+        parser.add_argument('--tags', type=int, default=500, help='标签总数')
+        parser.add_argument('--tags-per-row', type=int, default=3, help='每条内容的标签数')
+        parser.add_argument('--queries', type=int, default=20, help='每种方式执行的查询次数')
+        parser.add_argument('--batch-size', type=int, default=5000, help='写入批大小')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='测试库已存在时直接删除重建，不询问')
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        names = [f'{BENCHMARK_TAG_PREFIX}{i}' for i in range(options['tags'])]
+        with benchmark_databases(interactive=options['interactive']):
+            started = time.perf_counter()
+            self.insert_rows(rng, names, options)
+            self.stdout.write(f'写入 {options["rows"]} 条内容: {time.perf_counter() - started:.1f}s')
+
+            started = time.perf_counter()
+            backfill_news_tags(RawNews.objects.filter(source_url__startswith=BENCHMARK_URL_PREFIX),
+                               batch_size=options['batch_size'])
+            self.stdout.write(f'回填标签关联: {time.perf_counter() - started:.1f}s')
+
+            base = RawNews.objects.filter(is_processed=True).order_by('-published_at')
+            samples = [rng.choice(names) for _ in range(options['queries'])]
+            for label, build in (('JSON字段扫描', self.json_filter), ('关联表索引', filter_by_tag)):
+                page, count = [], []
+                for name in samples:
+                    queryset = build(base, name)
+                    started = time.perf_counter()
+                    list(queryset.values_list('id', flat=True)[:20])
+                    page.append(time.perf_counter() - started)
+                    started = time.perf_counter()
+                    queryset.count()
+                    count.append(time.perf_counter() - started)
+                self.stdout.write(
+                    f'{label}: 首页 p50 {statistics.median(page) * 1000:.1f}ms / max {max(page) * 1000:.1f}ms，'
+                    f'计数 p50 {statistics.median(count) * 1000:.1f}ms'
+                )
+
+    def json_filter(self, queryset, name):
+        # SQLite 不支持 JSONField 的 contains 查询，以匹配序列化后的标签文本代替（同为全表扫描）
+        if connection.vendor == 'sqlite':
+            return queryset.filter(tags__icontains=f'"{name}"')
+        return queryset.filter(tags__contains=[name])
+
+    def insert_rows(self, rng, names, options):
+        now = timezone.now()
+        batch = []
+        for i in range(options['rows']):
+            batch.append(RawNews(
+                title=f'基准内容{i}', content='基准', source_url=f'{BENCHMARK_URL_PREFIX}{i}',
+                published_at=now - timedelta(minutes=i), is_processed=True,
+                tags=rng.sample(names, options['tags_per_row']),
+            ))
+            if len(batch) >= options['batch_size']:
+                RawNews.objects.bulk_create(batch)
+                batch = []
+        RawNews.objects.bulk_create(batch)
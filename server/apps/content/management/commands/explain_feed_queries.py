@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.content.query_plans import check_feed_query_plans
+
+class Command(BaseCommand):
+    help = '对各Feed列表接口的查询执行 EXPLAIN，出现全表扫描或临时排序时报错'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--show-plans', action='store_true', help='输出每个查询的执行计划')
+
+    def handle(self, *args, **options):
+        failed = 0
+        for name, plan, problems in check_feed_query_plans():
+            if problems:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f'[回退] {name}'))
+                for problem in problems:
+                    self.stdout.write(f'    {problem}')
+            else:
+                self.stdout.write(self.style.SUCCESS(f'[索引] {name}'))
+            if options['show_plans']:
+                for line in plan.splitlines():
+                    self.stdout.write(f'    | {line}')
+        if failed:
+            raise CommandError(f'{failed} 个Feed查询未命中索引')
+        self.stdout.write(self.style.SUCCESS('所有Feed查询均命中索引'))
@@ -0,0 +1,35 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.content.exports import EXPORT_CHUNK_SIZE, export_queryset, gzip_stream, iter_ndjson, parse_since
+
+class Command(BaseCommand):
+    help = '以 NDJSON 流式导出 RawNews（可按 updated_at 增量导出，可选 gzip）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-', help='输出文件路径，缺省输出到标准输出')
+        parser.add_argument('--since', default=None, help='仅导出 updated_at >= since 的内容(ISO 8601)')
+        parser.add_argument('--gzip', action='store_true', help='gzip 压缩输出')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help='每次从游标读取的行数')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_since(options['since'])
+            if since is None:
+                raise CommandError('since必须为ISO 8601时间')
+        chunks = iter_ndjson(export_queryset(since), chunk_size=options['chunk_size'])
+        if options['gzip']:
+            chunks = gzip_stream(chunks)
+        if options['output'] == '-':
+            stream = getattr(self.stdout, 'buffer', None) or sys.stdout.buffer
+            for chunk in chunks:
+                stream.write(chunk)
+            stream.flush()
+            return
+        total = 0
+        with open(options['output'], 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
+                total += len(chunk)
+        self.stderr.write(self.style.SUCCESS(f'已导出到 {options["output"]} ({total} 字节)'))
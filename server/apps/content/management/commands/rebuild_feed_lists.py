@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from apps.content.feeds import rebuild_feed_lists
+
+class Command(BaseCommand):
+    help = '重建所有物化Feed排序列表（分类 × 类型 × 排序组合）'
+
+    def handle(self, *args, **options):
+        specs = rebuild_feed_lists()
+        self.stdout.write(self.style.SUCCESS(f'已重建 {len(specs)} 个Feed排序列表'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from apps.content.media_text import MEDIA_TYPES, index_media_text
+
+class Command(BaseCommand):
+    help = '重建音视频转录文本/歌词/字幕的文本段与倒排数据（保存时会自动维护，用于回填历史数据）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', choices=sorted(MEDIA_TYPES), help='只处理一种内容类型')
+
+    def handle(self, *args, **options):
+        for media_type, model in MEDIA_TYPES.items():
+            if options['type'] and options['type'] != media_type:
+                continue
+            contents = segments = 0
+            for instance in model.objects.order_by('id').iterator(chunk_size=200):
+                segments += index_media_text(instance)
+                contents += 1
+            self.stdout.write(f'{media_type}: 处理 {contents} 个内容，生成 {segments} 个文本段')
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+import datetime
+from django.db.models import Q
+from django.utils import timezone
+from apps.content.hotness import HOTNESS_BATCH_SIZE, recompute_hotness, stale_bucket_filter
+from apps.content.models import RawNews
+
+class Command(BaseCommand):
+    help = '批量重算 RawNews 时间衰减热度（建议每10~30分钟定时执行）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=HOTNESS_BATCH_SIZE, help='每批处理行数')
+        parser.add_argument('--days', type=int, default=None, help='仅重算最近N天发布的内容')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        queryset = RawNews.objects.all()
+        if options['days']:
+            # 更早发布但分桶已过期的行一并重算，否则会一直留在较新的分桶中
+            queryset = queryset.filter(
+                Q(published_at__gte=now - datetime.timedelta(days=options['days'])) | stale_bucket_filter(now)
+            )
+        updated = recompute_hotness(queryset, now, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'已重算 {updated} 条内容的热度'))
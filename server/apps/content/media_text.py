@@ -0,0 +1,277 @@
+"""
+音视频文本段检索（转录文本 / 歌词 / 字幕）
+
+写入时(见 signals.py)把 AudioContent.transcript/lyrics 与 VideoContent.subtitles 切分为带时间偏移的文本段：
+- SRT/WebVTT："00:01:02,500 --> 00:01:05,000" 时间行之后的文本为一段
+- LRC："[01:02.50]歌词" 每个时间标签一段（一行多个标签时各成一段）
+- 字幕 JSON：字符串按上述格式解析；cue 列表 [{start, end, text}]（秒或时间串）；
+  字幕轨列表 [{language, cues|content}] 或 {语言: cues|content}
+- 无时间标记的纯文本按行切分，开始时间按字符位置占全文的比例与时长估算(is_estimated)
+同时为每个内容按来源生成倒排数据：词项 -> 段序号数组，分词与 RawNews 索引一致(search_text.py)。
+查询不解析原文：由倒排求出每个内容命中全部查询词的段序号，按命中段数排序分页，只为当前页回表取文本段。
+只有已发布(status=published)的内容建立文本段。查询含单个汉字片段时回退为文本段上的 LIKE 查询。
+"""
+import re
+from array import array
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Q
+
+from .models import AudioContent, MediaTextPosting, MediaTextSegment, VideoContent
+from .search_text import query_terms, tokenize
+
+MEDIA_TEXT_SOURCES = {AudioContent: ('transcript', 'lyrics'), VideoContent: ('subtitles',)}
+MEDIA_TYPES = {'audio': AudioContent, 'video': VideoContent}
+# 影响文本段的字段，update_fields 不含这些字段的保存不重建
+MEDIA_TEXT_FIELDS = {'transcript', 'lyrics', 'subtitles', 'status', 'duration'}
+MAX_SEGMENT_LENGTH = 500
+MEDIA_MATCHES_PER_CONTENT = 20
+MEDIA_FALLBACK_LIMIT = 2000
+
+TIMESTAMP_RE = r'(?:(\d+):)?(\d{1,2}):(\d{1,2})(?:[.,](\d{1,3}))?'
+CUE_TIME_RE = re.compile(r'^\s*%s\s*-->\s*%s' % (TIMESTAMP_RE, TIMESTAMP_RE))
+LRC_TAG_RE = re.compile(r'\[(\d+):(\d{1,2})(?:[.:](\d{1,3}))?\]')
+TIMESTAMP_TEXT_RE = re.compile(r'^\s*%s\s*$' % TIMESTAMP_RE)
+
+
+def timestamp_ms(hours, minutes, seconds, fraction):
+    millis = int((fraction or '0').ljust(3, '0')[:3])
+    return ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + millis
+
+
+def time_value_ms(value):
+    """JSON 中的时间：数字为秒，字符串为 [hh:]mm:ss[.mmm] 或秒数；无法解析时为 None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return max(0, round(value * 1000))
+    if isinstance(value, str):
+        match = TIMESTAMP_TEXT_RE.match(value)
+        if match:
+            return timestamp_ms(*match.groups())
+        try:
+            return max(0, round(float(value) * 1000))
+        except ValueError:
+            return None
+    return None
+
+
+def clean_text(text):
+    # 去掉 WebVTT/SRT 中的样式标签
+    return ' '.join(re.sub(r'<[^>]+>', '', text).split())[:MAX_SEGMENT_LENGTH]
+
+
+def parse_cues(text):
+    """SRT/WebVTT 文本 -> [(开始毫秒, 结束毫秒, 文本)]"""
+    cues, current, lines = [], None, []
+    for line in text.splitlines() + ['']:
+        match = CUE_TIME_RE.match(line)
+        if match:
+            groups = match.groups()
+            current, lines = (timestamp_ms(*groups[:4]), timestamp_ms(*groups[4:])), []
+        elif not line.strip():
+            if current and lines:
+                cues.append((current[0], current[1], clean_text(' '.join(lines))))
+            current, lines = None, []
+        elif current:
+            lines.append(line)
+    return cues
+
+
+def parse_lrc(text):
+    """LRC 歌词 -> [(开始毫秒, 结束毫秒, 文本)]，结束时间取下一句的开始时间"""
+    lines = []
+    for line in text.splitlines():
+        tags = list(LRC_TAG_RE.finditer(line))
+        if not tags:
+            continue
+        content = clean_text(line[tags[-1].end():])
+        if content:
+            lines.extend((timestamp_ms(None, *tag.groups()), content) for tag in tags)
+    lines.sort(key=lambda line: line[0])
+    return [(start, lines[i + 1][0] if i + 1 < len(lines) else None, content)
+            for i, (start, content) in enumerate(lines)]
+
+
+def parse_plain(text, duration):
+    """无时间标记的文本按行切分，按字符位置估算开始时间"""
+    total = max(len(text), 1)
+    cues, offset = [], 0
+    for line in text.splitlines(keepends=True):
+        content = clean_text(line)
+        if content:
+            cues.append((round(duration * 1000 * offset / total), None, content))
+        offset += len(line)
+    return cues
+
+
+def parse_timed_text(text, duration):
+    """返回 ([(开始毫秒, 结束毫秒, 文本)], 时间是否为估算)"""
+    if not text or not text.strip():
+        return [], False
+    if '-->' in text:
+        cues = parse_cues(text)
+        if cues:
+            return cues, False
+    if LRC_TAG_RE.search(text):
+        cues = parse_lrc(text)
+        if cues:
+            return cues, False
+    return parse_plain(text, duration or 0), True
+
+
+def parse_cue_list(items):
+    cues = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        start = time_value_ms(item.get('start', item.get('begin')))
+        content = clean_text(str(item.get('text') or ''))
+        if start is not None and content:
+            cues.append((start, time_value_ms(item.get('end')), content))
+    return cues
+
+
+def parse_subtitles(value, duration):
+    """VideoContent.subtitles -> [(语言, cues, 是否估算)]"""
+    if isinstance(value, str):
+        return [('', *parse_timed_text(value, duration))]
+    if isinstance(value, dict):
+        if 'cues' in value or 'content' in value:
+            value = [value]
+        else:
+            value = [{'language': language, 'cues': track} for language, track in value.items()]
+    tracks = []
+    if isinstance(value, list):
+        if any(isinstance(item, dict) and 'text' in item for item in value):
+            return [('', parse_cue_list(value), False)]
+        for track in value:
+            if not isinstance(track, dict):
+                continue
+            language = str(track.get('language') or track.get('lang') or '')[:20]
+            body = track.get('cues', track.get('content'))
+            if isinstance(body, str):
+                tracks.append((language, *parse_timed_text(body, duration)))
+            elif isinstance(body, list):
+                tracks.append((language, parse_cue_list(body), False))
+    return tracks
+
+
+def media_text_tracks(instance):
+    """产出 (来源, 语言, cues, 是否估算)"""
+    for source in MEDIA_TEXT_SOURCES[type(instance)]:
+        value = getattr(instance, source)
+        if source == 'subtitles':
+            for language, cues, estimated in parse_subtitles(value, instance.duration):
+                yield source, language, cues, estimated
+        else:
+            yield (source, '', *parse_timed_text(value, instance.duration))
+
+
+def index_media_text(instance):
+    """重建一个音视频内容的文本段与倒排数据，返回段数；未发布的内容只清除"""
+    content_type = ContentType.objects.get_for_model(type(instance))
+    segments, postings = [], defaultdict(lambda: array('I'))
+    if instance.status == 'published':
+        for source, language, cues, estimated in media_text_tracks(instance):
+            for start, end, text in cues:
+                position = len(segments)
+                segments.append(MediaTextSegment(
+                    content_type=content_type, object_id=instance.pk, position=position, source=source,
+                    language=language, start_ms=start, end_ms=end, is_estimated=estimated, text=text,
+                ))
+                for term in set(tokenize(text)):
+                    postings[term, source].append(position)
+    with transaction.atomic():
+        remove_media_text(content_type, instance.pk)
+        MediaTextSegment.objects.bulk_create(segments, batch_size=1000)
+        MediaTextPosting.objects.bulk_create([
+            MediaTextPosting(content_type=content_type, object_id=instance.pk, source=source, term=term,
+                             positions=positions.tobytes())
+            for (term, source), positions in postings.items()
+        ], batch_size=1000)
+    return len(segments)
+
+
+def remove_media_text(content_type, object_id):
+    MediaTextSegment.objects.filter(content_type=content_type, object_id=object_id).delete()
+    MediaTextPosting.objects.filter(content_type=content_type, object_id=object_id).delete()
+
+
+def decode_positions(data):
+    positions = array('I')
+    positions.frombytes(bytes(data))
+    return positions
+
+
+def search_media_text(q, media_type=None, source=None):
+    """
+    命中的内容列表 [(content_type_id, object_id, 命中段序号列表)]，按命中段数降序、内容ID降序；
+    media_type 为 audio/video，source 为 transcript/lyrics/subtitles
+    """
+    terms = query_terms(q)
+    filters = {}
+    if media_type:
+        filters['content_type'] = ContentType.objects.get_for_model(MEDIA_TYPES[media_type])
+    if source:
+        filters['source'] = source
+    if terms is None:
+        rows = (MediaTextSegment.objects.filter(text__icontains=q.strip(), **filters)
+                .order_by('content_type_id', 'object_id', 'position')
+                .values_list('content_type_id', 'object_id', 'position')[:MEDIA_FALLBACK_LIMIT])
+        matched = defaultdict(list)
+        for content_type_id, object_id, position in rows:
+            matched[content_type_id, object_id].append(position)
+    else:
+        # {(内容类型, 内容ID): {词项: 段序号集合}}，同一词项在不同来源中的段序号合并
+        by_content = defaultdict(lambda: defaultdict(set))
+        rows = MediaTextPosting.objects.filter(term__in=terms, **filters).values_list('content_type_id', 'object_id', 'term', 'positions')
+        for content_type_id, object_id, term, data in rows:
+            by_content[content_type_id, object_id][term].update(decode_positions(data))
+        matched = {}
+        for key, term_positions in by_content.items():
+            if len(term_positions) == len(terms):
+                positions = set.intersection(*term_positions.values())
+                if positions:
+                    matched[key] = sorted(positions)
+    hits = [(content_type_id, object_id, positions) for (content_type_id, object_id), positions in matched.items()]
+    hits.sort(key=lambda hit: (len(hit[2]), hit[1]), reverse=True)
+    return hits
+
+
+def load_media_matches(hits):
+    """为一页命中回表取内容与文本段，返回结果列表（与 hits 顺序一致）"""
+    if not hits:
+        return []
+    condition = Q()
+    for content_type_id, object_id, positions in hits:
+        condition |= Q(content_type_id=content_type_id, object_id=object_id,
+                       position__in=positions[:MEDIA_MATCHES_PER_CONTENT])
+    segments = defaultdict(list)
+    rows = MediaTextSegment.objects.filter(condition).order_by('position').values(
+        'content_type_id', 'object_id', 'source', 'language', 'start_ms', 'end_ms', 'is_estimated', 'text',
+    )
+    for row in rows:
+        segments[row['content_type_id'], row['object_id']].append({
+            "source": row['source'],
+            "language": row['language'],
+            "start": row['start_ms'] / 1000,
+            "end": row['end_ms'] / 1000 if row['end_ms'] is not None else None,
+            "estimated": row['is_estimated'],
+            "text": row['text'],
+        })
+    contents = {}
+    for media_type, model in MEDIA_TYPES.items():
+        content_type_id = ContentType.objects.get_for_model(model).pk
+        ids = [object_id for hit_type, object_id, _ in hits if hit_type == content_type_id]
+        if ids:
+            for content in model.objects.filter(id__in=ids).values('id', 'title', 'cover_image', 'duration'):
+                contents[content_type_id, content['id']] = dict(content, type=media_type)
+    results = []
+    for content_type_id, object_id, positions in hits:
+        content = contents.get((content_type_id, object_id))
+        if content is not None:
+            results.append(dict(content, match_count=len(positions), matches=segments[content_type_id, object_id]))
+    return results
@@ -0,0 +1,61 @@
+# Generated by Django 6.1.2 on 2026-10-18 12:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0006_remove_audioarticlesync_article_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=models.Index(fields=['is_processed', '-published_at', '-id'], name='content_raw_is_proc_72e728_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=models.Index(fields=['is_processed', 'type', '-published_at', '-id'], name='content_raw_is_proc_4369ef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=models.Index(fields=['is_processed', 'category', '-published_at', '-id'], name='content_raw_is_proc_6a562f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=models.Index(fields=['category', '-published_at', '-id'], name='content_raw_categor_b1196d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=models.Index(fields=['is_processed', '-importance_score', '-id'], name='content_raw_is_proc_c9c549_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=models.Index(fields=['is_processed', 'type', '-importance_score', '-id'], name='content_raw_is_proc_182093_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=models.Index(fields=['is_processed', 'category', '-importance_score', '-id'], name='content_raw_is_proc_c22c64_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=models.Index(fields=['category', '-importance_score', '-id'], name='content_raw_categor_fdb79c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=models.Index(fields=['is_processed', '-sentiment_score', '-id'], name='content_raw_is_proc_c7a132_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=models.Index(fields=['is_processed', 'type', '-sentiment_score', '-id'], name='content_raw_is_proc_cd9b1f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=models.Index(fields=['is_processed', 'category', '-sentiment_score', '-id'], name='content_raw_is_proc_3cd2fe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=models.Index(fields=['category', '-sentiment_score', '-id'], name='content_raw_categor_9b0a65_idx'),
+        ),
+    ]
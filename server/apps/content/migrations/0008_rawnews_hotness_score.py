@@ -0,0 +1,76 @@
+# Generated by Django 6.1.2 on 2026-10-18 12:53
+
+import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# 热度公式与分桶按本迁移编写时的定义内联，之后 hotness.py 的改动不影响历史迁移
+HOTNESS_GRAVITY = 1.8
+AGE_BUCKET_LIMITS = [datetime.timedelta(days=1), datetime.timedelta(weeks=1), datetime.timedelta(days=30)]
+
+
+def age_bucket(published_at, now):
+    if not published_at:
+        return 0
+    age = now - published_at
+    for index, limit in enumerate(AGE_BUCKET_LIMITS):
+        if age <= limit:
+            return index
+    return len(AGE_BUCKET_LIMITS)
+
+
+def hotness(importance_score, published_at, now):
+    importance = float(importance_score) if importance_score is not None else 0.0
+    age_hours = max((now - published_at).total_seconds() / 3600, 0.0) if published_at else 0.0
+    return (importance + 1) / (age_hours + 2) ** HOTNESS_GRAVITY
+
+
+def backfill_hotness(apps, schema_editor):
+    RawNews = apps.get_model('content', 'RawNews')
+    now = timezone.now()
+    last_id = 0
+    while True:
+        rows = list(
+            RawNews.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'importance_score', 'published_at')[:2000]
+        )
+        if not rows:
+            return
+        objs = [
+            RawNews(id=pk, hotness_score=hotness(importance, published_at, now),
+                    age_bucket=age_bucket(published_at, now))
+            for pk, importance, published_at in rows
+        ]
+        RawNews.objects.bulk_update(objs, ['hotness_score', 'age_bucket'], batch_size=500)
+        last_id = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0007_rawnews_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rawnews',
+            name='age_bucket',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='发布时长分桶'),
+        ),
+        migrations.AddField(
+            model_name='rawnews',
+            name='hotness_score',
+            field=models.FloatField(default=0, verbose_name='时间衰减热度'),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=models.Index(fields=['is_processed', 'age_bucket', '-hotness_score', '-id'], name='content_raw_is_proc_66976e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=models.Index(fields=['is_processed', 'category', 'age_bucket', '-hotness_score', '-id'], name='content_raw_is_proc_9c6df1_idx'),
+        ),
+        migrations.RunPython(backfill_hotness, migrations.RunPython.noop),
+    ]
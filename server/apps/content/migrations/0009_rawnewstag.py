@@ -0,0 +1,27 @@
+# Generated by Django 6.1.2 on 2026-10-18 12:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0008_rawnews_hotness_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RawNewsTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('news', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='content.rawnews', verbose_name='内容')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='news_links', to='content.contenttag', verbose_name='标签')),
+            ],
+            options={
+                'verbose_name': '内容标签索引',
+                'verbose_name_plural': '内容标签索引',
+                'unique_together': {('tag', 'news')},
+            },
+        ),
+    ]
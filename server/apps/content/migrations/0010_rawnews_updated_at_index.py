@@ -0,0 +1,17 @@
+# Generated by Django 6.1.2 on 2026-10-18 12:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0009_rawnewstag'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=models.Index(fields=['updated_at', 'id'], name='content_raw_updated_137f0d_idx'),
+        ),
+    ]
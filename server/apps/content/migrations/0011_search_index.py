@@ -0,0 +1,42 @@
+# Generated by Django 6.1.2 on 2026-10-18 13:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0010_rawnews_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc_count', models.PositiveIntegerField(default=0, verbose_name='文档数')),
+                ('documents', models.BinaryField(verbose_name='文档属性')),
+                ('deleted_ids', models.BinaryField(default=b'', verbose_name='已删除文档')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '搜索索引段',
+                'verbose_name_plural': '搜索索引段',
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=32, verbose_name='词项')),
+                ('data', models.BinaryField(verbose_name='倒排数据')),
+                ('segment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='content.searchsegment', verbose_name='索引段')),
+            ],
+            options={
+                'verbose_name': '搜索倒排表',
+                'verbose_name_plural': '搜索倒排表',
+                'unique_together': {('term', 'segment')},
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.1.2 on 2026-10-18 14:02
+
+from django.db import migrations
+
+
+def drop_segments(apps, schema_editor):
+    # 倒排数据新增 BM25 影响值列，旧格式的段无法读取；删除后搜索回退为 LIKE，需执行 rebuild_search_index
+    SearchSegment = apps.get_model('content', 'SearchSegment')
+    SearchSegment.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0011_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_segments, migrations.RunPython.noop),
+    ]
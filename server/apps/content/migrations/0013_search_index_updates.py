@@ -0,0 +1,40 @@
+# Generated by Django 6.1.2 on 2026-10-18 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0012_search_posting_impacts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexUpdate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('news_id', models.BigIntegerField(verbose_name='内容ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='入队时间')),
+            ],
+            options={
+                'verbose_name': '搜索索引变更',
+                'verbose_name_plural': '搜索索引变更',
+            },
+        ),
+        migrations.AddField(
+            model_name='searchsegment',
+            name='is_active',
+            field=models.BooleanField(default=True, verbose_name='是否启用'),
+        ),
+        migrations.AddField(
+            model_name='searchsegment',
+            name='max_doc_id',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='最大文档ID'),
+        ),
+        migrations.AddField(
+            model_name='searchsegment',
+            name='min_doc_id',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='最小文档ID'),
+        ),
+    ]
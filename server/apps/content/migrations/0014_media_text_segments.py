@@ -0,0 +1,51 @@
+# Generated by Django 6.1.2 on 2026-10-18 13:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0013_search_index_updates'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaTextPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField(verbose_name='内容ID')),
+                ('source', models.CharField(choices=[('transcript', '转录文本'), ('lyrics', '歌词'), ('subtitles', '字幕')], max_length=20, verbose_name='来源')),
+                ('term', models.CharField(max_length=32, verbose_name='词项')),
+                ('positions', models.BinaryField(verbose_name='段序号')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype', verbose_name='内容类型')),
+            ],
+            options={
+                'verbose_name': '音视频文本倒排表',
+                'verbose_name_plural': '音视频文本倒排表',
+                'unique_together': {('term', 'content_type', 'object_id', 'source')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MediaTextSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField(verbose_name='内容ID')),
+                ('position', models.PositiveIntegerField(verbose_name='段序号')),
+                ('source', models.CharField(choices=[('transcript', '转录文本'), ('lyrics', '歌词'), ('subtitles', '字幕')], max_length=20, verbose_name='来源')),
+                ('language', models.CharField(blank=True, default='', max_length=20, verbose_name='语言')),
+                ('start_ms', models.PositiveIntegerField(verbose_name='开始时间(毫秒)')),
+                ('end_ms', models.PositiveIntegerField(blank=True, null=True, verbose_name='结束时间(毫秒)')),
+                ('is_estimated', models.BooleanField(default=False, verbose_name='时间是否为估算')),
+                ('text', models.TextField(verbose_name='文本')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype', verbose_name='内容类型')),
+            ],
+            options={
+                'verbose_name': '音视频文本段',
+                'verbose_name_plural': '音视频文本段',
+                'unique_together': {('content_type', 'object_id', 'position')},
+            },
+        ),
+    ]
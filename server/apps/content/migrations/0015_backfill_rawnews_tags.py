@@ -0,0 +1,70 @@
+import hashlib
+
+from django.db import migrations
+from django.utils.text import slugify
+
+BATCH_SIZE = 1000
+
+
+# 标签名规范化与自动标签 slug 按本迁移编写时的 tagging.py 内联，之后的改动不影响历史迁移
+def tag_slug(name):
+    digest = hashlib.md5(name.encode()).hexdigest()[:8]
+    return '%s-%s' % (slugify(name, allow_unicode=True)[:40] or 'tag', digest)
+
+
+def normalize_tag_names(tags, max_length):
+    names = []
+    for name in tags if isinstance(tags, list) else []:
+        if isinstance(name, str):
+            name = name.strip()
+            if name and len(name) <= max_length and name not in names:
+                names.append(name)
+    return names
+
+
+def backfill_rawnews_tags(apps, schema_editor):
+    """按 RawNews.tags 与 ContentTagRelation 回填 RawNewsTag（与 tagging.sync_news_tags 一致）"""
+    RawNews = apps.get_model('content', 'RawNews')
+    RawNewsTag = apps.get_model('content', 'RawNewsTag')
+    ContentTag = apps.get_model('content', 'ContentTag')
+    ContentTagRelation = apps.get_model('content', 'ContentTagRelation')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    max_length = ContentTag._meta.get_field('name').max_length
+    content_type = ContentType.objects.filter(app_label='content', model='rawnews').first()
+    last_id = 0
+    while True:
+        batch = list(RawNews.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'tags')[:BATCH_SIZE])
+        if not batch:
+            return
+        names_by_news = {pk: normalize_tag_names(tags, max_length) for pk, tags in batch}
+        names = sorted({name for names in names_by_news.values() for name in names})
+        tag_ids = dict(ContentTag.objects.filter(name__in=names).values_list('name', 'id'))
+        missing = [name for name in names if name not in tag_ids]
+        if missing:
+            ContentTag.objects.bulk_create(
+                [ContentTag(name=name, slug=tag_slug(name), is_auto_generated=True, is_active=False) for name in missing],
+                ignore_conflicts=True,
+            )
+            tag_ids.update(ContentTag.objects.filter(name__in=missing).values_list('name', 'id'))
+        links = {(pk, tag_ids[name]) for pk, names in names_by_news.items() for name in names if name in tag_ids}
+        if content_type is not None:
+            links.update(ContentTagRelation.objects.filter(
+                content_type=content_type, object_id__in=list(names_by_news),
+            ).values_list('object_id', 'tag_id'))
+        RawNewsTag.objects.bulk_create(
+            [RawNewsTag(news_id=news_id, tag_id=tag_id) for news_id, tag_id in links],
+            batch_size=500, ignore_conflicts=True,
+        )
+        last_id = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0014_media_text_segments'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rawnews_tags, migrations.RunPython.noop),
+    ]
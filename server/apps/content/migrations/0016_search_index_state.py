@@ -0,0 +1,25 @@
+# Generated by Django 6.1.2 on 2026-10-18 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0015_backfill_rawnews_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0, verbose_name='索引版本')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '搜索索引状态',
+                'verbose_name_plural': '搜索索引状态',
+            },
+        ),
+    ]
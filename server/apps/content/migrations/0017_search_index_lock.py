@@ -0,0 +1,28 @@
+# Generated by Django 6.1.2 on 2026-10-18 14:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0016_search_index_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchindexstate',
+            name='last_applied_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='最近应用变更时间'),
+        ),
+        migrations.AddField(
+            model_name='searchindexstate',
+            name='locked_by',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='锁持有者'),
+        ),
+        migrations.AddField(
+            model_name='searchindexstate',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='锁到期时间'),
+        ),
+    ]
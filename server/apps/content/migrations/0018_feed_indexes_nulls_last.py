@@ -0,0 +1,110 @@
+# Generated by Django 6.1.2 on 2026-10-18 14:57
+
+import apps.content.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0017_search_index_lock'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='rawnews',
+            name='content_raw_is_proc_72e728_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='rawnews',
+            name='content_raw_is_proc_4369ef_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='rawnews',
+            name='content_raw_is_proc_6a562f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='rawnews',
+            name='content_raw_categor_b1196d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='rawnews',
+            name='content_raw_is_proc_c9c549_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='rawnews',
+            name='content_raw_is_proc_182093_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='rawnews',
+            name='content_raw_is_proc_c22c64_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='rawnews',
+            name='content_raw_categor_fdb79c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='rawnews',
+            name='content_raw_is_proc_c7a132_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='rawnews',
+            name='content_raw_is_proc_cd9b1f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='rawnews',
+            name='content_raw_is_proc_3cd2fe_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='rawnews',
+            name='content_raw_categor_9b0a65_idx',
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=apps.content.models.NullsLastIndex(fields=['is_processed', '-published_at', '-id'], name='content_raw_is_proc_72e728_idx', nulls_last=('published_at',)),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=apps.content.models.NullsLastIndex(fields=['is_processed', 'type', '-published_at', '-id'], name='content_raw_is_proc_4369ef_idx', nulls_last=('published_at',)),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=apps.content.models.NullsLastIndex(fields=['is_processed', 'category', '-published_at', '-id'], name='content_raw_is_proc_6a562f_idx', nulls_last=('published_at',)),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=apps.content.models.NullsLastIndex(fields=['category', '-published_at', '-id'], name='content_raw_categor_b1196d_idx', nulls_last=('published_at',)),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=apps.content.models.NullsLastIndex(fields=['is_processed', '-importance_score', '-id'], name='content_raw_is_proc_c9c549_idx', nulls_last=('importance_score',)),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=apps.content.models.NullsLastIndex(fields=['is_processed', 'type', '-importance_score', '-id'], name='content_raw_is_proc_182093_idx', nulls_last=('importance_score',)),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=apps.content.models.NullsLastIndex(fields=['is_processed', 'category', '-importance_score', '-id'], name='content_raw_is_proc_c22c64_idx', nulls_last=('importance_score',)),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=apps.content.models.NullsLastIndex(fields=['category', '-importance_score', '-id'], name='content_raw_categor_fdb79c_idx', nulls_last=('importance_score',)),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=apps.content.models.NullsLastIndex(fields=['is_processed', '-sentiment_score', '-id'], name='content_raw_is_proc_c7a132_idx', nulls_last=('sentiment_score',)),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=apps.content.models.NullsLastIndex(fields=['is_processed', 'type', '-sentiment_score', '-id'], name='content_raw_is_proc_cd9b1f_idx', nulls_last=('sentiment_score',)),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=apps.content.models.NullsLastIndex(fields=['is_processed', 'category', '-sentiment_score', '-id'], name='content_raw_is_proc_3cd2fe_idx', nulls_last=('sentiment_score',)),
+        ),
+        migrations.AddIndex(
+            model_name='rawnews',
+            index=apps.content.models.NullsLastIndex(fields=['category', '-sentiment_score', '-id'], name='content_raw_categor_9b0a65_idx', nulls_last=('sentiment_score',)),
+        ),
+    ]
@@ -2,6 +2,39 @@ from django.db import models
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.conf import settings
+from django.utils import timezone
+
+from .hotness import compute_hotness, compute_age_bucket
+
+
+class NullsLastIndex(models.Index):
+    """
+    nulls_last 中的降序字段在 PostgreSQL 上建为 DESC NULLS LAST，与 Feed 排序的空值位置一致，
+    否则规划器不会用索引顺序代替排序；SQLite 降序本就空值在后且不支持该写法，保持原样
+    """
+
+    def __init__(self, *args, nulls_last=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        if not set(nulls_last) <= {name for name, _ in self.fields_orders}:
+            raise ValueError('NullsLastIndex.nulls_last 必须是索引中的字段')
+        self.nulls_last = tuple(nulls_last)
+
+    def deconstruct(self):
+        path, expressions, kwargs = super().deconstruct()
+        if self.nulls_last:
+            kwargs['nulls_last'] = self.nulls_last
+        return path, expressions, kwargs
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        index = self
+        if schema_editor.connection.vendor == 'postgresql' and self.nulls_last:
+            index = self.clone()
+            index.fields_orders = [
+                (name, (order or 'ASC') + ' NULLS LAST' if name in self.nulls_last else order)
+                for name, order in self.fields_orders
+            ]
+        return models.Index.create_sql(index, model, schema_editor, using=using, **kwargs)
+
 
 class ContentCategory(models.Model):
     """内容分类表 - 支持多种内容类型"""
@@ -55,10 +88,14 @@ class ContentCategory(models.Model):
         return self.name
     
     def get_full_name(self):
-        """获取完整分类路径"""
-        if self.parent:
+        """获取完整分类路径，父分类路径取自缓存的分类树"""
+        if self.parent_id is None:
+            return self.name
+        from .category_tree import get_category_tree
+        parent_name = get_category_tree()['full_names'].get(self.parent_id)
+        if parent_name is None:
             return f"{self.parent.get_full_name()} > {self.name}"
-        return self.name
+        return f"{parent_name} > {self.name}"
 
 # 保留原有NewsCategory用于兼容
 class NewsCategory(ContentCategory):
@@ -678,6 +715,8 @@ class RawNews(models.Model):
     importance_score = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True, verbose_name='重要性分值')
     relevance_score = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True, verbose_name='相关性分值')
     quality_score = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True, verbose_name='质量分值')
+    hotness_score = models.FloatField(default=0, verbose_name='时间衰减热度')
+    age_bucket = models.PositiveSmallIntegerField(default=0, verbose_name='发布时长分桶')
     
     # 处理状态
     is_processed = models.BooleanField(default=False, verbose_name='是否已处理')
@@ -694,6 +733,147 @@ class RawNews(models.Model):
         verbose_name = '原始新闻'
         verbose_name_plural = '原始新闻'
         ordering = ['-published_at', '-crawled_at']
+        # Feed查询的访问路径：等值筛选(is_processed/type/category) + 排序字段 + id
+        # 可空排序字段按 desc(nulls_last=True) 排序，索引需同样空值在后
+        indexes = [
+            NullsLastIndex(fields=['is_processed', '-published_at', '-id'], nulls_last=['published_at']),
+            NullsLastIndex(fields=['is_processed', 'type', '-published_at', '-id'], nulls_last=['published_at']),
+            NullsLastIndex(fields=['is_processed', 'category', '-published_at', '-id'], nulls_last=['published_at']),
+            NullsLastIndex(fields=['category', '-published_at', '-id'], nulls_last=['published_at']),
+            NullsLastIndex(fields=['is_processed', '-importance_score', '-id'], nulls_last=['importance_score']),
+            NullsLastIndex(fields=['is_processed', 'type', '-importance_score', '-id'], nulls_last=['importance_score']),
+            NullsLastIndex(fields=['is_processed', 'category', '-importance_score', '-id'], nulls_last=['importance_score']),
+            NullsLastIndex(fields=['category', '-importance_score', '-id'], nulls_last=['importance_score']),
+            NullsLastIndex(fields=['is_processed', '-sentiment_score', '-id'], nulls_last=['sentiment_score']),
+            NullsLastIndex(fields=['is_processed', 'type', '-sentiment_score', '-id'], nulls_last=['sentiment_score']),
+            NullsLastIndex(fields=['is_processed', 'category', '-sentiment_score', '-id'], nulls_last=['sentiment_score']),
+            NullsLastIndex(fields=['category', '-sentiment_score', '-id'], nulls_last=['sentiment_score']),
+            models.Index(fields=['is_processed', 'age_bucket', '-hotness_score', '-id']),
+            models.Index(fields=['is_processed', 'category', 'age_bucket', '-hotness_score', '-id']),
+            # 增量导出按 updated_at 顺序读取
+            models.Index(fields=['updated_at', 'id']),
+        ]
+
+    def save(self, *args, **kwargs):
+        # 新建或更新时即时计算热度，之后由定时任务随时间衰减重算
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'hotness_score' in update_fields:
+            published_at = self._meta.get_field('published_at').to_python(self.published_at)
+            if published_at and timezone.is_naive(published_at):
+                published_at = timezone.make_aware(published_at)
+            now = timezone.now()
+            self.hotness_score = compute_hotness(self.importance_score, published_at, now)
+            self.age_bucket = compute_age_bucket(published_at, now)
+        super().save(*args, **kwargs)
     
     def __str__(self):
-        return self.title 
\ No newline at end of file
+        return self.title 
+class RawNewsTag(models.Model):
+    """RawNews 与标签的规范化关联，由 RawNews.tags 与 ContentTagRelation 同步生成，供标签筛选走索引"""
+    news = models.ForeignKey(RawNews, on_delete=models.CASCADE, related_name='tag_links', verbose_name='内容')
+    tag = models.ForeignKey(ContentTag, on_delete=models.CASCADE, related_name='news_links', verbose_name='标签')
+
+    class Meta:
+        verbose_name = '内容标签索引'
+        verbose_name_plural = '内容标签索引'
+        # (tag, news) 唯一索引即标签筛选的访问路径
+        unique_together = ('tag', 'news')
+
+class SearchSegment(models.Model):
+    """
+    倒排索引段：一批文档一次写入、之后不再修改的倒排表
+    documents 为按行号排列的文档属性列(见 search_index.SegmentDocuments)，
+    deleted_ids 为段内已删除或已被新段替代的文档ID(墓碑)
+    """
+    doc_count = models.PositiveIntegerField(default=0, verbose_name='文档数')
+    documents = models.BinaryField(verbose_name='文档属性')
+    deleted_ids = models.BinaryField(default=b'', verbose_name='已删除文档')
+    # 段内文档ID范围，打墓碑时据此跳过无关段；为空表示未知
+    min_doc_id = models.BigIntegerField(null=True, blank=True, verbose_name='最小文档ID')
+    max_doc_id = models.BigIntegerField(null=True, blank=True, verbose_name='最大文档ID')
+    # 重建期间新段先以未启用状态写入，完成后一次切换
+    is_active = models.BooleanField(default=True, verbose_name='是否启用')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+
+    class Meta:
+        verbose_name = '搜索索引段'
+        verbose_name_plural = '搜索索引段'
+
+class SearchPosting(models.Model):
+    """倒排表：词项在某个段中的文档行号及各字段词频"""
+    segment = models.ForeignKey(SearchSegment, on_delete=models.CASCADE, related_name='postings', verbose_name='索引段')
+    term = models.CharField(max_length=32, verbose_name='词项')
+    data = models.BinaryField(verbose_name='倒排数据')
+
+    class Meta:
+        verbose_name = '搜索倒排表'
+        verbose_name_plural = '搜索倒排表'
+        # 按词项查找各段的倒排数据
+        unique_together = ('term', 'segment')
+
+class SearchIndexUpdate(models.Model):
+    """搜索索引变更队列：RawNews 保存/删除时写入，由 apply_search_updates 批量应用"""
+    news_id = models.BigIntegerField(verbose_name='内容ID')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='入队时间')
+
+    class Meta:
+        verbose_name = '搜索索引变更'
+        verbose_name_plural = '搜索索引变更'
+
+class SearchIndexState(models.Model):
+    """
+    搜索索引状态(单行，pk=1)：段发生变化时与段的修改在同一事务内更新 version，
+    各进程据此判断缓存的段列表与墓碑是否过期，不依赖进程内缓存的失效通知；
+    locked_by/locked_until 为修改索引的租约锁（见 search_updates.index_lock）
+    """
+    version = models.BigIntegerField(default=0, verbose_name='索引版本')
+    locked_by = models.CharField(max_length=64, blank=True, default='', verbose_name='锁持有者')
+    locked_until = models.DateTimeField(null=True, blank=True, verbose_name='锁到期时间')
+    last_applied_at = models.DateTimeField(null=True, blank=True, verbose_name='最近应用变更时间')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        verbose_name = '搜索索引状态'
+        verbose_name_plural = '搜索索引状态'
+
+class MediaTextSegment(models.Model):
+    """
+    音视频的转录文本、歌词与字幕按时间切分后的文本段，时间偏移在写入时解析好(见 media_text.py)
+    position 为同一内容内各来源统一编号的段序号，倒排数据(MediaTextPosting)以其定位
+    """
+    SOURCE_CHOICES = [
+        ('transcript', '转录文本'),
+        ('lyrics', '歌词'),
+        ('subtitles', '字幕'),
+    ]
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, verbose_name='内容类型')
+    object_id = models.PositiveIntegerField(verbose_name='内容ID')
+    content_object = GenericForeignKey('content_type', 'object_id')
+    position = models.PositiveIntegerField(verbose_name='段序号')
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, verbose_name='来源')
+    language = models.CharField(max_length=20, blank=True, default='', verbose_name='语言')
+    start_ms = models.PositiveIntegerField(verbose_name='开始时间(毫秒)')
+    end_ms = models.PositiveIntegerField(null=True, blank=True, verbose_name='结束时间(毫秒)')
+    # 纯文本没有时间标记，按字符位置占全文的比例与时长估算
+    is_estimated = models.BooleanField(default=False, verbose_name='时间是否为估算')
+    text = models.TextField(verbose_name='文本')
+
+    class Meta:
+        verbose_name = '音视频文本段'
+        verbose_name_plural = '音视频文本段'
+        unique_together = ('content_type', 'object_id', 'position')
+
+class MediaTextPosting(models.Model):
+    """音视频文本段倒排表：词项在某个内容某个来源中出现的段序号(uint32 数组)"""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, verbose_name='内容类型')
+    object_id = models.PositiveIntegerField(verbose_name='内容ID')
+    source = models.CharField(max_length=20, choices=MediaTextSegment.SOURCE_CHOICES, verbose_name='来源')
+    term = models.CharField(max_length=32, verbose_name='词项')
+    positions = models.BinaryField(verbose_name='段序号')
+
+    class Meta:
+        verbose_name = '音视频文本倒排表'
+        verbose_name_plural = '音视频文本倒排表'
+        # 按词项查找各内容的倒排数据
+        unique_together = ('term', 'content_type', 'object_id', 'source')
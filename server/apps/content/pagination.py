@@ -0,0 +1,244 @@
+import base64
+import functools
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, InvalidPage, Page, PageNotAnInteger, Paginator
+from django.db.models import F, OrderBy, Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+
+from .counts import estimate_count, get_cached_count
+
+
+class CountedPage(Page):
+    """总数非精确时，has_next 以多取的一行判断"""
+    has_more = None
+
+    def has_next(self):
+        return super().has_next() if self.has_more is None else self.has_more
+
+
+class CountedPaginator(Paginator):
+    """
+    总数取自分页总数缓存(见 counts.py)的分页器
+    count_mode: cached(默认) / estimate / exact；非查询集数据源(如物化排序列表)直接取长度
+    """
+    def __init__(self, object_list, per_page, count_mode='cached', **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_mode = count_mode
+        self.count_exact = True
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet) or self.count_mode == 'exact':
+            return super().count
+        if self.count_mode == 'estimate':
+            total, self.count_exact = estimate_count(self.object_list)
+        else:
+            total, self.count_exact = get_cached_count(self.object_list)
+        return total
+
+    def validate_number(self, number):
+        # 总数可能偏小，不据此拒绝页码，越界由实际取数判断
+        self.count
+        if self.count_exact:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.count_exact:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages['no_results'])
+        page = self._get_page(rows[:self.per_page], number, self)
+        page.has_more = len(rows) > self.per_page
+        return page
+
+    def _get_page(self, *args, **kwargs):
+        return CountedPage(*args, **kwargs)
+
+
+class FeedPageNumberPagination(PageNumberPagination):
+    """
+    Feed流页码分页
+    总数默认取自分页总数缓存，count=estimate 时对大结果集返回估算值，count=exact 时强制精确计数；
+    响应中 total_exact 标明总数是否精确
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    count_query_param = 'count'
+    count_modes = ('cached', 'estimate', 'exact')
+
+    @property
+    def django_paginator_class(self):
+        return functools.partial(CountedPaginator, count_mode=self.count_mode)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.set_count_mode(request.query_params)
+        return super().paginate_queryset(queryset, request, view)
+
+    def paginate_params(self, queryset, params):
+        """
+        按查询参数分页，不需要请求对象（供请求之外计算整页数据，如热门搜索预计算）；
+        页码无效时与 paginate_queryset 一样抛出 NotFound
+        """
+        self.set_count_mode(params)
+        paginator = self.django_paginator_class(queryset, self.page_size_from(params))
+        page_number = params.get(self.page_query_param) or 1
+        if page_number in self.last_page_strings:
+            page_number = paginator.num_pages
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        return list(self.page)
+
+    def set_count_mode(self, params):
+        mode = params.get(self.count_query_param, 'cached')
+        self.count_mode = mode if mode in self.count_modes else 'cached'
+
+    def get_page_size(self, request):
+        return self.page_size_from(request.query_params)
+
+    def page_size_from(self, params):
+        try:
+            size = int(params[self.page_size_query_param])
+        except (KeyError, TypeError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def get_pagination_info(self, request=None):
+        paginator = self.page.paginator
+        info = {
+            "page": self.page.number,
+            "page_size": paginator.per_page,
+            "total": paginator.count,
+            "total_pages": paginator.num_pages,
+            "total_exact": paginator.count_exact,
+            "has_next": self.page.has_next(),
+            "has_previous": self.page.has_previous(),
+        }
+        # 快照分页返回令牌，后续翻页携带 snapshot=<令牌>
+        token = getattr(paginator.object_list, 'token', None)
+        if token:
+            info["snapshot"] = token
+        return info
+
+
+class FeedCursorPagination(BasePagination):
+    """
+    Feed流游标(keyset)分页
+    按查询集的首个排序字段 + id 定位，不做OFFSET扫描和COUNT(*)，
+    第N页与第1页代价相同，新数据插入时已加载的条目不会错位。
+    请求携带 cursor 参数即启用（首页传空值），响应返回不透明的 next_cursor。
+    """
+    cursor_query_param = 'cursor'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = '无效的游标'
+
+    @classmethod
+    def is_requested(cls, request):
+        return cls.cursor_query_param in request.query_params
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, queryset):
+        """取查询集的主排序字段，返回 (字段名, 是否降序)"""
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        first = ordering[0] if ordering else '-id'
+        # 支持 F(字段).desc(nulls_last=True) 形式的排序
+        if isinstance(first, OrderBy) and isinstance(first.expression, F):
+            first = ('-' if first.descending else '') + first.expression.name
+        if not isinstance(first, str):
+            first = '-id'
+        return first.lstrip('-'), first.startswith('-')
+
+    def get_page_queryset(self, queryset, request):
+        """按 (排序字段, id) 重新排序并应用游标条件，返回未切片的查询集"""
+        self.page_size_value = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(queryset)
+        model_field = queryset.model._meta.get_field(self.field)
+        nullable = self.field != 'id' and model_field.null
+
+        if self.field == 'id':
+            queryset = queryset.order_by('-id' if self.descending else 'id')
+        else:
+            expr = F(self.field).desc(nulls_last=True) if self.descending else F(self.field).asc(nulls_last=True)
+            queryset = queryset.order_by(expr, '-id' if self.descending else 'id')
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            value, last_id = cursor
+            if value is not None:
+                try:
+                    value = model_field.to_python(value)
+                except ValidationError:
+                    raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(self.get_keyset_filter(value, last_id, nullable))
+        return queryset
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+        rows = list(queryset[:self.page_size_value + 1])
+        self.has_next = len(rows) > self.page_size_value
+        self.page = rows[:self.page_size_value]
+        self.next_cursor = self.encode_cursor(self.page[-1]) if self.has_next else None
+        return self.page
+
+    def get_keyset_filter(self, value, last_id, nullable):
+        op = 'lt' if self.descending else 'gt'
+        if self.field == 'id':
+            return Q(**{f'id__{op}': last_id})
+        # 空值统一排在末尾
+        if value is None:
+            return Q(**{f'{self.field}__isnull': True, f'id__{op}': last_id})
+        condition = Q(**{f'{self.field}__{op}': value}) | Q(**{self.field: value, f'id__{op}': last_id})
+        if nullable:
+            condition |= Q(**{f'{self.field}__isnull': True})
+        return condition
+
+    def encode_cursor(self, obj):
+        value = getattr(obj, self.field)
+        if value is not None and self.field != 'id':
+            value = str(value.isoformat() if hasattr(value, 'isoformat') else value)
+        payload = json.dumps({"f": self.field, "v": value, "id": obj.pk}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            if payload['f'] != self.field:
+                raise ValueError
+            return payload['v'], int(payload['id'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_pagination_info(self, request):
+        return {
+            "page_size": self.page_size_value,
+            "next_cursor": self.next_cursor,
+            "has_next": self.has_next,
+        }
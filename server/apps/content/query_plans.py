@@ -0,0 +1,117 @@
+"""
+Feed查询执行计划检查
+
+对各列表接口实际执行的查询集运行 EXPLAIN，出现全表扫描或临时排序即视为回退。
+供 manage.py explain_feed_queries 与测试用例共用。
+"""
+import datetime
+from contextlib import contextmanager
+from decimal import Decimal
+from urllib.parse import urlencode
+
+from django.db import connection, transaction
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from rest_framework.request import Request
+
+from .feeds import FEED_ORDER_FIELDS, spec_queryset
+from .models import RawNews
+from .pagination import FeedCursorPagination
+from .views import ContentRecommendView, ContentPublicListView, ContentTrendingView
+
+FEED_FILTERS = [{}, {'type': 'video'}, {'category_id': 1}, {'type': 'video', 'category_id': 1}]
+RECOMMEND_SORTS = ['published_at', 'hot', 'popular']
+PUBLIC_SORTS = ['latest', 'popular', 'hot']
+
+
+def params_request(params):
+    """只带查询参数的 GET 请求，用于在请求之外取得视图构造的查询集"""
+    http_request = HttpRequest()
+    http_request.method = 'GET'
+    http_request.GET = params if isinstance(params, QueryDict) else QueryDict(urlencode(params))
+    return Request(http_request)
+
+
+def view_queryset(view_class, params):
+    request = params_request(params)
+    view = view_class(request=request, args=(), kwargs={}, format_kwarg=None)
+    return request, view.filter_queryset(view.get_queryset())
+
+
+def cursor_queryset(queryset, request):
+    """构造一个非首页游标，返回游标分页实际执行的查询集"""
+    paginator = FeedCursorPagination()
+    paginator.field, paginator.descending = paginator.get_ordering(queryset)
+    sample = RawNews(id=1, published_at=timezone.now() - datetime.timedelta(days=1),
+                     importance_score=Decimal('0.5'), sentiment_score=Decimal('0.5'))
+    params = request.query_params.copy()
+    params[paginator.cursor_query_param] = paginator.encode_cursor(sample)
+    cursor_request = params_request(params)
+    return paginator.get_page_queryset(queryset, cursor_request)[:paginator.get_page_size(cursor_request) + 1]
+
+
+def feed_query_cases():
+    """返回 [(名称, 查询集)]，覆盖各Feed接口的筛选/排序组合"""
+    cases = []
+    for view_class, sorts in ((ContentRecommendView, RECOMMEND_SORTS), (ContentPublicListView, PUBLIC_SORTS)):
+        for sort in sorts:
+            for filters in FEED_FILTERS:
+                params = dict(filters, sort=sort)
+                label = '%s %s' % (view_class.__name__, '&'.join(f'{k}={v}' for k, v in sorted(params.items())))
+                request, queryset = view_queryset(view_class, params)
+                cases.append((label + ' [page]', queryset[:20]))
+                cases.append((label + ' [cursor]', cursor_queryset(queryset, request)))
+    for period in ('day', 'week', 'month'):
+        for filters in ({}, {'category_id': 1}):
+            params = dict(filters, period=period)
+            request = params_request(params)
+            view = ContentTrendingView(request=request, args=(), kwargs={}, format_kwarg=None)
+            label = '&'.join(f'{k}={v}' for k, v in sorted(params.items()))
+            queryset = view.filter_queryset(view.get_queryset())
+            for bucket, part in enumerate(view.get_bucket_querysets(queryset)):
+                cases.append(('ContentTrendingView %s [bucket %d]' % (label, bucket), part[:20]))
+    for order_field in FEED_ORDER_FIELDS:
+        specs = [(True, category_id, content_type, order_field)
+                 for category_id in (None, 1) for content_type in (None, 'video')]
+        specs.append((False, 1, None, order_field))
+        for spec in specs:
+            cases.append(('RankedFeed %s' % (spec,), spec_queryset(spec).values_list('id', order_field)[:1000]))
+    return cases
+
+
+@contextmanager
+def planner_forbidding_fallbacks():
+    """PostgreSQL 在小表上总会选择顺序扫描，关闭顺序扫描/排序后再看是否仍需回退"""
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('SET LOCAL enable_sort = off')
+        yield
+
+
+def plan_problems(plan):
+    """从 EXPLAIN 输出中找出全表扫描与临时排序"""
+    problems = []
+    for line in plan.splitlines():
+        if connection.vendor == 'sqlite':
+            if ' SCAN ' in f' {line} ' and 'USING' not in line:
+                problems.append('全表扫描: ' + line.strip())
+            if 'USE TEMP B-TREE' in line:
+                problems.append('临时排序: ' + line.strip())
+        elif connection.vendor == 'postgresql':
+            if 'Seq Scan' in line:
+                problems.append('全表扫描: ' + line.strip())
+            if line.strip().startswith(('Sort ', '->  Sort ', 'Incremental Sort', '->  Incremental Sort')):
+                problems.append('临时排序: ' + line.strip())
+    return problems
+
+
+def check_feed_query_plans():
+    """返回 [(名称, 执行计划, 问题列表)]"""
+    results = []
+    with planner_forbidding_fallbacks():
+        for name, queryset in feed_query_cases():
+            plan = queryset.explain()
+            results.append((name, plan, plan_problems(plan)))
+    return results
@@ -0,0 +1,74 @@
+"""
+api_response 信封的快速 JSON 渲染器
+
+与 DRF JSONRenderer 输出一致（datetime 的 UTC 后缀为 Z，Decimal 按 float 输出，UUID 转字符串），
+安装了 orjson 时使用 orjson，否则复用同一个预先配置好的标准库编码器，省去每次请求构造编码器、
+逐个类型判断回调的开销。请求 indent 时交回 JSONRenderer 处理。
+
+按视图启用：renderer_classes = [FastJSONRenderer]；
+全局启用：REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] 中替换 JSONRenderer。
+"""
+import datetime
+import decimal
+import json
+import uuid
+
+from django.db.models.query import QuerySet
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+
+def encode_default(obj):
+    """与 rest_framework.utils.encoders.JSONEncoder 相同的类型转换，常见类型优先判断"""
+    if isinstance(obj, datetime.datetime):
+        representation = obj.isoformat()
+        if representation.endswith('+00:00'):
+            representation = representation[:-6] + 'Z'
+        return representation
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, QuerySet):
+        return tuple(obj)
+    return JSONEncoder().default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer 的替代实现，输出字节与其一致"""
+
+    def get_encoder(self):
+        cls = type(self)
+        key = (self.ensure_ascii, self.compact, self.strict)
+        if getattr(cls, '_encoder_key', None) != key:
+            cls._encoder = json.JSONEncoder(
+                ensure_ascii=self.ensure_ascii, allow_nan=not self.strict,
+                separators=(',', ':') if self.compact else (', ', ': '), default=encode_default,
+            )
+            cls._encoder_key = key
+        return cls._encoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if orjson is not None and self.compact and not self.ensure_ascii:
+            ret = orjson.dumps(data, default=encode_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+            if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+                ret = ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+            return ret
+        ret = self.get_encoder().encode(data)
+        # 与 JSONRenderer 一致，转义 \u2028/\u2029 以保证是合法的 JavaScript
+        if '\u2028' in ret or '\u2029' in ret:
+            ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+        return ret.encode()
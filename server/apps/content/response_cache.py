@@ -0,0 +1,107 @@
+"""
+匿名只读接口的版本化响应缓存
+
+缓存键 = 视图名 + 规范化查询参数 + 相关模型的版本号；
+模型写入时（见 signals.py）版本号自增，旧缓存随即失效，不会返回过期数据。
+版本号与响应都在默认缓存中，多进程部署须使用共享缓存(settings.CACHES，见 checks.py)，
+否则其他 worker 或管理命令的写入无法使本进程的缓存失效。
+未命中时视图在 primary_reads() 中执行：键里是最新版本号，不能用落后的副本数据填充。
+"""
+import functools
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.response import Response
+from server.db_routing import primary_reads
+
+RESPONSE_CACHE_TIMEOUT = 60 * 5
+MODEL_VERSION_KEY = 'content:version:%s'
+CACHE_STATS_KEY = 'content:response_cache:%s:%s'
+
+cached_views = set()
+
+
+def model_label(model):
+    return model._meta.concrete_model._meta.model_name
+
+
+def get_model_versions(labels):
+    keys = [MODEL_VERSION_KEY % label for label in labels]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # 版本号丢失时用时间戳初始化，避免与被淘汰前的旧版本号重合
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_model_version(label):
+    key = MODEL_VERSION_KEY % label
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def incr_counter(key):
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def response_cache_key(view_name, request, labels, kwargs):
+    params = sorted((name, sorted(values)) for name, values in request.query_params.lists())
+    raw = repr((view_name, sorted(kwargs.items()), params, get_model_versions(labels)))
+    return 'content:response:%s:%s' % (view_name, hashlib.md5(raw.encode()).hexdigest())
+
+
+def cached_response(*labels, timeout=RESPONSE_CACHE_TIMEOUT):
+    """
+    视图方法装饰器：缓存匿名用户的200响应
+    labels 为影响该响应的模型名(model_name)，任一模型写入都会使缓存失效；
+    视图将 response.cacheable 置为 False 时不缓存(如临时的回退结果)
+    """
+    def decorator(method):
+        view_name = method.__qualname__.split('.')[0]
+        cached_views.add(view_name)
+
+        @functools.wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if request.user and request.user.is_authenticated:
+                return method(view, request, *args, **kwargs)
+            key = response_cache_key(view_name, request, labels, kwargs)
+            cached = cache.get(key)
+            if cached is not None:
+                incr_counter(CACHE_STATS_KEY % (view_name, 'hits'))
+                data, status_code = cached
+                if isinstance(data, dict) and 'timestamp' in data:
+                    data = dict(data, timestamp=timezone.now().isoformat())
+                return Response(data, status=status_code)
+            incr_counter(CACHE_STATS_KEY % (view_name, 'misses'))
+            with primary_reads():
+                response = method(view, request, *args, **kwargs)
+            if response.status_code == 200 and getattr(response, 'cacheable', True):
+                cache.set(key, (response.data, response.status_code), timeout)
+            return response
+        return wrapper
+    return decorator
+
+
+def get_response_cache_stats():
+    """各视图的命中/未命中次数与命中率"""
+    stats = {}
+    for view_name in sorted(cached_views):
+        hits = cache.get(CACHE_STATS_KEY % (view_name, 'hits'), 0)
+        misses = cache.get(CACHE_STATS_KEY % (view_name, 'misses'), 0)
+        total = hits + misses
+        stats[view_name] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+    return stats
@@ -0,0 +1,287 @@
+"""
+搜索性能基准套件
+
+在 benchmark_databases 创建的一次性测试库中写入指定规模的合成语料(search_corpus.py)，
+重建索引后按接近线上的查询组合回放 ContentSearchView 与 SearchSuggestionsView，
+统计每种场景的 p50/p95/p99 延迟、每个请求的数据库查询数与进程内存，结果为可序列化的 dict（命令见 benchmark_search_suite）。
+- 查询组合：从有限的查询池中按 Zipf 分布抽取(热门查询重复出现，响应缓存与搜索结果缓存按线上方式生效)，
+  覆盖单词/多词/长尾词、类型与分类筛选、翻页、按时间排序、分面，以及搜索建议的前缀与错字输入
+- 请求经 APIRequestFactory 直接调用视图并渲染响应，不经过中间件与网络
+- 统计查询数需要记录执行的 SQL，延迟中包含这部分开销，前后对比时保持一致即可
+- 正式计时前先预热(构建搜索建议索引、加载段属性)，预热请求不计入结果
+不写入配置的数据库、共享缓存与线上索引；SearchBenchmark 本身写入当前连接的数据库，只应在该测试库(或测试用例)中调用。
+"""
+import math
+import os
+import platform
+import random
+import resource
+import tempfile
+import time
+from contextlib import contextmanager
+
+import django
+from django.db import connection, connections, reset_queries
+from django.test.utils import CaptureQueriesContext, override_settings, setup_databases, teardown_databases
+from rest_framework.test import APIRequestFactory
+
+from .models import RawNews
+from .search_cache import search_query_log, search_result_cache
+from .search_corpus import COMMON_CHARS, SearchCorpus
+from .search_index import SEGMENT_SIZE
+from .search_updates import rebuild_search_index
+from .suggestions import suggestion_index
+from .views import ContentSearchView, SearchSuggestionsView
+
+REPORT_VERSION = 1
+QUERY_POOL_SIZE = 500
+# 搜索场景及其在查询组合中的占比
+SEARCH_SCENARIOS = (
+    ('head', 0.35), ('topic_pair', 0.2), ('tail', 0.1), ('type_filter', 0.1), ('category_filter', 0.05),
+    ('deep_page', 0.08), ('sort_published', 0.07), ('facets', 0.05),
+)
+SUGGEST_SCENARIOS = (('prefix', 0.7), ('typo', 0.2), ('long_prefix', 0.1))
+ENDPOINTS = {
+    'search': ('/content/search', ContentSearchView),
+    'suggestions': ('/search/suggestions', SearchSuggestionsView),
+}
+
+
+BENCHMARK_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'search-benchmark'},
+}
+
+
+@contextmanager
+def benchmark_databases(interactive=True):
+    """
+    与测试运行器相同，用 setup_databases 为每个数据库新建测试库(副本指向主库的测试库)，
+    缓存换成进程内 LocMem，结束后销毁测试库。
+    未配置 TEST NAME 的 SQLite 库放在临时目录的文件中：并行建索引的子进程需要打开同一个库
+    """
+    with tempfile.TemporaryDirectory(prefix='search-benchmark-') as directory:
+        overridden = []
+        for alias in connections:
+            test_settings = connections[alias].settings_dict.setdefault('TEST', {})
+            if connections[alias].vendor == 'sqlite' and not test_settings.get('NAME') and not test_settings.get('MIRROR'):
+                test_settings['NAME'] = os.path.join(directory, f'{alias}.sqlite3')
+                overridden.append(test_settings)
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES):
+                old_config = setup_databases(verbosity=0, interactive=interactive, serialized_aliases=set())
+                try:
+                    yield
+                finally:
+                    teardown_databases(old_config, verbosity=0)
+        finally:
+            for test_settings in overridden:
+                test_settings['NAME'] = None
+
+
+def percentile(sorted_values, fraction):
+    """最近秩法百分位数，sorted_values 需已升序"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples):
+    """samples: [(秒, 查询数, 状态码)] -> 延迟(毫秒)与查询数统计"""
+    timings = sorted(seconds * 1000 for seconds, _, _ in samples)
+    queries = [count for _, count, _ in samples]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for _, _, status in samples if status >= 400),
+        "p50_ms": round(percentile(timings, 0.5), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+        "max_ms": round(timings[-1], 3) if timings else 0.0,
+        "mean_ms": round(sum(timings) / len(timings), 3) if timings else 0.0,
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else 0.0,
+        "max_queries": max(queries, default=0),
+    }
+
+
+def memory_usage():
+    """当前常驻内存与峰值(MB)；当前值取自 /proc，不可用时为 None"""
+    current = None
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    current = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB、macOS 以字节为单位
+    peak = peak / 1024 / 1024 if platform.system() == 'Darwin' else peak / 1024
+    return {"rss_mb": current, "peak_rss_mb": round(peak, 1)}
+
+
+def weighted_choice(rng, options):
+    return rng.choices([name for name, _ in options], weights=[weight for _, weight in options])[0]
+
+
+def typo(rng, word):
+    """把一个字符替换为随机常用字，模拟错字"""
+    i = rng.randrange(len(word))
+    return word[:i] + rng.choice(COMMON_CHARS) + word[i + 1:]
+
+
+class QueryMix:
+    """按场景生成请求参数；先生成有限的查询池，回放时按 Zipf 分布重复抽取"""
+    def __init__(self, corpus, seed=7, pool_size=QUERY_POOL_SIZE):
+        self.corpus = corpus
+        self.rng = random.Random(seed)
+        self.search_pool = [self.search_params() for _ in range(pool_size)]
+        self.suggest_pool = [self.suggest_params() for _ in range(pool_size)]
+        self.pool_weights = [1.0 / (rank + 1) for rank in range(pool_size)]
+
+    def search_params(self):
+        corpus, rng = self.corpus, self.rng
+        scenario = weighted_choice(rng, SEARCH_SCENARIOS)
+        head = rng.choice(corpus.vocabulary[:30])
+        params = {'q': head}
+        if scenario == 'topic_pair':
+            params['q'] = ' '.join(corpus.words(2, corpus.topic()))
+        elif scenario == 'tail':
+            params['q'] = rng.choice(corpus.vocabulary[len(corpus.vocabulary) // 2:])
+        elif scenario == 'type_filter':
+            params['type'] = rng.choice(('article', 'video'))
+        elif scenario == 'category_filter' and corpus.category_ids:
+            params['category_id'] = str(rng.choice(corpus.category_ids))
+        elif scenario == 'deep_page':
+            params['page'] = str(rng.randint(2, 5))
+        elif scenario == 'sort_published':
+            params['sort'] = 'published_at'
+        elif scenario == 'facets':
+            params['facets'] = '1'
+        return scenario, params
+
+    def suggest_params(self):
+        corpus, rng = self.corpus, self.rng
+        scenario = weighted_choice(rng, SUGGEST_SCENARIOS)
+        title = ''.join(corpus.words(4, corpus.topic()))
+        if scenario == 'prefix':
+            q = title[:rng.randint(1, 3)]
+        elif scenario == 'long_prefix':
+            q = title[:rng.randint(4, 8)]
+        else:
+            q = typo(rng, title[:rng.randint(3, 6)])
+        return scenario, {'q': q, 'limit': '10'}
+
+    def requests(self, endpoint, count):
+        pool = self.search_pool if endpoint == 'search' else self.suggest_pool
+        return self.rng.choices(pool, weights=self.pool_weights, k=count)
+
+
+class SearchBenchmark:
+    def __init__(self, queries=1000, warmup=50, seed=42, segment_size=SEGMENT_SIZE, workers=1, batch_size=5000,
+                 log=None):
+        self.queries = queries
+        self.warmup = warmup
+        self.seed = seed
+        self.segment_size = segment_size
+        self.workers = workers
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.factory = APIRequestFactory()
+        self.views = {endpoint: view.as_view() for endpoint, (_, view) in ENDPOINTS.items()}
+
+    def request(self, endpoint, params):
+        """执行一次请求，返回 (秒, 查询数, 状态码)"""
+        request = self.factory.get(ENDPOINTS[endpoint][0], params)
+        # queries_log 有长度上限，写满后 CaptureQueriesContext 计数恒为 0(DEBUG 下写入语料即可写满)
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = self.views[endpoint](request)
+            response.render()
+            elapsed = time.perf_counter() - started
+        return elapsed, len(queries.captured_queries), response.status_code
+
+    def setup(self, docs):
+        SearchCorpus.cleanup()
+        corpus = SearchCorpus(seed=self.seed)
+        timings = {}
+        started = time.perf_counter()
+        corpus.insert(docs, batch_size=self.batch_size)
+        timings['insert_seconds'] = round(time.perf_counter() - started, 3)
+        started = time.perf_counter()
+        rebuild_search_index(segment_size=self.segment_size, workers=self.workers)
+        timings['index_seconds'] = round(time.perf_counter() - started, 3)
+        # 进程内缓存按新语料重新开始
+        search_result_cache.clear()
+        search_query_log.clear()
+        started = time.perf_counter()
+        suggestion_index.rebuild()
+        timings['suggestion_index_seconds'] = round(time.perf_counter() - started, 3)
+        return corpus, timings
+
+    def run_level(self, docs):
+        memory = {"before": memory_usage()}
+        corpus, timings = self.setup(docs)
+        self.log(f'[{docs}] 写入 {timings["insert_seconds"]}s，建索引 {timings["index_seconds"]}s，'
+                 f'建议索引 {timings["suggestion_index_seconds"]}s')
+        memory["after_setup"] = memory_usage()
+        mix = QueryMix(corpus, seed=self.seed + 1)
+        endpoints, scenarios = {}, {}
+        for endpoint in ENDPOINTS:
+            for _, params in mix.requests(endpoint, self.warmup):
+                self.request(endpoint, params)
+            samples = []
+            for scenario, params in mix.requests(endpoint, self.queries):
+                sample = self.request(endpoint, params)
+                samples.append(sample)
+                scenarios.setdefault(f'{endpoint}.{scenario}', []).append(sample)
+            endpoints[endpoint] = summarize(samples)
+            self.log(f'[{docs}] {endpoint}: p50 {endpoints[endpoint]["p50_ms"]}ms / p95 {endpoints[endpoint]["p95_ms"]}ms / '
+                     f'p99 {endpoints[endpoint]["p99_ms"]}ms，每请求 {endpoints[endpoint]["queries_per_request"]} 次查询')
+        memory["after_replay"] = memory_usage()
+        return {
+            "docs": docs,
+            "indexed_docs": RawNews.objects.filter(is_processed=True).count(),
+            "setup": timings,
+            "memory": memory,
+            "endpoints": endpoints,
+            "scenarios": {name: summarize(samples) for name, samples in sorted(scenarios.items())},
+            "search_cache": search_result_cache.stats(),
+        }
+
+    def run(self, levels):
+        return {
+            "version": REPORT_VERSION,
+            "started_at": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "platform": platform.platform(),
+            },
+            "config": {
+                "queries": self.queries, "warmup": self.warmup, "seed": self.seed,
+                "segment_size": self.segment_size, "workers": self.workers,
+            },
+            "levels": [self.run_level(docs) for docs in levels],
+        }
+
+
+def compare_reports(baseline, current):
+    """按文档规模与接口/场景比较两次结果，返回 [(规模, 名称, 指标, 旧值, 新值, 变化比例)]"""
+    rows = []
+    previous = {level['docs']: level for level in baseline.get('levels', [])}
+    for level in current.get('levels', []):
+        old = previous.get(level['docs'])
+        if old is None:
+            continue
+        for group in ('endpoints', 'scenarios'):
+            for name, stats in level[group].items():
+                old_stats = old.get(group, {}).get(name)
+                if not old_stats:
+                    continue
+                for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request'):
+                    before, after = old_stats[metric], stats[metric]
+                    change = (after - before) / before if before else None
+                    rows.append((level['docs'], name, metric, before, after, change))
+    return rows
@@ -0,0 +1,185 @@
+"""
+搜索结果缓存
+
+进程内 LRU + TTL 缓存，键为规范化后的 (q, type, category_id, tag, sort, page, page_size, count, facets)，
+值为该页的响应数据及写入时的索引版本号；索引变化后（版本号见 search_index.get_index_version）旧条目不再命中。
+- 容量同时按条目数与缓存的结果条数之和限制，超出时淘汰最久未用的条目
+- 查询日志为 Space-Saving 高频统计，只保留有限个键的访问次数
+- 发现索引版本变化（新处理的 RawNews 进入索引）时，后台线程按访问次数重算前 K 个热门查询；
+  事务中（数据对其他连接不可见）改为同步重算。每个进程至多每 SEARCH_PRECOMPUTE_MIN_INTERVAL 秒重算一次、
+  同一时刻只有一个重算在执行，索引频繁变化（持续应用增量更新）时不会每个版本都重算
+命中率见 /content/cache/stats 的 search 字段（每个进程独立统计）。
+"""
+import heapq
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.db import connection, connections
+
+from .search_text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CACHE_MAX_ENTRIES = 2000
+SEARCH_CACHE_MAX_ITEMS = 20000
+SEARCH_CACHE_TTL = 60
+SEARCH_LOG_CAPACITY = 1000
+SEARCH_PRECOMPUTE_TOP_K = 100
+# 同一进程两次重算热门查询的最短间隔(秒)
+SEARCH_PRECOMPUTE_MIN_INTERVAL = 30
+SEARCH_CACHE_PARAMS = ('type', 'category_id', 'tag', 'sort', 'page', 'page_size', 'count', 'facets')
+
+
+def search_cache_key(query_params):
+    """规范化的缓存键；无 q 或使用游标分页时不缓存，返回 None"""
+    q = ' '.join(normalize_text(query_params.get('q', '')).split())
+    if not q or 'cursor' in query_params:
+        return None
+    return (q,) + tuple(query_params.get(name, '') for name in SEARCH_CACHE_PARAMS)
+
+
+def key_params(key):
+    """由缓存键还原查询参数，供预计算使用"""
+    params = dict(zip(SEARCH_CACHE_PARAMS, key[1:]), q=key[0])
+    return {name: value for name, value in params.items() if value}
+
+
+class SearchResultCache:
+    def __init__(self, max_entries=SEARCH_CACHE_MAX_ENTRIES, max_items=SEARCH_CACHE_MAX_ITEMS, ttl=SEARCH_CACHE_TTL):
+        self.max_entries = max_entries
+        self.max_items = max_items
+        self.ttl = ttl
+        # 键 -> (索引版本, 过期时间, 结果条数, 响应数据)
+        self.entries = OrderedDict()
+        self.items = 0
+        self.hits = self.misses = self.precomputed = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, version):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == version and entry[1] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[3]
+            self.misses += 1
+            return None
+
+    def set(self, key, version, data):
+        size = len(data.get('results', ()))
+        if size > self.max_items:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.items -= old[2]
+            self.entries[key] = (version, time.monotonic() + self.ttl, size, data)
+            self.items += size
+            while len(self.entries) > self.max_entries or self.items > self.max_items:
+                _, evicted = self.entries.popitem(last=False)
+                self.items -= evicted[2]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.items = 0
+            self.hits = self.misses = self.precomputed = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "items": self.items,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "precomputed": self.precomputed,
+        }
+
+
+class QueryLog:
+    """Space-Saving 高频项统计：最多保留 capacity 个键，满时由新键接替计数最小的键"""
+    def __init__(self, capacity=SEARCH_LOG_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def record(self, key):
+        with self.lock:
+            if key in self.counts:
+                self.counts[key] += 1
+            elif len(self.counts) < self.capacity:
+                self.counts[key] = 1
+            else:
+                smallest = min(self.counts, key=self.counts.get)
+                self.counts[key] = self.counts.pop(smallest) + 1
+
+    def top(self, k):
+        with self.lock:
+            return [key for key, _ in heapq.nlargest(k, self.counts.items(), key=lambda item: item[1])]
+
+    def clear(self):
+        with self.lock:
+            self.counts.clear()
+
+
+class PopularQueryPrecomputer:
+    """索引版本变化后重算热门查询：同一版本只执行一次，两次重算至少间隔 min_interval 秒且不并发"""
+    def __init__(self, result_cache, query_log, top_k=SEARCH_PRECOMPUTE_TOP_K,
+                 min_interval=SEARCH_PRECOMPUTE_MIN_INTERVAL):
+        self.result_cache = result_cache
+        self.query_log = query_log
+        self.top_k = top_k
+        self.min_interval = min_interval
+        self.version = None
+        # 上次开始重算的时间(monotonic)，None 为尚未重算
+        self.started_at = None
+        self.running = False
+        self.lock = threading.Lock()
+
+    def run(self, version, compute):
+        for key in self.query_log.top(self.top_k):
+            try:
+                data = compute(key_params(key))
+            except Exception:
+                logger.exception('预计算热门搜索失败: %s', key)
+                continue
+            if data is not None:
+                self.result_cache.set(key, version, data)
+                self.result_cache.precomputed += 1
+
+    def _run_in_thread(self, version, compute):
+        try:
+            self.run(version, compute)
+        finally:
+            self.running = False
+            connections.close_all()
+
+    def maybe_schedule(self, version, compute):
+        with self.lock:
+            if self.version is None:
+                # 进程内首次见到的版本只作记录，没有可重算的历史
+                self.version = version
+                return
+            if version == self.version or self.running:
+                return
+            now = time.monotonic()
+            if self.started_at is not None and now - self.started_at < self.min_interval:
+                # 间隔内的版本变化暂不重算，版本号不记录，间隔过后的下一次请求再重算
+                return
+            self.version, self.started_at, self.running = version, now, True
+        if connection.in_atomic_block:
+            try:
+                self.run(version, compute)
+            finally:
+                self.running = False
+        else:
+            threading.Thread(target=self._run_in_thread, args=(version, compute), daemon=True,
+                             name='search-precompute').start()
+
+
+search_result_cache = SearchResultCache()
+search_query_log = QueryLog()
+popular_precomputer = PopularQueryPrecomputer(search_result_cache, search_query_log)
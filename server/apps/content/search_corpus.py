@@ -0,0 +1,132 @@
+"""
+搜索基准测试用的合成中文语料
+
+词表由常用新闻词与按常用字随机组合的长尾词组成，按 Zipf 分布抽样；
+每篇文档属于一个主题(主题同样按 Zipf 分布)，大部分词取自主题词表，
+使高频词与长尾词的倒排长度、多词查询的共现关系接近真实新闻语料。
+同一 seed 生成的语料与查询完全一致，便于前后对比。
+合成内容的 source_url 以 BENCHMARK_URL_PREFIX 开头，分类的 slug 以 BENCHMARK_SLUG_PREFIX 开头，cleanup 据此清理；
+写入与清理都不触发 RawNews 的逐行信号（不入搜索队列），调用方随后重建搜索索引。
+"""
+import itertools
+import random
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import NewsCategory, RawNews
+from .response_cache import bump_model_version
+from .tagging import raw_delete_news
+
+BENCHMARK_URL_PREFIX = 'https://benchmark.invalid/search/'
+BENCHMARK_SLUG_PREFIX = 'benchmark-'
+VOCABULARY = (
+    '人工智能 机器学习 深度学习 大模型 芯片 半导体 新能源 电动汽车 电池 光伏 储能 氢能 '
+    '经济 市场 股市 基金 债券 汇率 通胀 利率 央行 消费 出口 贸易 制造业 房地产 '
+    '体育 足球 篮球 网球 奥运会 世界杯 联赛 冠军 球员 教练 '
+    '科技 互联网 手机 操作系统 云计算 数据中心 网络安全 开源 软件 游戏 '
+    '教育 高考 大学 留学 医疗 医院 疫苗 健康 养老 社保 '
+    '环境 气候 降雨 台风 地震 生态 森林 海洋 污染 治理 '
+    '文化 电影 音乐 演唱会 综艺 小说 博物馆 旅游 美食 非遗 '
+    '政策 会议 发布 报告 调查 数据 增长 下降 计划 项目 企业 公司 投资 合作 研究 专家 '
+    '北京 上海 广州 深圳 杭州 成都 武汉 西安 南京 重庆'
+).split()
+# 组合长尾词用的常用字
+COMMON_CHARS = (
+    '的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所'
+    '民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处理府研质'
+)
+TYPES = [value for value, _ in RawNews.TYPE_CHOICES]
+TOPIC_COUNT = 50
+TOPIC_SIZE = 60
+CATEGORY_COUNT = 12
+# 文档中取自主题词表的比例
+TOPIC_RATIO = 0.7
+
+
+def zipf_weights(count):
+    """第 k 个元素的概率约为 1/k，返回累积权重供 random.choices(cum_weights=...) 使用"""
+    return list(itertools.accumulate(1.0 / (rank + 1) for rank in range(count)))
+
+
+class SearchCorpus:
+    def __init__(self, seed=42, vocabulary=VOCABULARY, vocabulary_size=5000):
+        self.rng = random.Random(seed)
+        self.vocabulary = list(vocabulary)
+        seen = set(self.vocabulary)
+        while len(self.vocabulary) < vocabulary_size:
+            word = ''.join(self.rng.choices(COMMON_CHARS, k=self.rng.choice((2, 2, 3))))
+            if word not in seen:
+                seen.add(word)
+                self.vocabulary.append(word)
+        self.weights = zipf_weights(len(self.vocabulary))
+        # 主题词表：从全局词表按 Zipf 权重抽取，主题内再按 Zipf 分布使用
+        self.topics = [self.sample_words(TOPIC_SIZE) for _ in range(TOPIC_COUNT)]
+        self.topic_weights = zipf_weights(TOPIC_COUNT)
+        self.word_weights = zipf_weights(TOPIC_SIZE)
+        self.category_ids = []
+
+    def sample_words(self, count):
+        words = []
+        while len(words) < count:
+            word = self.rng.choices(self.vocabulary, cum_weights=self.weights)[0]
+            if word not in words:
+                words.append(word)
+        return words
+
+    def words(self, count, topic=None):
+        if topic is None:
+            return self.rng.choices(self.vocabulary, cum_weights=self.weights, k=count)
+        return [self.rng.choices(self.topics[topic], cum_weights=self.word_weights)[0] if self.rng.random() < TOPIC_RATIO
+                else self.rng.choices(self.vocabulary, cum_weights=self.weights)[0] for _ in range(count)]
+
+    def topic(self):
+        return self.rng.choices(range(TOPIC_COUNT), cum_weights=self.topic_weights)[0]
+
+    def sentence(self, count, topic=None):
+        return '，'.join(''.join(self.words(3, topic)) for _ in range(max(1, count // 3))) + '。'
+
+    def document(self, i, now):
+        topic = self.topic()
+        category_id = self.category_ids[topic % len(self.category_ids)] if self.category_ids else None
+        return RawNews(
+            title=''.join(self.words(4, topic)), summary=self.sentence(12, topic), content=self.sentence(120, topic),
+            source_url=f'{BENCHMARK_URL_PREFIX}{i}', type=self.rng.choice(TYPES), category_id=category_id,
+            published_at=now - timedelta(minutes=i), is_processed=True,
+        )
+
+    def create_categories(self):
+        self.category_ids = [
+            NewsCategory.objects.create(name=f'基准分类{i}', slug=f'{BENCHMARK_SLUG_PREFIX}{i}').pk
+            for i in range(CATEGORY_COUNT)
+        ]
+
+    def insert(self, count, batch_size=5000):
+        if not self.category_ids:
+            self.create_categories()
+        now = timezone.now()
+        batch = []
+        for i in range(count):
+            batch.append(self.document(i, now))
+            if len(batch) >= batch_size:
+                RawNews.objects.bulk_create(batch)
+                batch = []
+        RawNews.objects.bulk_create(batch)
+
+    def queries(self, count):
+        """单词、同主题双词、低频词混合的查询"""
+        queries = []
+        for i in range(count):
+            if i % 3 == 0:
+                queries.append(self.rng.choice(self.vocabulary[:20]))
+            elif i % 3 == 1:
+                queries.append(' '.join(self.words(2, self.topic())))
+            else:
+                queries.append(self.rng.choice(self.vocabulary[-1000:]))
+        return queries
+
+    @staticmethod
+    def cleanup():
+        raw_delete_news(RawNews.objects.filter(source_url__startswith=BENCHMARK_URL_PREFIX))
+        NewsCategory.objects.filter(slug__startswith=BENCHMARK_SLUG_PREFIX).delete()
+        bump_model_version('rawnews')
@@ -0,0 +1,67 @@
+"""
+搜索结果分面计数（类型 / 分类 / 标签）
+
+在 search_ids 遍历命中行的同一趟中完成统计，不额外发起 GROUP BY 查询：
+- 类型、分类直接取自段内属性列
+- 标签取自段内每行的标签列(见 search_index.SegmentDocuments)，随段缓存在进程内，
+  计数不发起与命中数相关的查询；只统计启用的标签(get_active_tag_names，按 ContentTag 版本号缓存)
+每个分面的计数忽略该分面自身的筛选条件、满足其余全部条件（已选中某个类型时仍能看到其他类型的结果数）。
+"""
+from collections import Counter
+from itertools import chain
+
+from .models import NewsCategory, RawNews
+from .tagging import get_active_tag_names
+
+FACET_LIMIT = 20
+# 段内类型码即 TYPE_CHOICES 的下标（见 search_index.TYPE_CODES）
+TYPE_CHOICES = RawNews.TYPE_CHOICES
+
+
+class FacetCounter:
+    """随 search_ids 逐段累加；filters 为 resolve_filters 的结果"""
+    def __init__(self, filters):
+        self.type_code = filters.get('type')
+        self.category = filters.get('category')
+        self.tag = filters.get('tag')
+        self.types = Counter()
+        self.categories = Counter()
+        self.tags = Counter()
+
+    def add(self, docs, rows):
+        """rows 为已满足查询词、处理状态与墓碑条件的段内行号"""
+        type_code, category, tag = self.type_code, self.category, self.tag
+        if type_code is None and category is None and tag is None:
+            self.types.update(map(docs.types.__getitem__, rows))
+            self.categories.update(map(docs.categories.__getitem__, rows))
+            self.tags.update(chain.from_iterable(map(docs.row_tags, rows)))
+            return
+        tag_rows = []
+        for row in rows:
+            doc_type, doc_category = docs.types[row], docs.categories[row]
+            type_ok = type_code is None or doc_type == type_code
+            category_ok = category is None or doc_category == category
+            tag_ok = tag is None or tag in docs.row_tags(row)
+            if category_ok and tag_ok:
+                self.types[doc_type] += 1
+            if type_ok and tag_ok:
+                self.categories[doc_category] += 1
+            if type_ok and category_ok:
+                tag_rows.append(row)
+        self.tags.update(chain.from_iterable(map(docs.row_tags, tag_rows)))
+
+    def result(self, limit=FACET_LIMIT):
+        """{type/category/tag: [{value, label, count}]}，各分面按计数降序取前 limit 个"""
+        types = [{"value": TYPE_CHOICES[code][0], "label": TYPE_CHOICES[code][1], "count": count}
+                 for code, count in self.types.most_common() if code < len(TYPE_CHOICES)][:limit]
+        # 分类为 0 表示未分类，不作为分面
+        top_categories = [(category_id, count) for category_id, count in self.categories.most_common() if category_id][:limit]
+        category_names = dict(NewsCategory.objects.filter(id__in=[category_id for category_id, _ in top_categories])
+                              .values_list('id', 'name')) if top_categories else {}
+        categories = [{"value": category_id, "label": category_names.get(category_id, ''), "count": count}
+                      for category_id, count in top_categories]
+        tag_names = get_active_tag_names()
+        top_tags = [(tag_id, count) for tag_id, count in self.tags.most_common() if tag_id in tag_names][:limit]
+        tags = [{"value": tag_names[tag_id], "label": tag_names[tag_id], "count": count}
+                for tag_id, count in top_tags]
+        return {"type": types, "category": categories, "tag": tags}
@@ -0,0 +1,536 @@
+"""
+RawNews 倒排索引
+
+索引由若干不可变的段(SearchSegment)组成，每段包含一批文档：
+- 文档属性按行号列式存储（ID、发布时间、类型、分类、是否已处理、各字段词数），
+  以及每行的标签ID(RawNewsTag，按行的起止偏移 + 标签ID列)，标签筛选、加权与分面不再查询关联表
+- 每个词项一行倒排数据(SearchPosting)：命中的行号 + 标题/摘要/正文词频 + 相关度影响值
+查询时一次取回全部查询词项的倒排数据，按段求交集，用段内属性完成筛选，
+按 BM25F 相关度（或发布时间）排序，用堆只取出当前页所需的前 k 条交给数据库回表。
+- BM25F 中与查询无关的部分（各字段词频按段内平均字段长度归一化、按字段权重加权、饱和）
+  在建段时算好，量化为 uint16 影响值；查询时只需 idf 加权求和
+- 字段权重见 settings.SEARCH_FIELD_WEIGHTS（标题 > 摘要 > 正文），修改后需重建索引
+- 查询词等于某个启用标签的名称或同义词时，扩展为该标签的全部同义写法，
+  带有该标签的文档按 ContentTag.search_weight 加权
+可选的分面计数见 search_facets.py。
+段属性在进程内按段缓存，段列表与墓碑按索引版本缓存在 Django 缓存中。
+索引版本保存在数据库(SearchIndexState)，与段的修改在同一事务内更新；
+各进程至多每 INDEX_VERSION_TTL 秒读取一次(事务中每次读取)，其他进程重建或合并后随即换用新的段列表。
+增量维护与全量重建见 search_updates.py。
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+import zlib
+from array import array
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from server.db_routing import primary_reads
+
+from .models import ContentTag, RawNews, SearchIndexState, SearchPosting, SearchSegment
+from .response_cache import get_model_versions
+from .search_facets import FacetCounter
+from .search_text import normalize_text, query_terms, term_frequencies
+from .tagging import news_tag_links
+
+SEGMENT_SIZE = 5000
+INDEX_FIELDS = ('title', 'summary', 'content')
+INDEX_META_KEY = 'content:search:meta:%s'
+INDEX_META_TIMEOUT = 60 * 60
+INDEX_STATE_ID = 1
+# 各进程读取数据库中索引版本的最短间隔(秒)，即其他进程修改索引后的最大可见延迟
+INDEX_VERSION_TTL = 1
+SYNONYMS_KEY = 'content:search:synonyms:%s'
+DEFAULT_FIELD_WEIGHTS = {'title': 3.0, 'summary': 1.5, 'content': 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+IMPACT_SCALE = 0xFFFF
+SEARCH_ORDERINGS = ('relevance', 'published_at')
+TYPE_CODES = {value: code for code, (value, _) in enumerate(RawNews.TYPE_CHOICES)}
+UNKNOWN_TYPE = 255
+MAX_TF = 0xFFFF
+# 倒排数据每条：行号(uint32) + 3个字段词频(uint16) + 影响值(uint16)
+POSTING_WIDTH = 4 + 2 * len(INDEX_FIELDS) + 2
+# 文档属性列：(名称, array类型码)
+DOCUMENT_COLUMNS = (
+    ('ids', 'q'), ('published', 'd'), ('categories', 'q'), ('types', 'B'), ('processed', 'B'),
+    ('title_lengths', 'I'), ('summary_lengths', 'I'), ('content_lengths', 'I'),
+)
+DOCUMENT_VALUES = ('id', 'title', 'summary', 'content', 'type', 'category_id', 'is_processed', 'published_at')
+
+# 进程内缓存：(段ID, 创建时间) -> SegmentDocuments，段内容不可变
+_segment_documents = {}
+
+
+class SegmentDocuments:
+    """
+    段内文档属性列；第 row 行的标签ID为 tag_ids[tag_offsets[row]:tag_offsets[row + 1]]（升序）。
+    早期写入的段没有标签列，tag_offsets 为 None，由 fill_segment_tags 从关联表补齐
+    """
+    def __init__(self, columns, tag_offsets=None, tag_ids=None):
+        for name, _ in DOCUMENT_COLUMNS:
+            setattr(self, name, columns[name])
+        self.tag_offsets, self.tag_ids = tag_offsets, tag_ids
+
+    @classmethod
+    def empty(cls):
+        return cls({name: array(typecode) for name, typecode in DOCUMENT_COLUMNS}, array('I', [0]), array('q'))
+
+    def append_tags(self, tag_ids):
+        """追加下一行的标签ID"""
+        self.tag_ids.extend(sorted(tag_ids))
+        self.tag_offsets.append(len(self.tag_ids))
+
+    def row_tags(self, row):
+        return self.tag_ids[self.tag_offsets[row]:self.tag_offsets[row + 1]]
+
+    def dumps(self):
+        columns = [getattr(self, name) for name, _ in DOCUMENT_COLUMNS] + [self.tag_offsets, self.tag_ids]
+        return zlib.compress(b''.join(column.tobytes() for column in columns))
+
+    @classmethod
+    def loads(cls, blob, count):
+        raw = zlib.decompress(bytes(blob))
+        columns, offset = {}, 0
+        for name, typecode in DOCUMENT_COLUMNS:
+            column = array(typecode)
+            size = column.itemsize * count
+            column.frombytes(raw[offset:offset + size])
+            columns[name] = column
+            offset += size
+        if offset == len(raw):
+            return cls(columns)
+        tag_offsets, tag_ids = array('I'), array('q')
+        tag_offsets.frombytes(raw[offset:offset + tag_offsets.itemsize * (count + 1)])
+        tag_ids.frombytes(raw[offset + tag_offsets.itemsize * (count + 1):])
+        return cls(columns, tag_offsets, tag_ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def get_field_weights():
+    return getattr(settings, 'SEARCH_FIELD_WEIGHTS', DEFAULT_FIELD_WEIGHTS)
+
+
+def encode_postings(rows, frequencies, impacts):
+    return rows.tobytes() + b''.join(column.tobytes() for column in frequencies) + impacts.tobytes()
+
+
+def decode_postings(data):
+    """返回 (行号, [各字段词频], 影响值)"""
+    count = len(data) // POSTING_WIDTH
+    rows = array('I')
+    rows.frombytes(data[:count * 4])
+    columns, offset = [], count * 4
+    for _ in range(len(INDEX_FIELDS) + 1):
+        column = array('H')
+        column.frombytes(data[offset:offset + count * 2])
+        columns.append(column)
+        offset += count * 2
+    return rows, columns[:-1], columns[-1]
+
+
+def compute_impacts(documents, postings, weights):
+    """按段内平均字段长度计算每条倒排的 BM25F 饱和词频，量化到 [0, IMPACT_SCALE]"""
+    lengths = [getattr(documents, f'{field}_lengths') for field in INDEX_FIELDS]
+    count = max(len(documents), 1)
+    # norms[f][row] = 字段权重 / 长度归一化因子
+    norms = []
+    for f, field in enumerate(INDEX_FIELDS):
+        average = max(sum(lengths[f]) / count, 1.0)
+        weight = weights.get(field, 0.0)
+        norms.append([weight / (1 - BM25_B + BM25_B * length / average) for length in lengths[f]])
+    impacts = {}
+    for term, (rows, frequencies) in postings.items():
+        column = array('H')
+        for i, row in enumerate(rows):
+            tf = sum(norms[f][row] * frequencies[f][i] for f in range(len(INDEX_FIELDS)) if frequencies[f][i])
+            column.append(round(IMPACT_SCALE * tf / (BM25_K1 + tf)) if tf else 0)
+        impacts[term] = column
+    return impacts
+
+
+def load_document_rows(queryset):
+    """按ID升序读取待索引的文档行(dict)，附加其标签ID(tag_ids)"""
+    rows = list(queryset.order_by('id').values(*DOCUMENT_VALUES))
+    tag_ids = defaultdict(list)
+    for news_id, tag_id in news_tag_links([row['id'] for row in rows]):
+        tag_ids[news_id].append(tag_id)
+    for row in rows:
+        row['tag_ids'] = tag_ids.get(row['id'], ())
+    return rows
+
+
+def build_segment(rows):
+    """由 load_document_rows 读出的文档行构建一个段，返回 (SegmentDocuments, {词项: (行号, 词频列)})"""
+    documents = SegmentDocuments.empty()
+    postings = {}
+    for row_no, row in enumerate(rows):
+        published = row['published_at']
+        documents.append_tags(row.get('tag_ids', ()))
+        documents.ids.append(row['id'])
+        documents.published.append(published.timestamp() if published else 0.0)
+        documents.categories.append(row['category_id'] or 0)
+        documents.types.append(TYPE_CODES.get(row['type'], UNKNOWN_TYPE))
+        documents.processed.append(1 if row['is_processed'] else 0)
+        for field_no, field in enumerate(INDEX_FIELDS):
+            frequencies = term_frequencies(row[field])
+            getattr(documents, f'{field}_lengths').append(sum(frequencies.values()))
+            for term, tf in frequencies.items():
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = (array('I'), [array('H') for _ in INDEX_FIELDS])
+                if not entry[0] or entry[0][-1] != row_no:
+                    entry[0].append(row_no)
+                    for column in entry[1]:
+                        column.append(0)
+                entry[1][field_no][-1] = min(tf, MAX_TF)
+    return documents, postings
+
+
+def prepare_segment(documents, postings):
+    """编码为可直接写入的段数据（可跨进程传递）"""
+    impacts = compute_impacts(documents, postings, get_field_weights())
+    return {
+        'doc_count': len(documents),
+        'documents': documents.dumps(),
+        'min_doc_id': min(documents.ids) if len(documents) else None,
+        'max_doc_id': max(documents.ids) if len(documents) else None,
+        'postings': {term: encode_postings(rows, frequencies, impacts[term])
+                     for term, (rows, frequencies) in postings.items()},
+    }
+
+
+def save_segment(data, is_active=True):
+    segment = SearchSegment.objects.create(
+        doc_count=data['doc_count'], documents=data['documents'], is_active=is_active,
+        min_doc_id=data['min_doc_id'], max_doc_id=data['max_doc_id'],
+    )
+    SearchPosting.objects.bulk_create(
+        [SearchPosting(segment=segment, term=term, data=posting) for term, posting in data['postings'].items()],
+        batch_size=1000,
+    )
+    return segment
+
+
+def write_segment(documents, postings, is_active=True):
+    return save_segment(prepare_segment(documents, postings), is_active=is_active)
+
+
+def read_segment(segment_id):
+    """读出整个段：(SegmentDocuments, 墓碑集合, {词项: (行号, 词频列, 影响值)})"""
+    count, blob, deleted = SearchSegment.objects.values_list('doc_count', 'documents', 'deleted_ids').get(id=segment_id)
+    postings = {term: decode_postings(bytes(data))
+                for term, data in SearchPosting.objects.filter(segment_id=segment_id).values_list('term', 'data')}
+    return fill_segment_tags(SegmentDocuments.loads(blob, count)), decode_tombstones(deleted), postings
+
+
+def fill_segment_tags(documents):
+    """没有标签列的早期段：按段内文档ID查询一次关联表补齐（随段缓存，重建或合并后不再需要）"""
+    if documents.tag_offsets is None:
+        tag_ids = defaultdict(list)
+        for news_id, tag_id in news_tag_links(documents.ids):
+            tag_ids[news_id].append(tag_id)
+        documents.tag_offsets, documents.tag_ids = array('I', [0]), array('q')
+        for doc_id in documents.ids:
+            documents.append_tags(tag_ids.get(doc_id, ()))
+    return documents
+
+
+def decode_tombstones(data):
+    tombstones = array('q')
+    tombstones.frombytes(bytes(data))
+    return tombstones
+
+
+class IndexVersionHolder:
+    """进程内缓存的索引版本，至多每 INDEX_VERSION_TTL 秒从数据库读取一次"""
+    def __init__(self):
+        self.version = None
+        self.checked_at = 0
+        self.lock = threading.Lock()
+
+    def get(self):
+        if (self.version is None or connection.in_atomic_block
+                or time.monotonic() - self.checked_at >= INDEX_VERSION_TTL):
+            with primary_reads():
+                version = SearchIndexState.objects.filter(pk=INDEX_STATE_ID).values_list('version', flat=True).first()
+            self.set(version or 0)
+        return self.version
+
+    def set(self, version):
+        with self.lock:
+            self.version, self.checked_at = version, time.monotonic()
+
+
+index_version = IndexVersionHolder()
+
+
+def get_index_version():
+    """索引内容版本号，段变化后改变（段列表与搜索结果缓存据此失效）"""
+    return index_version.get()
+
+
+def mark_index_changed():
+    """
+    段或墓碑发生变化：在修改段的同一事务内调用，提交后其他进程读取到新版本；
+    版本取纳秒时间戳，不会与回滚或被淘汰前的旧版本重合
+    """
+    version = time.time_ns()
+    SearchIndexState.objects.update_or_create(pk=INDEX_STATE_ID, defaults={'version': version})
+    index_version.set(version)
+    return version
+
+
+@primary_reads()
+def get_index_meta():
+    """当前启用的各段：{段ID: {key: 进程缓存键, deleted: 墓碑ID集合, doc_count: 文档数}}"""
+    key = INDEX_META_KEY % get_index_version()
+    meta = cache.get(key)
+    if meta is None:
+        meta = {}
+        rows = SearchSegment.objects.filter(is_active=True).values_list('id', 'created_at', 'doc_count', 'deleted_ids')
+        for segment_id, created_at, doc_count, deleted in rows:
+            meta[segment_id] = {'key': (segment_id, created_at.timestamp()),
+                                'deleted': frozenset(decode_tombstones(deleted)), 'doc_count': doc_count}
+        cache.set(key, meta, INDEX_META_TIMEOUT)
+    return meta
+
+
+def load_segment_documents(meta, segment_ids):
+    keys = {segment_id: meta[segment_id]['key'] for segment_id in segment_ids}
+    missing = [segment_id for segment_id, key in keys.items() if key not in _segment_documents]
+    if missing:
+        live = {info['key'] for info in meta.values()}
+        for key in [key for key in _segment_documents if key not in live]:
+            del _segment_documents[key]
+        for segment_id, count, blob in SearchSegment.objects.filter(id__in=missing).values_list('id', 'doc_count', 'documents'):
+            _segment_documents[keys[segment_id]] = fill_segment_tags(SegmentDocuments.loads(blob, count))
+    return {segment_id: _segment_documents[key] for segment_id, key in keys.items() if key in _segment_documents}
+
+
+def fetch_postings(terms, meta):
+    """{段ID: {词项: 倒排数据}}，一次查询"""
+    by_segment = defaultdict(dict)
+    rows = SearchPosting.objects.filter(term__in=terms).values_list('segment_id', 'term', 'data')
+    for segment_id, term, data in rows:
+        if segment_id in meta:
+            by_segment[segment_id][term] = bytes(data)
+    return by_segment
+
+
+@primary_reads()
+def get_synonyms():
+    """
+    启用标签的名称/同义词表，按 ContentTag 版本号缓存：
+    {'groups': {归一化写法: [同组全部写法]}, 'tags': {归一化写法: [(标签ID, 搜索权重)]}}
+    """
+    key = SYNONYMS_KEY % get_model_versions(['contenttag'])[0]
+    synonyms = cache.get(key)
+    if synonyms is None:
+        synonyms = {'groups': {}, 'tags': defaultdict(list)}
+        rows = ContentTag.objects.filter(is_active=True).values_list('id', 'name', 'synonyms', 'search_weight')
+        for tag_id, name, names, weight in rows:
+            group = [name] + [n.strip() for n in (names if isinstance(names, list) else [])
+                              if isinstance(n, str) and n.strip()]
+            for word in {normalize_text(n) for n in group}:
+                if len(group) > 1:
+                    synonyms['groups'].setdefault(word, [])
+                    synonyms['groups'][word].extend(n for n in group if n not in synonyms['groups'][word])
+                synonyms['tags'][word].append((tag_id, float(weight)))
+        synonyms['tags'] = dict(synonyms['tags'])
+        cache.set(key, synonyms, None)
+    return synonyms
+
+
+def parse_query(q):
+    """
+    按空白切分查询，每个词为一个子句，子句内为候选写法的词项列表（原词 + 同义词）；
+    返回 (子句列表, {命中标签ID: 搜索权重})，查询无法由索引回答时子句列表为 None
+    """
+    synonyms = get_synonyms()
+    clauses, tags = [], {}
+    for word in normalize_text(q).split():
+        terms = query_terms(word)
+        if terms is None:
+            return None, {}
+        alternatives = [terms]
+        for synonym in synonyms['groups'].get(word, ()):
+            terms = query_terms(synonym)
+            if terms and terms not in alternatives:
+                alternatives.append(terms)
+        tags.update(synonyms['tags'].get(word, ()))
+        clauses.append(alternatives)
+    return clauses or None, tags
+
+
+def resolve_filters(content_type=None, category_id=None, tag=None):
+    """
+    把筛选条件转换为段属性上的判断值；条件不可能满足时返回 None。
+    标签条件解析为标签ID，与段内每行的标签列比较
+    """
+    filters = {}
+    if content_type:
+        if content_type not in TYPE_CODES:
+            return None
+        filters['type'] = TYPE_CODES[content_type]
+    if category_id:
+        try:
+            filters['category'] = int(category_id)
+        except (TypeError, ValueError):
+            return None
+    if tag:
+        filters['tag'] = ContentTag.objects.filter(name=tag).values_list('id', flat=True).first()
+        if filters['tag'] is None:
+            return None
+    return filters
+
+
+def intersect_rows(rows_by_term, terms):
+    """同时包含全部词项的行号"""
+    if any(term not in rows_by_term for term in terms):
+        return set()
+    lists = sorted((rows_by_term[term] for term in terms), key=len)
+    matched = set(lists[0])
+    for rows in lists[1:]:
+        matched.intersection_update(rows)
+        if not matched:
+            break
+    return matched
+
+
+def matched_rows(rows_by_term, clauses):
+    """每个子句至少命中一种写法的行号；rows_by_term 为 {词项: 行号列}"""
+    matched = None
+    for alternatives in clauses:
+        clause_rows = set()
+        for terms in alternatives:
+            clause_rows |= intersect_rows(rows_by_term, terms)
+        matched = clause_rows if matched is None else matched & clause_rows
+        if not matched:
+            return set()
+    return matched
+
+
+class SearchHits:
+    """
+    未排序的命中列表，元素为 (排序键..., 文档ID)；
+    切片时用堆取出前 stop 个并缓存，翻页不对全部命中排序
+    """
+    def __init__(self, hits, facets=None):
+        self.hits = hits
+        self.ranked = []
+        # 请求分面时为 search_facets.FacetCounter.result() 的结果
+        self.facets = facets
+
+    def __len__(self):
+        return len(self.hits)
+
+    def top(self, count):
+        if count > len(self.ranked):
+            if count < len(self.hits):
+                self.ranked = heapq.nlargest(count, self.hits)
+            else:
+                self.ranked = sorted(self.hits, reverse=True)
+        return self.ranked
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start, stop, step = key.indices(len(self.hits))
+        return [hit[-1] for hit in self.top(stop)[start:stop:step]]
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+class BM25Scorer:
+    """idf 取自全部段的文档频率，与建段时算好的影响值相乘求和"""
+    def __init__(self, meta, postings):
+        total = sum(info['doc_count'] for info in meta.values()) or 1
+        df = defaultdict(int)
+        for term_data in postings.values():
+            for term, data in term_data.items():
+                df[term] += len(data) // POSTING_WIDTH
+        self.idf = {term: math.log(1 + (total - n + 0.5) / (n + 0.5)) for term, n in df.items()}
+
+    def score(self, rows, decoded, size):
+        """
+        rows 中各行的相关度列表（与 rows 对齐）；decoded 为 {词项: (行号, 词频列, 影响值)}，size 为段内文档数。
+        每个词项的影响值按行号散列到长度为 size 的稠密列，按行号直接取值，不为倒排建立字典
+        """
+        scores = [0.0] * len(rows)
+        for term, (term_rows, _, impacts) in decoded.items():
+            weight = self.idf[term] * (BM25_K1 + 1) / IMPACT_SCALE
+            column = [0] * size
+            for row, impact in zip(term_rows, impacts):
+                column[row] = impact
+            scores = [score + weight * impact for score, impact in zip(scores, map(column.__getitem__, rows))]
+        return scores
+
+
+def tag_boost(tags, tag_ids):
+    """带有命中标签的文档取其中最大的 search_weight；tag_ids 为该行的标签列"""
+    weights = [tags[tag_id] for tag_id in tag_ids if tag_id in tags]
+    return max(weights) if weights else 1.0
+
+
+def search_ids(q, processed_only=True, content_type=None, category_id=None, tag=None, ordering='relevance',
+               facets=False):
+    """
+    返回匹配的 RawNews ID 序列(SearchHits)，按相关度或发布时间倒序；
+    索引为空或查询无法由索引回答(如单个汉字)时返回 None，由调用方回退为数据库查询。
+    facets=True 时在同一趟遍历中统计类型/分类/标签分面，结果见 SearchHits.facets
+    """
+    meta = get_index_meta()
+    if not meta:
+        return None
+    clauses, tags = parse_query(q)
+    if clauses is None:
+        return None
+    filters = resolve_filters(content_type, category_id, tag)
+    if filters is None:
+        return SearchHits([], facets={"type": [], "category": [], "tag": []} if facets else None)
+    terms = {term for alternatives in clauses for terms in alternatives for term in terms}
+    postings = fetch_postings(terms, meta)
+    documents = load_segment_documents(meta, list(postings))
+    scorer = BM25Scorer(meta, postings) if ordering == 'relevance' else None
+    matches = []
+    for segment_id, term_data in postings.items():
+        docs, deleted = documents[segment_id], meta[segment_id]['deleted']
+        decoded = {term: decode_postings(data) for term, data in term_data.items()}
+        rows = list(matched_rows({term: term_rows for term, (term_rows, _, _) in decoded.items()}, clauses))
+        if processed_only:
+            rows = [row for row in rows if docs.processed[row]]
+        if deleted:
+            rows = [row for row in rows if docs.ids[row] not in deleted]
+        matches.append((docs, decoded, rows))
+    type_code, category, tag_id = filters.get('type'), filters.get('category'), filters.get('tag')
+    counter = FacetCounter(filters) if facets else None
+    candidates = []
+    for docs, decoded, rows in matches:
+        if counter is not None:
+            counter.add(docs, rows)
+        if type_code is not None:
+            rows = [row for row in rows if docs.types[row] == type_code]
+        if category is not None:
+            rows = [row for row in rows if docs.categories[row] == category]
+        if tag_id is not None:
+            rows = [row for row in rows if tag_id in docs.row_tags(row)]
+        if scorer is None:
+            scores = itertools.repeat(0.0)
+        else:
+            scores = scorer.score(rows, decoded, len(docs))
+            if tags:
+                scores = [score * tag_boost(tags, docs.row_tags(row)) for score, row in zip(scores, rows)]
+        candidates.extend(zip(scores, map(docs.published.__getitem__, rows), map(docs.ids.__getitem__, rows)))
+    facet_counts = counter.result() if counter is not None else None
+    if scorer is None:
+        return SearchHits([(published, doc_id) for _, published, doc_id in candidates], facet_counts)
+    return SearchHits(candidates, facet_counts)
@@ -0,0 +1,64 @@
+"""
+搜索分词
+
+文本先做 NFKC 归一化并转小写，再切分为连续的 CJK 片段与字母数字片段：
+- CJK 片段输出相邻二字组(bigram)，单字片段输出该字
+- 字母数字片段整体作为一个词
+索引与查询使用同一套分词，查询的全部词项都出现即视为匹配（近似子串匹配）。
+"""
+import re
+import unicodedata
+from collections import Counter
+
+MAX_TERM_LENGTH = 32
+CJK_RANGES = (
+    '㐀-䶿'  # 扩展A
+    '一-鿿'  # 基本汉字
+    '豈-﫿'  # 兼容汉字
+    '぀-ヿ'  # 日文假名
+    '가-힯'  # 韩文音节
+)
+TOKEN_RE = re.compile('([%s]+)|([0-9a-z]+)' % CJK_RANGES)
+
+
+def normalize_text(text):
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+
+def iter_runs(text):
+    """产出 (片段, 是否CJK)"""
+    for match in TOKEN_RE.finditer(normalize_text(text)):
+        cjk, word = match.groups()
+        yield (cjk, True) if cjk else (word, False)
+
+
+def tokenize(text):
+    tokens = []
+    for run, cjk in iter_runs(text):
+        if not cjk:
+            if len(run) <= MAX_TERM_LENGTH:
+                tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def term_frequencies(text):
+    return Counter(tokenize(text))
+
+
+def query_terms(q):
+    """
+    查询词项（去重、保持顺序）；查询含单个汉字片段时返回 None：
+    单字在索引中只出现于孤立的单字片段，无法由二字组可靠匹配
+    """
+    terms = []
+    for run, cjk in iter_runs(q):
+        if cjk and len(run) == 1:
+            return None
+        for term in tokenize(run):
+            if term not in terms:
+                terms.append(term)
+    return terms or None
@@ -0,0 +1,277 @@
+"""
+搜索索引的增量维护与全量重建
+
+- 变更捕获：RawNews 保存/删除时写入 SearchIndexUpdate 队列（见 signals.py），与业务写入同一事务
+- apply_pending_updates：按批取出队列，旧版本在所在段打墓碑，仍存在的文档写入一个新段，
+  每批一个事务；小段积累到 MERGE_MIN_SEGMENTS 个或墓碑比例过高时合并
+- merge_segments：直接读取段内倒排与标签列重排行号并重算影响值，不回表
+- 标签关联变化的内容同样入队（见 tagging.sync_news_tags），段内的标签列随之更新
+- rebuild_search_index：按 segment_size 切分ID区间，进程池并行建段，
+  新段以未启用状态写入，全部完成后在一个事务内替换旧段
+- index_freshness：队列积压数与最旧未应用变更的滞后秒数（新鲜度滞后）
+索引未建立（没有启用的段）时队列直接丢弃，待全量重建时一并覆盖。
+应用变更、合并与重建共用 SearchIndexState 行上的租约锁（条件 UPDATE 抢占，不依赖缓存，
+也不在重建期间持有事务），同一时刻只有一个进程修改索引；最近应用时间同样记录在该行。
+重建每写完一个段续租一次，替换旧段的事务内再确认租约仍属于自己；租约已被接管时删除本次写入的段并放弃重建。
+"""
+import datetime
+import multiprocessing
+import uuid
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import django
+from django.db import connections, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import RawNews, SearchIndexState, SearchIndexUpdate, SearchSegment
+from .search_index import (
+    DOCUMENT_COLUMNS, INDEX_FIELDS, INDEX_STATE_ID, SEGMENT_SIZE, SegmentDocuments, build_segment,
+    decode_tombstones, load_document_rows, mark_index_changed, prepare_segment, read_segment,
+    save_segment, write_segment,
+)
+
+UPDATE_BATCH_SIZE = 1000
+MERGE_MIN_SEGMENTS = 8
+MERGE_DELETED_RATIO = 0.3
+# 租约时长：持锁进程异常退出后，超过该时间其他进程可重新获得锁
+INDEX_LOCK_TIMEOUT = datetime.timedelta(hours=1)
+# 影响索引内容的字段，update_fields 不含这些字段的保存不入队
+INDEXED_FIELDS = {'title', 'summary', 'content', 'type', 'category', 'category_id', 'is_processed', 'published_at'}
+
+
+class IndexBusy(Exception):
+    """其他进程正在修改索引"""
+
+
+class IndexLockLost(IndexBusy):
+    """租约过期后被其他进程接管"""
+
+
+def acquire_index_lock(owner):
+    """锁空闲或租约已过期时由 owner 抢占；条件 UPDATE 由数据库保证只有一个进程成功"""
+    SearchIndexState.objects.get_or_create(pk=INDEX_STATE_ID)
+    now = timezone.now()
+    return SearchIndexState.objects.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now), pk=INDEX_STATE_ID,
+    ).update(locked_by=owner, locked_until=now + INDEX_LOCK_TIMEOUT) == 1
+
+
+def renew_index_lock(owner):
+    """
+    owner 仍持有锁时把租约延长 INDEX_LOCK_TIMEOUT，返回是否仍持有；
+    在事务中调用时该行保持锁定直到提交，其间其他进程无法抢占
+    """
+    return SearchIndexState.objects.filter(pk=INDEX_STATE_ID, locked_by=owner).update(
+        locked_until=timezone.now() + INDEX_LOCK_TIMEOUT,
+    ) == 1
+
+
+def release_index_lock(owner):
+    SearchIndexState.objects.filter(pk=INDEX_STATE_ID, locked_by=owner).update(locked_by='', locked_until=None)
+
+
+@contextmanager
+def index_lock():
+    """获得锁时 yield 持有者标识(用于续租)，否则 yield None"""
+    owner = uuid.uuid4().hex
+    acquired = acquire_index_lock(owner)
+    try:
+        yield owner if acquired else None
+    finally:
+        if acquired:
+            release_index_lock(owner)
+
+
+def mark_updates_applied():
+    SearchIndexState.objects.filter(pk=INDEX_STATE_ID).update(last_applied_at=timezone.now())
+
+
+def enqueue_updates(news_ids):
+    SearchIndexUpdate.objects.bulk_create([SearchIndexUpdate(news_id=news_id) for news_id in news_ids])
+
+
+def add_tombstones(news_ids):
+    """在包含这些文档的段中打墓碑，返回新增墓碑数"""
+    wanted = set(news_ids)
+    segments = SearchSegment.objects.filter(
+        Q(min_doc_id__isnull=True) | Q(min_doc_id__lte=max(wanted), max_doc_id__gte=min(wanted))
+    ).values_list('id', 'doc_count', 'documents', 'deleted_ids')
+    marked = 0
+    for segment_id, count, blob, deleted in segments:
+        tombstones = decode_tombstones(deleted)
+        present = wanted.intersection(SegmentDocuments.loads(blob, count).ids).difference(tombstones)
+        if present:
+            tombstones.extend(sorted(present))
+            SearchSegment.objects.filter(id=segment_id).update(deleted_ids=tombstones.tobytes())
+            marked += len(present)
+    return marked
+
+
+def apply_pending_updates(batch_size=UPDATE_BATCH_SIZE):
+    """应用一批队列中的变更，返回处理的队列条目数"""
+    with index_lock() as acquired:
+        if not acquired:
+            raise IndexBusy
+        updates = list(SearchIndexUpdate.objects.order_by('id').values_list('id', 'news_id')[:batch_size])
+        if not updates:
+            return 0
+        news_ids = sorted({news_id for _, news_id in updates})
+        with transaction.atomic():
+            if SearchSegment.objects.filter(is_active=True).exists():
+                add_tombstones(news_ids)
+                rows = load_document_rows(RawNews.objects.filter(id__in=news_ids))
+                if rows:
+                    write_segment(*build_segment(rows))
+                mark_index_changed()
+            SearchIndexUpdate.objects.filter(id__in=[update_id for update_id, _ in updates]).delete()
+            mark_updates_applied()
+        merge_candidates = segments_to_merge()
+        if merge_candidates:
+            merge_segments(merge_candidates)
+        return len(updates)
+
+
+def segments_to_merge(segment_size=SEGMENT_SIZE):
+    """小段积累到 MERGE_MIN_SEGMENTS 个时合并全部小段；墓碑比例过高的段单独重写"""
+    small, heavy = [], []
+    for segment_id, count, deleted in SearchSegment.objects.filter(is_active=True).values_list('id', 'doc_count', 'deleted_ids'):
+        deleted_count = len(deleted) // 8
+        if count and deleted_count >= count * MERGE_DELETED_RATIO:
+            heavy.append(segment_id)
+        elif count < segment_size:
+            small.append(segment_id)
+    if len(small) >= MERGE_MIN_SEGMENTS:
+        return sorted(small + heavy)
+    return sorted(heavy)
+
+
+def merge_segments(segment_ids, segment_size=SEGMENT_SIZE):
+    """把若干段中未删除的文档按ID重排写入新段并删除原段，返回新段数"""
+    sources, live = [], []
+    for source_no, segment_id in enumerate(segment_ids):
+        documents, tombstones, postings = read_segment(segment_id)
+        deleted = set(tombstones)
+        sources.append((documents, postings))
+        live.extend((doc_id, source_no, row) for row, doc_id in enumerate(documents.ids) if doc_id not in deleted)
+    live.sort()
+    created = 0
+    with transaction.atomic():
+        for start in range(0, len(live), segment_size):
+            chunk = live[start:start + segment_size]
+            remap = {(source_no, row): new_row for new_row, (_, source_no, row) in enumerate(chunk)}
+            documents = SegmentDocuments.empty()
+            for _, source_no, row in chunk:
+                for name, _ in DOCUMENT_COLUMNS:
+                    getattr(documents, name).append(getattr(sources[source_no][0], name)[row])
+                documents.append_tags(sources[source_no][0].row_tags(row))
+            merged = defaultdict(list)
+            for source_no, (_, postings) in enumerate(sources):
+                for term, (rows, frequencies, _) in postings.items():
+                    for i, row in enumerate(rows):
+                        new_row = remap.get((source_no, row))
+                        if new_row is not None:
+                            merged[term].append((new_row, *(column[i] for column in frequencies)))
+            postings = {}
+            for term, entries in merged.items():
+                entries.sort()
+                postings[term] = (array('I', [entry[0] for entry in entries]),
+                                  [array('H', [entry[f + 1] for entry in entries]) for f in range(len(INDEX_FIELDS))])
+            write_segment(documents, postings)
+            created += 1
+        SearchSegment.objects.filter(id__in=segment_ids).delete()
+        mark_index_changed()
+    return created
+
+
+def segment_bounds(queryset, segment_size):
+    """按 segment_size 条切分ID区间，返回 [(下界(不含), 上界(含，末段为 None))]"""
+    bounds, lower, count = [], 0, 0
+    for count, doc_id in enumerate(queryset.order_by('id').values_list('id', flat=True).iterator(chunk_size=10000), 1):
+        if count % segment_size == 0:
+            bounds.append((lower, doc_id))
+            lower = doc_id
+    if count % segment_size:
+        bounds.append((lower, None))
+    return bounds
+
+
+def build_shard(task):
+    """进程池任务：构建一个ID区间的段数据"""
+    queryset, lower, upper = task
+    queryset = queryset.filter(id__gt=lower)
+    if upper is not None:
+        queryset = queryset.filter(id__lte=upper)
+    rows = load_document_rows(queryset)
+    return prepare_segment(*build_segment(rows)) if rows else None
+
+
+def _init_shard_worker():
+    # spawn 方式启动的子进程需要重新加载 Django；fork 方式下为空操作
+    django.setup()
+
+
+def iter_shards(tasks, workers):
+    if workers <= 1:
+        yield from map(build_shard, tasks)
+        return
+    # 子进程不能复用父进程的数据库连接，fork 前先关闭
+    connections.close_all()
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_shard_worker) as pool:
+        yield from pool.map(build_shard, tasks)
+
+
+def rebuild_search_index(queryset=None, segment_size=SEGMENT_SIZE, workers=1):
+    """
+    全量重建索引，返回 (文档数, 段数)；重建开始前入队的变更随之清除。
+    租约在重建期间被其他进程接管时抛出 IndexLockLost，旧段保持不变
+    """
+    queryset = RawNews.objects.all() if queryset is None else queryset
+    with index_lock() as owner:
+        if owner is None:
+            raise IndexBusy
+        queued = SearchIndexUpdate.objects.aggregate(last=Max('id'))['last'] or 0
+        # 上次中断遗留的未启用段
+        SearchSegment.objects.filter(is_active=False).delete()
+        tasks = [(queryset, lower, upper) for lower, upper in segment_bounds(queryset, segment_size)]
+        documents, created = 0, []
+        try:
+            for data in iter_shards(tasks, workers):
+                if not renew_index_lock(owner):
+                    raise IndexLockLost
+                if data:
+                    created.append(save_segment(data, is_active=False).id)
+                    documents += data['doc_count']
+            with transaction.atomic():
+                # 先确认并锁住租约行再替换旧段，只启用本次写入的段
+                if not renew_index_lock(owner):
+                    raise IndexLockLost
+                SearchSegment.objects.filter(is_active=True).delete()
+                SearchSegment.objects.filter(id__in=created).update(is_active=True)
+                SearchIndexUpdate.objects.filter(id__lte=queued).delete()
+                mark_index_changed()
+                mark_updates_applied()
+        except IndexLockLost:
+            # 只删除本次写入的段，接管者的未启用段不受影响
+            SearchSegment.objects.filter(id__in=created).delete()
+            raise
+    return documents, len(created)
+
+
+def index_freshness():
+    """索引状态与新鲜度滞后：最旧未应用变更距今的秒数，队列为空时为 0"""
+    oldest = SearchIndexUpdate.objects.order_by('id').values_list('created_at', flat=True).first()
+    segments = SearchSegment.objects.filter(is_active=True).values_list('doc_count', 'deleted_ids')
+    last_applied = SearchIndexState.objects.filter(pk=INDEX_STATE_ID).values_list('last_applied_at', flat=True).first()
+    return {
+        "segments": len(segments),
+        "documents": sum(count - len(deleted) // 8 for count, deleted in segments),
+        "pending_updates": SearchIndexUpdate.objects.count(),
+        "lag_seconds": round((timezone.now() - oldest).total_seconds(), 3) if oldest else 0.0,
+        "last_applied_at": last_applied.isoformat() if last_applied else None,
+    }
@@ -1,7 +1,9 @@
 from rest_framework import serializers
 from .models import NewsCategory, RawNews, ContentTag, ContentTagRelation, ContentModeration, ContentInteractionStats
 from django.contrib.contenttypes.models import ContentType
+from django.db import models
 from .models import VideoContent
+from .category_tree import get_category_tree
 
 class VideoContentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,27 +14,70 @@ class VideoContentSerializer(serializers.ModelSerializer):
         ]
 
 class NewsCategorySerializer(serializers.ModelSerializer):
-    """资讯分类序列化器，支持递归children"""
+    """资讯分类序列化器，children 取自缓存的分类树，不再逐层查询"""
     children = serializers.SerializerMethodField()
     class Meta:
         model = NewsCategory
         fields = ['id', 'name', 'name_en', 'description', 'icon_url', 'color_code', 'children']
     def get_children(self, obj):
-        return NewsCategorySerializer(obj.children.all(), many=True).data
+        node = get_category_tree()['nodes'].get(obj.pk)
+        return node['children'] if node else []
 
-class RawNewsSerializer(serializers.ModelSerializer):
+def resolve_video_contents(news_items):
+    """批量查询一页RawNews对应的VideoContent，返回 {source_url: VideoContent}"""
+    source_urls = {obj.source_url for obj in news_items if obj.type == 'video' and obj.source_url}
+    if not source_urls:
+        return {}
+    videos = {}
+    # 按默认排序遍历，与逐条查询时 .first() 取到的记录保持一致
+    for video in VideoContent.objects.filter(source_url__in=source_urls):
+        videos.setdefault(video.source_url, video)
+    return videos
+
+class RawNewsListSerializer(serializers.ListSerializer):
+    """RawNews列表序列化器，整页一次性解析视频内容，避免逐行查询"""
+    def to_representation(self, data):
+        iterable = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        # 稀疏字段集不含 video_content 时不解析，避免读取被 .only() 延迟的 type/source_url
+        if self.root is self and 'video_contents' not in self.context and 'video_content' in self.child.fields:
+            self._context = dict(self.context, video_contents=resolve_video_contents(iterable))
+        return super().to_representation(iterable)
+
+class DynamicFieldsMixin:
+    """支持通过 fields 参数裁剪输出字段（稀疏字段集）"""
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+class RawNewsSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """原始新闻内容序列化器"""
     video_content = serializers.SerializerMethodField()
     class Meta:
         model = RawNews
         fields = '__all__'
+        list_serializer_class = RawNewsListSerializer
     def get_video_content(self, obj):
         if obj.type == 'video' and obj.source_url:
-            video = VideoContent.objects.filter(source_url=obj.source_url).first()
+            video_contents = self.context.get('video_contents')
+            if video_contents is not None:
+                video = video_contents.get(obj.source_url)
+            else:
+                video = VideoContent.objects.filter(source_url=obj.source_url).first()
             if video:
                 return VideoContentSerializer(video).data
         return None
 
+class RawNewsCardSerializer(RawNewsSerializer):
+    """Feed卡片序列化器，仅包含列表展示字段，正文等完整内容由详情接口返回"""
+    class Meta(RawNewsSerializer.Meta):
+        fields = [
+            'id', 'type', 'title', 'summary', 'author', 'source', 'source_url',
+            'published_at', 'category', 'tags', 'video_content',
+        ]
+
 class ContentTagSerializer(serializers.ModelSerializer):
     class Meta:
         model = ContentTag
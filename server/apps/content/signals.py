@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .feeds import FEED_REGISTRY_KEY, update_feed_lists
+from .models import RawNews, ContentCategory, NewsCategory, ContentTag, ContentTagRelation, VideoContent, AudioContent
+from .response_cache import bump_model_version, model_label
+from .tagging import sync_news_tags, sync_news_tags_by_id
+from .category_tree import invalidate_category_tree
+from .search_updates import INDEXED_FIELDS, enqueue_updates
+from .media_text import MEDIA_TEXT_FIELDS, index_media_text, remove_media_text
+
+
+@receiver(pre_save, sender=RawNews)
+def remember_rawnews_state(sender, instance, **kwargs):
+    """记录变更前的筛选字段，用于判断条目原先属于哪些Feed列表"""
+    previous = None
+    if instance.pk and cache.get(FEED_REGISTRY_KEY):
+        previous = RawNews.objects.filter(pk=instance.pk).values('is_processed', 'category_id', 'type').first()
+    instance._feed_previous = SimpleNamespace(**previous) if previous else None
+
+
+@receiver(post_save, sender=RawNews)
+def sync_feed_lists_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    update_feed_lists(instance, previous=getattr(instance, '_feed_previous', None))
+
+
+@receiver(post_save, sender=RawNews)
+def sync_tags_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'tags' not in update_fields):
+        return
+    sync_news_tags([instance])
+
+
+@receiver(post_save, sender=RawNews)
+def enqueue_search_update_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not INDEXED_FIELDS.intersection(update_fields)):
+        return
+    enqueue_updates([instance.pk])
+
+
+@receiver(post_delete, sender=RawNews)
+def enqueue_search_update_on_delete(sender, instance, **kwargs):
+    enqueue_updates([instance.pk])
+
+
+def sync_tags_on_relation_change(sender, instance, raw=False, **kwargs):
+    """ContentTagRelation 指向 RawNews 时同步其标签关联"""
+    if raw or instance.content_type_id != ContentType.objects.get_for_model(RawNews).pk:
+        return
+    sync_news_tags_by_id(instance.object_id)
+
+
+post_save.connect(sync_tags_on_relation_change, sender=ContentTagRelation)
+post_delete.connect(sync_tags_on_relation_change, sender=ContentTagRelation)
+
+
+@receiver(post_delete, sender=RawNews)
+def sync_feed_lists_on_delete(sender, instance, **kwargs):
+    update_feed_lists(instance, previous=instance, deleted=True)
+
+
+def bump_response_cache_version(sender, **kwargs):
+    """模型写入后使相关的响应缓存失效"""
+    bump_model_version(model_label(sender))
+
+
+for model in (RawNews, ContentCategory, NewsCategory, ContentTag, VideoContent):
+    post_save.connect(bump_response_cache_version, sender=model, dispatch_uid=f'response_cache_save_{model.__name__}')
+    post_delete.connect(bump_response_cache_version, sender=model, dispatch_uid=f'response_cache_delete_{model.__name__}')
+
+
+def clear_category_tree(sender, **kwargs):
+    invalidate_category_tree()
+
+
+for model in (ContentCategory, NewsCategory):
+    post_save.connect(clear_category_tree, sender=model, dispatch_uid=f'category_tree_save_{model.__name__}')
+    post_delete.connect(clear_category_tree, sender=model, dispatch_uid=f'category_tree_delete_{model.__name__}')
+
+
+def index_media_text_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """音视频保存时在同一事务内重建文本段，查询时不再解析原文"""
+    if raw or (update_fields is not None and not MEDIA_TEXT_FIELDS.intersection(update_fields)):
+        return
+    index_media_text(instance)
+
+
+def remove_media_text_on_delete(sender, instance, **kwargs):
+    remove_media_text(ContentType.objects.get_for_model(sender), instance.pk)
+
+
+for model in (AudioContent, VideoContent):
+    post_save.connect(index_media_text_on_save, sender=model, dispatch_uid=f'media_text_save_{model.__name__}')
+    post_delete.connect(remove_media_text_on_delete, sender=model, dispatch_uid=f'media_text_delete_{model.__name__}')
@@ -0,0 +1,105 @@
+"""
+Feed快照会话
+
+首个请求把当前查询的有序ID列表存入缓存并返回短期令牌，之后的翻页只切片该列表再按ID回表，
+新内容写入不会让已浏览的条目重复或遗漏，深翻页代价只与页大小相关。
+请求参数 snapshot=1 创建快照，snapshot=<令牌> 沿用快照。
+快照保存在默认缓存中，多进程部署依赖共享缓存(settings.CACHES)，翻页请求可由任意 worker 处理。
+结果集超过 SNAPSHOT_MAX_SIZE 时只保存前缀，之后的页从前缀末尾的 (排序值, id) 起按 keyset 查询，
+并只包含创建快照时已存在的内容(id 不超过当时的最大 id)，总数为创建时的精确计数。
+"""
+import hashlib
+import secrets
+
+from django.core.cache import cache
+from django.db.models import Max, Q
+from rest_framework.exceptions import NotFound
+from server.db_routing import primary_reads
+
+from .feeds import IdListFeed
+
+SNAPSHOT_QUERY_PARAM = 'snapshot'
+SNAPSHOT_NEW_VALUES = ('', '1', 'true', 'new')
+SNAPSHOT_TIMEOUT = 60 * 10
+SNAPSHOT_MAX_SIZE = 2000
+# 不影响结果集的参数，沿用快照时可以不同
+SNAPSHOT_IGNORED_PARAMS = ('page', 'page_size', 'fields', 'count', SNAPSHOT_QUERY_PARAM)
+
+
+def snapshot_cache_key(token):
+    return 'content:snapshot:%s' % token
+
+
+def snapshot_scope(view_name, query_params):
+    """快照所属的视图与筛选条件摘要，防止令牌被用于其他查询"""
+    params = sorted((name, sorted(values)) for name, values in query_params.lists()
+                    if name not in SNAPSHOT_IGNORED_PARAMS)
+    return hashlib.md5(repr((view_name, params)).encode()).hexdigest()
+
+
+def keyset_after(order_field, value, last_id):
+    """按 order_field 降序(空值在后)、id 降序排列时，位于 (value, last_id) 之后的行"""
+    if value is None:
+        return Q(**{f'{order_field}__isnull': True, 'id__lt': last_id})
+    return (Q(**{f'{order_field}__lt': value}) | Q(**{order_field: value, 'id__lt': last_id})
+            | Q(**{f'{order_field}__isnull': True}))
+
+
+class SnapshotFeed(IdListFeed):
+    """
+    快照ID列表的惰性序列，附带令牌；
+    tail 为前缀之后的 keyset 查询集(前缀未截断时为 None)，total 为快照的总条数
+    """
+    def __init__(self, token, ids, queryset, tail=None, total=None):
+        super().__init__(ids, queryset)
+        self.token = token
+        self.tail = tail
+        self.total = len(ids) if total is None else total
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or self.tail is None:
+            return super().__getitem__(key)
+        start = key.start or 0
+        stop = self.total if key.stop is None else key.stop
+        prefix = len(self.ids)
+        items = super().__getitem__(slice(start, min(stop, prefix))) if start < prefix else []
+        if stop > prefix:
+            items += list(self.tail[max(start - prefix, 0):stop - prefix])
+        return items
+
+
+def is_snapshot_requested(request):
+    return SNAPSHOT_QUERY_PARAM in request.query_params
+
+
+def create_snapshot(scope, queryset, order_field):
+    rows = list(queryset.values_list('id', order_field)[:SNAPSHOT_MAX_SIZE + 1])
+    snapshot = {'scope': scope, 'ids': [pk for pk, _ in rows[:SNAPSHOT_MAX_SIZE]]}
+    if len(rows) > SNAPSHOT_MAX_SIZE:
+        last_id, last_value = rows[SNAPSHOT_MAX_SIZE - 1]
+        max_id = queryset.model.objects.aggregate(max_id=Max('id'))['max_id']
+        snapshot.update(order_field=order_field, after=(last_value, last_id), max_id=max_id,
+                        total=queryset.filter(id__lte=max_id).count())
+    return snapshot
+
+
+@primary_reads()
+def get_snapshot_feed(request, view_name, queryset, order_field):
+    """创建或读取快照；queryset 须已按 order_field 降序(空值在后)、id 降序排序"""
+    token = request.query_params.get(SNAPSHOT_QUERY_PARAM, '')
+    scope = snapshot_scope(view_name, request.query_params)
+    if token.lower() in SNAPSHOT_NEW_VALUES:
+        token = secrets.token_urlsafe(12)
+        snapshot = create_snapshot(scope, queryset, order_field)
+        cache.set(snapshot_cache_key(token), snapshot, SNAPSHOT_TIMEOUT)
+    else:
+        snapshot = cache.get(snapshot_cache_key(token))
+        if snapshot is None or snapshot['scope'] != scope:
+            raise NotFound('快照不存在或已过期')
+    tail = None
+    if 'after' in snapshot:
+        tail = queryset.filter(keyset_after(snapshot['order_field'], *snapshot['after']), id__lte=snapshot['max_id'])
+    return SnapshotFeed(token, snapshot['ids'], queryset, tail=tail, total=snapshot.get('total'))
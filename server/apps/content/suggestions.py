@@ -0,0 +1,483 @@
+"""
+搜索建议前缀索引
+
+进程内构建一次，覆盖已处理 RawNews 的标题、启用标签的名称与同义词：
+- 每个条目在若干起点处截取归一化后缀作为键(标题取各词段起点，标签取每个字符)，
+  排序后以二分查找定位前缀区间，等价于对起点位置做子串匹配
+- 命中区间超过 SUGGEST_HEAVY_RANGE 的前缀（短前缀、高频词）在构建时预先算好排名前列的条目，
+  查询只需一次字典查找或一次二分加小区间排序
+- 基础索引在后台线程构建后整体替换，请求不等待构建；尚无索引时回退为数据库前缀查询
+- RawNews/ContentTag 版本号变化后(至少间隔 SUGGEST_REFRESH_INTERVAL 秒)只读取 updated_at 晚于基础索引水位线的行，
+  构建小的增量层与基础索引合并查询；增量中已取消处理的标题、已停用的标签从基础索引结果中隐藏，
+  被删除或改名前的旧文本保留到下一次整体重建。增量超过 SUGGEST_DELTA_MAX_ENTRIES 条
+  或基础索引超过 SUGGEST_REBUILD_INTERVAL 秒时在后台整体重建；事务中（数据对其他连接不可见）改为同步构建
+高亮区间直接取自匹配位置，经逐字符归一化的偏移映射回原文。
+
+前缀匹配不足 limit 条时用 FuzzyIndex 补足，容忍拼写错误并支持拼音输入：
+- 词项为各条目词段起点处的前 FUZZY_TERM_LENGTH 个字符；CJK 片段另生成全拼与首字母两种拼音词项
+  （pypinyin 逐字注音，不处理多音字的上下文）
+- 候选由带位置的二字组倒排生成：k 次编辑至多破坏 2k 个查询二字组，且位置偏移不超过 k，
+  共享二字组不足的词项直接排除；按倒排由短到长累计，扫描量超过 FUZZY_MAX_POSTINGS 时
+  跳过其余二字组并相应放宽门槛，门槛降到 0 时放弃模糊匹配，保证延迟有界
+- 候选按共享二字组数取前 FUZZY_MAX_VERIFY 个，计算查询与词项前缀的编辑距离验证
+允许的编辑距离随查询长度增加：2 个字符以内为 0（仅拼音前缀），6 个以内为 1，更长为 2。
+"""
+import bisect
+import datetime
+import functools
+import heapq
+import logging
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from collections import Counter, defaultdict
+
+from django.db import connection, connections
+from django.utils import timezone
+from pypinyin import lazy_pinyin
+
+from .models import ContentTag, RawNews
+from .response_cache import get_model_versions
+from .search_text import CJK_RANGES, TOKEN_RE
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_VERSION_LABELS = ('rawnews', 'contenttag')
+SUGGEST_MAX_LIMIT = 20
+SUGGEST_HEAVY_RANGE = 256
+SUGGEST_KEY_LENGTH = 32
+SUGGEST_REFRESH_INTERVAL = 5
+SUGGEST_REBUILD_INTERVAL = 60 * 60
+SUGGEST_DELTA_MAX_ENTRIES = 2000
+# 水位线前移的余量，覆盖构建时尚未提交的写入(updated_at 早于提交时间)
+SUGGEST_DELTA_OVERLAP = datetime.timedelta(seconds=60)
+FUZZY_TERM_LENGTH = 12
+FUZZY_QUERY_LENGTH = 10
+FUZZY_MAX_POSTINGS = 5000
+FUZZY_MAX_VERIFY = 50
+# 同等匹配位置下标签优先于标题
+KIND_RANK = {'tag': 0, 'title': 1}
+CJK_RE = re.compile('[%s]' % CJK_RANGES)
+
+
+def normalize_with_offsets(text):
+    """逐字符归一化，返回 (归一化文本, 每个归一化字符对应的原文下标)"""
+    chars, offsets = [], []
+    for i, ch in enumerate(text):
+        for normalized in unicodedata.normalize('NFKC', ch).lower():
+            chars.append(normalized)
+            offsets.append(i)
+    return ''.join(chars), offsets
+
+
+def normalize_query(q):
+    return normalize_with_offsets(q.strip())[0]
+
+
+def word_starts(normalized):
+    """标题的索引起点：开头及每个CJK/字母数字片段的起点"""
+    starts = {0}
+    starts.update(match.start() for match in TOKEN_RE.finditer(normalized))
+    return starts
+
+
+@functools.lru_cache(maxsize=None)
+def pinyin_syllable(ch):
+    """单个 CJK 字符的无声调拼音；无拼音(假名、谚文等)时为 None"""
+    if not CJK_RE.match(ch):
+        return None
+    syllable = lazy_pinyin(ch)[0]
+    return syllable if syllable.isascii() and syllable.isalpha() else None
+
+
+def pinyin_terms(normalized, start):
+    """从 start 起的 CJK 片段的 (全拼, 首字母) 词项，各附每个拼音字符对应的归一化文本下标"""
+    full, full_map, initials, initials_map = [], [], [], []
+    for i in range(start, len(normalized)):
+        syllable = pinyin_syllable(normalized[i])
+        if syllable is None or len(full_map) >= FUZZY_TERM_LENGTH:
+            break
+        full.append(syllable)
+        full_map.extend([i] * len(syllable))
+        initials.append(syllable[0])
+        initials_map.append(i)
+    terms = []
+    if full:
+        terms.append((''.join(full)[:FUZZY_TERM_LENGTH], tuple(full_map[:FUZZY_TERM_LENGTH])))
+    if len(initials) > 1:
+        terms.append((''.join(initials), tuple(initials_map)))
+    return terms
+
+
+def prefix_distance(q, term, max_distance):
+    """q 与 term 某个前缀的最小编辑距离及该前缀长度；超过 max_distance 时返回 None（只计算宽 2k+1 的对角带）"""
+    width = min(len(term), len(q) + max_distance)
+    limit = max_distance + 1
+    previous = [min(j, limit) for j in range(width + 1)]
+    for i, ch in enumerate(q, 1):
+        current = [min(i, limit)] + [limit] * width
+        for j in range(max(1, i - max_distance), min(width, i + max_distance) + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ch != term[j - 1]), limit)
+        if min(current) > max_distance:
+            return None
+        previous = current
+    # 距离相同时取长度最接近查询的前缀，高亮更贴近输入
+    length = min(range(width + 1), key=lambda j: (previous[j], abs(j - len(q))))
+    return (previous[length], length) if previous[length] <= max_distance else None
+
+
+def fuzzy_distance(length):
+    if length <= 2:
+        return 0
+    return 1 if length <= 6 else 2
+
+
+class Entry:
+    __slots__ = ('text', 'kind', 'label', 'normalized', 'offsets', 'score')
+
+    def __init__(self, text, kind, score, label=None):
+        self.text = text
+        self.kind = kind
+        self.label = label
+        self.normalized, self.offsets = normalize_with_offsets(text)
+        self.score = score
+
+    def highlight(self, start, length):
+        """以匹配位置生成高亮文本"""
+        begin = self.offsets[start]
+        end = self.offsets[start + length - 1] + 1
+        marked = f'{self.text[:begin]}<em>{self.text[begin:end]}</em>{self.text[end:]}'
+        # 同义词命中时展示标签名，括注命中的同义词
+        return f'{self.label}（{marked}）' if self.label else marked
+
+    def as_suggestion(self, start, length):
+        return {"text": self.label or self.text, "type": self.kind, "highlight": self.highlight(start, length)}
+
+
+class PrefixIndex:
+    def __init__(self, entries):
+        self.entries = entries
+        pairs = []
+        for entry_no, entry in enumerate(entries):
+            starts = range(len(entry.normalized)) if entry.kind == 'tag' else word_starts(entry.normalized)
+            for start in starts:
+                pairs.append((entry.normalized[start:start + SUGGEST_KEY_LENGTH], entry_no, start))
+        pairs.sort()
+        self.keys = [key for key, _, _ in pairs]
+        self.refs = [(entry_no, start) for _, entry_no, start in pairs]
+        self.heavy_tops = {}
+        self.build_heavy_tops('', 0, len(self.keys))
+
+    def rank(self, ref):
+        entry_no, start = ref
+        entry = self.entries[entry_no]
+        return (start > 0, KIND_RANK[entry.kind], -entry.score, entry.normalized)
+
+    def best_refs(self, refs, limit):
+        """每个条目只保留最佳匹配位置，按排名取前 limit 个"""
+        best = {}
+        for ref in refs:
+            if ref[0] not in best or ref[1] < best[ref[0]][1]:
+                best[ref[0]] = ref
+        return heapq.nsmallest(limit, best.values(), key=self.rank)
+
+    def build_heavy_tops(self, prefix, lo, hi):
+        """逐字符细分 prefix 的命中区间，区间过大的前缀预先计算排名"""
+        depth = len(prefix)
+        if depth >= SUGGEST_KEY_LENGTH:
+            return
+        i = lo
+        while i < hi:
+            if len(self.keys[i]) <= depth:
+                i += 1
+                continue
+            child = prefix + self.keys[i][depth]
+            end = bisect.bisect_left(self.keys, child + '\U0010ffff', i, hi)
+            if end - i > SUGGEST_HEAVY_RANGE:
+                self.heavy_tops[child] = self.best_refs(self.refs[i:end], SUGGEST_MAX_LIMIT)
+                self.build_heavy_tops(child, i, end)
+            i = end
+
+    def matches(self, q, limit):
+        """按排名排序的 (排名, 建议)，同一文本可能出现多次"""
+        prefix = normalize_query(q)
+        if not prefix:
+            return []
+        if prefix in self.heavy_tops:
+            refs = self.heavy_tops[prefix]
+        else:
+            key = prefix[:SUGGEST_KEY_LENGTH]
+            lo = bisect.bisect_left(self.keys, key)
+            hi = bisect.bisect_left(self.keys, key + '\U0010ffff', lo)
+            refs = self.refs[lo:hi]
+            if len(prefix) > SUGGEST_KEY_LENGTH:
+                refs = [ref for ref in refs if self.entries[ref[0]].normalized.startswith(prefix, ref[1])]
+        return [(self.rank(ref), self.entries[ref[0]].as_suggestion(ref[1], len(prefix)))
+                for ref in self.best_refs(refs, limit * 2)]
+
+
+class FuzzyIndex:
+    def __init__(self, entries):
+        self.entries = entries
+        self.terms = []
+        # 词项ID -> [(条目序号, 归一化文本起点, 词项字符到归一化下标的映射；原文词项为 None)]
+        self.refs = []
+        term_ids = {}
+        for entry_no, entry in enumerate(entries):
+            for start in word_starts(entry.normalized):
+                candidates = [(entry.normalized[start:start + FUZZY_TERM_LENGTH], None)]
+                candidates.extend(pinyin_terms(entry.normalized, start))
+                for term, char_map in candidates:
+                    if len(term.strip()) < 2:
+                        continue
+                    term_id = term_ids.get(term)
+                    if term_id is None:
+                        term_id = term_ids[term] = len(self.terms)
+                        self.terms.append(term)
+                        self.refs.append([])
+                    self.refs[term_id].append((entry_no, start, char_map))
+        # (二字组, 位置) -> 升序的词项ID；词项前补 '^' 使首字符也参与位置约束
+        grams = defaultdict(lambda: array('I'))
+        for term_id, term in enumerate(self.terms):
+            padded = '^' + term
+            for k in range(len(padded) - 1):
+                grams[padded[k:k + 2], k].append(term_id)
+        self.grams = dict(grams)
+
+    def candidates(self, q, max_distance):
+        """共享二字组数达到门槛的 (共享数, 词项ID)，按共享数降序；门槛无法成立时返回 None"""
+        padded = '^' + q
+        gram_lists = []
+        for k in range(len(padded) - 1):
+            lists = [self.grams.get((padded[k:k + 2], pos), ()) for pos in range(max(0, k - max_distance), k + max_distance + 1)]
+            gram_lists.append((sum(map(len, lists)), lists))
+        required, scanned = len(q) - 2 * max_distance, 0
+        counts = Counter()
+        for size, lists in sorted(gram_lists, key=lambda item: item[0]):
+            if scanned + size > FUZZY_MAX_POSTINGS:
+                required -= 1
+                continue
+            scanned += size
+            counts.update(lists[0] if len(lists) == 1 else set().union(*lists))
+        if required < 1:
+            return None
+        matched = [(count, term_id) for term_id, count in counts.items() if count >= required]
+        return heapq.nlargest(FUZZY_MAX_VERIFY, matched)
+
+    def matches(self, q, limit):
+        """按排名排序的 (排名, 建议)，同一文本可能出现多次"""
+        q = ''.join(normalize_query(q).split())[:FUZZY_QUERY_LENGTH]
+        if len(q) < 2:
+            return []
+        max_distance = fuzzy_distance(len(q))
+        best = {}
+        for count, term_id in self.candidates(q, max_distance) or ():
+            # 共享 count 个二字组的词项编辑距离至少为 (len(q) - count) / 2，已有足够更近的结果时停止
+            if len(best) >= limit and max(item[0][0] for item in best.values()) <= (len(q) - count + 1) // 2:
+                break
+            match = prefix_distance(q, self.terms[term_id], max_distance)
+            if match is None:
+                continue
+            distance, matched = match
+            for entry_no, start, char_map in self.refs[term_id]:
+                entry = self.entries[entry_no]
+                length = matched
+                if char_map is not None:
+                    start, length = char_map[0], char_map[matched - 1] - char_map[0] + 1
+                rank = (distance, start > 0, KIND_RANK[entry.kind], -entry.score, entry.normalized)
+                if entry_no not in best or rank < best[entry_no][0]:
+                    best[entry_no] = (rank, start, length)
+        return [(rank, self.entries[entry_no].as_suggestion(start, length))
+                for entry_no, (rank, start, length) in sorted(best.items(), key=lambda item: item[1][0])]
+
+
+def merge_matches(match_lists, limit, seen, hidden=frozenset()):
+    """按排名合并多层的匹配结果，去掉已出现与被隐藏的 (类型, 文本)，至多 limit 条"""
+    suggestions = []
+    for _, suggestion in heapq.merge(*match_lists, key=lambda item: item[0]):
+        key = (suggestion['type'], suggestion['text'])
+        if key not in seen and key not in hidden:
+            seen.add(key)
+            suggestions.append(suggestion)
+            if len(suggestions) >= limit:
+                break
+    return suggestions
+
+
+class SuggestionIndex:
+    """
+    前缀匹配优先，不足 limit 条时以模糊匹配补足；
+    delta 为基础索引之后变化的条目，hidden 为需从基础索引结果中去掉的 (类型, 文本)
+    """
+    def __init__(self, entries, delta=None, hidden=frozenset()):
+        self.prefix = PrefixIndex(entries)
+        self.fuzzy = FuzzyIndex(entries)
+        self.delta = delta
+        self.hidden = hidden
+
+    def with_delta(self, entries, hidden):
+        """共享本索引的结构，附加新的增量层"""
+        index = SuggestionIndex.__new__(SuggestionIndex)
+        index.prefix, index.fuzzy = self.prefix, self.fuzzy
+        index.delta = SuggestionIndex(entries) if entries else None
+        index.hidden = frozenset(hidden)
+        return index
+
+    def lookup(self, q, limit):
+        layers = [self] if self.delta is None else [self, self.delta]
+        # 被隐藏的条目可能占据基础索引的前列，多取相应条数
+        extra = min(len(self.hidden), SUGGEST_MAX_LIMIT)
+        seen = set()
+        suggestions = merge_matches([layer.prefix.matches(q, limit + extra) for layer in layers], limit, seen, self.hidden)
+        if len(suggestions) < limit:
+            suggestions += merge_matches([layer.fuzzy.matches(q, limit) for layer in layers],
+                                         limit - len(suggestions), seen, self.hidden)
+        return suggestions
+
+
+def title_entry(title, hotness):
+    return Entry(title, 'title', hotness or 0.0)
+
+
+def tag_entries(name, synonyms, popularity, weight):
+    score = float(popularity or 0) * float(weight or 1)
+    entries = [Entry(name, 'tag', score)]
+    for synonym in synonyms if isinstance(synonyms, list) else []:
+        if isinstance(synonym, str) and synonym.strip() and synonym != name:
+            entries.append(Entry(synonym.strip(), 'tag', score, label=name))
+    return entries
+
+
+def load_entries():
+    entries, titles = [], set()
+    rows = RawNews.objects.filter(is_processed=True).values_list('title', 'hotness_score').iterator(chunk_size=5000)
+    for title, hotness in rows:
+        if title and title not in titles:
+            titles.add(title)
+            entries.append(title_entry(title, hotness))
+    tags = ContentTag.objects.filter(is_active=True).values_list('name', 'synonyms', 'popularity_score', 'search_weight')
+    for row in tags:
+        entries.extend(tag_entries(*row))
+    return entries
+
+
+def load_delta(since):
+    """
+    updated_at 不早于 since 的标题与标签，返回 (条目, 需隐藏的 (类型, 文本))；
+    变化超过 SUGGEST_DELTA_MAX_ENTRIES 条时返回 None，由调用方整体重建
+    """
+    rows = list(RawNews.objects.filter(updated_at__gte=since).order_by()
+                .values_list('title', 'hotness_score', 'is_processed')[:SUGGEST_DELTA_MAX_ENTRIES + 1])
+    tags = list(ContentTag.objects.filter(updated_at__gte=since)
+                .values_list('name', 'synonyms', 'popularity_score', 'search_weight', 'is_active'))
+    if len(rows) + len(tags) > SUGGEST_DELTA_MAX_ENTRIES:
+        return None
+    entries, titles, hidden_titles, hidden = [], set(), set(), set()
+    for title, hotness, processed in rows:
+        if title and processed and title not in titles:
+            titles.add(title)
+            entries.append(title_entry(title, hotness))
+        elif title and not processed:
+            hidden_titles.add(title)
+    # 同名标题可能还有其他已处理的行，此类标题不隐藏
+    hidden_titles -= titles
+    if hidden_titles:
+        hidden_titles -= set(RawNews.objects.filter(is_processed=True, title__in=hidden_titles)
+                             .values_list('title', flat=True))
+    hidden.update(('title', title) for title in hidden_titles)
+    for name, synonyms, popularity, weight, is_active in tags:
+        if is_active:
+            entries.extend(tag_entries(name, synonyms, popularity, weight))
+        else:
+            hidden.add(('tag', name))
+    return entries, hidden
+
+
+def database_suggestions(q, limit):
+    """索引构建完成前的回退：标签名与标题的数据库前缀查询"""
+    prefix = normalize_query(q)
+    if not prefix:
+        return []
+    tags = ContentTag.objects.filter(is_active=True, name__istartswith=q.strip()).order_by('-popularity_score', 'name')
+    titles = (RawNews.objects.filter(is_processed=True, title__istartswith=q.strip())
+              .order_by('-hotness_score', '-id').values_list('title', flat=True))
+    entries = [Entry(name, 'tag', 0.0) for name in tags.values_list('name', flat=True)[:limit]]
+    entries += [Entry(title, 'title', 0.0) for title in titles[:limit * 2]]
+    suggestions, seen = [], set()
+    for entry in entries:
+        if entry.normalized.startswith(prefix) and (entry.kind, entry.text) not in seen and len(suggestions) < limit:
+            seen.add((entry.kind, entry.text))
+            suggestions.append(entry.as_suggestion(0, len(prefix)))
+    return suggestions
+
+
+class SuggestionIndexHolder:
+    """每个进程一份索引，按模型版本号判断是否过期；构建与刷新都在请求之外进行"""
+    def __init__(self):
+        self.index = None
+        self.versions = None
+        self.watermark = None
+        self.built_at = 0
+        self.checked_at = 0
+        self.lock = threading.Lock()
+        self.refreshing = False
+
+    def rebuild(self, versions=None):
+        """整体重建基础索引"""
+        versions = versions if versions is not None else get_model_versions(SUGGEST_VERSION_LABELS)
+        watermark = timezone.now() - SUGGEST_DELTA_OVERLAP
+        index = SuggestionIndex(load_entries())
+        self.index, self.versions, self.watermark = index, versions, watermark
+        self.built_at = self.checked_at = time.monotonic()
+        return index
+
+    def refresh(self, versions):
+        """重建增量层；基础索引过旧或增量过大时整体重建"""
+        if self.index is None or time.monotonic() - self.built_at >= SUGGEST_REBUILD_INTERVAL:
+            return self.rebuild(versions)
+        delta = load_delta(self.watermark)
+        if delta is None:
+            return self.rebuild(versions)
+        self.index = self.index.with_delta(*delta)
+        self.versions, self.checked_at = versions, time.monotonic()
+        return self.index
+
+    def _refresh_in_thread(self, versions):
+        try:
+            self.refresh(versions)
+        except Exception:
+            logger.exception('刷新搜索建议索引失败')
+        finally:
+            self.refreshing = False
+            connections.close_all()
+
+    def get(self):
+        """当前索引；尚未构建完成时返回 None"""
+        versions = get_model_versions(SUGGEST_VERSION_LABELS)
+        if connection.in_atomic_block:
+            if self.index is None or versions != self.versions:
+                self.refresh(versions)
+            return self.index
+        if self.index is None or (versions != self.versions
+                                  and time.monotonic() - self.checked_at >= SUGGEST_REFRESH_INTERVAL):
+            with self.lock:
+                if self.refreshing:
+                    return self.index
+                self.refreshing = True
+            threading.Thread(target=self._refresh_in_thread, args=(versions,), daemon=True,
+                             name='suggestion-index-refresh').start()
+        return self.index
+
+
+suggestion_index = SuggestionIndexHolder()
+
+
+def get_suggestions(q, limit=5):
+    """返回 (建议列表, 是否来自索引)；索引构建完成前为数据库回退结果"""
+    limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+    index = suggestion_index.get()
+    if index is None:
+        return database_suggestions(q, limit), False
+    return index.lookup(q, limit), True
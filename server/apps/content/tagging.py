@@ -0,0 +1,166 @@
+"""
+RawNews 标签的规范化关联表维护
+
+RawNews.tags(标签名JSON列表) 与 ContentTagRelation 两个来源合并写入 RawNewsTag，
+标签筛选走 (tag, news) 索引，不再对JSON字段做 contains 扫描。
+保存/删除时由 signals.py 增量同步，存量数据由迁移 0015 回填(之后可用 manage.py backfill_news_tags 重新同步)。
+抓取内容中出现的新标签名自动创建为未启用(is_active=False)、is_auto_generated 的标签：
+只用于标签筛选，不出现在标签列表、搜索建议、同义词与分面中，管理员启用后才对外可见。
+"""
+import hashlib
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from .models import ContentTag, ContentTagRelation, RawNews, RawNewsTag, SearchIndexUpdate
+from .response_cache import bump_model_version, get_model_versions
+from server.db_routing import primary_reads
+
+TAG_BACKFILL_BATCH_SIZE = 1000
+# 按内容ID查询标签关联时每条 IN 查询的ID数
+TAG_LOOKUP_BATCH_SIZE = 5000
+TAG_NAME_MAX_LENGTH = ContentTag._meta.get_field('name').max_length
+ACTIVE_TAGS_KEY = 'content:tags:active:%s'
+
+
+def tag_slug(name):
+    """自动创建标签的slug，附加名称摘要避免与已有slug冲突"""
+    digest = hashlib.md5(name.encode()).hexdigest()[:8]
+    return '%s-%s' % (slugify(name, allow_unicode=True)[:40] or 'tag', digest)
+
+
+def normalize_tag_names(tags):
+    names = []
+    for name in tags if isinstance(tags, list) else []:
+        if isinstance(name, str):
+            name = name.strip()
+            if name and len(name) <= TAG_NAME_MAX_LENGTH and name not in names:
+                names.append(name)
+    return names
+
+
+def resolve_tag_ids(names):
+    """标签名 -> ContentTag.id，不存在的标签自动创建为未启用的标签"""
+    if not names:
+        return {}
+    tag_ids = dict(ContentTag.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = [name for name in names if name not in tag_ids]
+    if missing:
+        ContentTag.objects.bulk_create(
+            [ContentTag(name=name, slug=tag_slug(name), is_auto_generated=True, is_active=False) for name in missing],
+            ignore_conflicts=True,
+        )
+        tag_ids.update(ContentTag.objects.filter(name__in=missing).values_list('name', 'id'))
+        # bulk_create 不触发信号，手动使标签相关的响应缓存失效
+        bump_model_version('contenttag')
+    return tag_ids
+
+
+def desired_links(news_items):
+    """一批 RawNews 应有的 (news_id, tag_id) 集合：JSON标签 ∪ ContentTagRelation"""
+    names_by_news = {news.pk: normalize_tag_names(news.tags) for news in news_items}
+    tag_ids = resolve_tag_ids(sorted({name for names in names_by_news.values() for name in names}))
+    links = {
+        (pk, tag_ids[name])
+        for pk, names in names_by_news.items() for name in names if name in tag_ids
+    }
+    content_type = ContentType.objects.get_for_model(RawNews)
+    links.update(ContentTagRelation.objects.filter(
+        content_type=content_type, object_id__in=list(names_by_news),
+    ).values_list('object_id', 'tag_id'))
+    return links
+
+
+def sync_news_tags(news_items):
+    """同步一批 RawNews 的标签关联，返回 (新增数, 删除数)"""
+    news_items = list(news_items)
+    if not news_items:
+        return 0, 0
+    desired = desired_links(news_items)
+    existing = set(RawNewsTag.objects.filter(
+        news_id__in=[news.pk for news in news_items],
+    ).values_list('news_id', 'tag_id'))
+    stale = existing - desired
+    if stale:
+        condition = Q()
+        for news_id, tag_id in stale:
+            condition |= Q(news_id=news_id, tag_id=tag_id)
+        RawNewsTag.objects.filter(condition).delete()
+    created = desired - existing
+    RawNewsTag.objects.bulk_create(
+        [RawNewsTag(news_id=news_id, tag_id=tag_id) for news_id, tag_id in created],
+        batch_size=500, ignore_conflicts=True,
+    )
+    if created or stale:
+        # 标签关联属于 RawNews 的一部分，变化时同样使响应缓存与分页总数缓存失效
+        bump_model_version('rawnews')
+        # 搜索索引段内保存了每个文档的标签ID，关联变化的内容重新索引(见 search_updates.py)
+        SearchIndexUpdate.objects.bulk_create(
+            [SearchIndexUpdate(news_id=news_id) for news_id in sorted({news_id for news_id, _ in created | stale})]
+        )
+    return len(created), len(stale)
+
+
+def sync_news_tags_by_id(news_id):
+    news = RawNews.objects.filter(pk=news_id).only('id', 'tags').first()
+    if news:
+        sync_news_tags([news])
+
+
+def backfill_news_tags(queryset=None, batch_size=TAG_BACKFILL_BATCH_SIZE):
+    """按主键分批同步标签关联，返回处理的内容数"""
+    queryset = (RawNews.objects.all() if queryset is None else queryset).only('id', 'tags').order_by('id')
+    processed, last_id = 0, 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return processed
+        sync_news_tags(batch)
+        processed += len(batch)
+        last_id = batch[-1].pk
+
+
+def news_tag_links(news_ids, batch_size=TAG_LOOKUP_BATCH_SIZE):
+    """news_ids 中内容的 (news_id, tag_id) 关联，按ID分批查询"""
+    news_ids = sorted(news_ids)
+    for start in range(0, len(news_ids), batch_size):
+        yield from RawNewsTag.objects.filter(
+            news_id__in=news_ids[start:start + batch_size],
+        ).values_list('news_id', 'tag_id')
+
+
+def get_active_tag_names():
+    """启用标签 {ID: 名称}，按 ContentTag 版本号缓存"""
+    key = ACTIVE_TAGS_KEY % get_model_versions(['contenttag'])[0]
+    names = cache.get(key)
+    if names is None:
+        with primary_reads():
+            names = dict(ContentTag.objects.filter(is_active=True).values_list('id', 'name'))
+        cache.set(key, names, None)
+    return names
+
+
+def raw_delete_news(queryset):
+    """
+    批量删除合成数据：先删标签关联再删内容，各为一条 DELETE ... WHERE ... IN (子查询)，
+    不逐行收集级联、不触发 RawNews 的信号；调用方负责使相关缓存失效
+    """
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    ids_sql, params = queryset.values('pk').query.get_compiler(queryset.db).as_sql()
+    with transaction.atomic(using=queryset.db), connection.cursor() as cursor:
+        cursor.execute('DELETE FROM %s WHERE %s IN (%s)' % (
+            quote(RawNewsTag._meta.db_table), quote(RawNewsTag._meta.get_field('news').column), ids_sql,
+        ), params)
+        cursor.execute('DELETE FROM %s WHERE %s IN (%s)' % (
+            quote(RawNews._meta.db_table), quote(RawNews._meta.pk.column), ids_sql,
+        ), params)
+        return cursor.rowcount
+
+
+def filter_by_tag(queryset, name):
+    """按标签名筛选 RawNews：ContentTag.name 唯一索引 -> (tag, news) 索引"""
+    return queryset.filter(tag_links__tag__name=name)
@@ -1,7 +1,44 @@
-from django.test import TestCase, Client
+from django.test import TestCase, SimpleTestCase, TransactionTestCase, Client, RequestFactory, override_settings
+from django.http import HttpResponse
 from django.urls import reverse
 from django.contrib.auth import get_user_model
-from .models import ContentTag
+from django.utils import timezone
+from django.db import connection, connections
+from django.core.cache import cache
+from django.core.management import call_command
+from unittest import mock
+from django.test.utils import CaptureQueriesContext
+from .models import AudioContent, ContentTag, ContentTagRelation, MediaTextPosting, MediaTextSegment, RawNews, RawNewsTag, SearchIndexState, SearchIndexUpdate, SearchSegment, VideoContent, NewsCategory
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F
+from io import StringIO
+from .checks import check_shared_cache
+from .feeds import feed_cache_key
+from .response_cache import get_response_cache_stats
+from .query_plans import check_feed_query_plans, plan_problems
+from .renderers import FastJSONRenderer
+from .search_index import IndexVersionHolder, get_index_version, matched_rows, search_ids
+from django.core.cache.backends.locmem import LocMemCache
+from .search_cache import SearchResultCache, popular_precomputer, search_query_log, search_result_cache
+from .search_updates import (
+    INDEX_LOCK_TIMEOUT, IndexBusy, IndexLockLost, acquire_index_lock, apply_pending_updates, index_freshness, index_lock,
+    iter_shards, rebuild_search_index,
+)
+from .search_text import query_terms, tokenize
+from .tagging import raw_delete_news
+from .suggestions import pinyin_syllable, suggestion_index
+from .media_text import parse_subtitles, parse_timed_text
+from .search_benchmark import SearchBenchmark, compare_reports, percentile
+from .search_corpus import SearchCorpus
+from server.db_routing import PrimaryReplicaRouter, ReplicaRoutingMiddleware, STICKY_COOKIE_NAME
+import time
+import datetime
+from array import array
+import gzip
+import json
+import os
+import tempfile
+from rest_framework.test import APIClient
 
 class ContentTagAPITest(TestCase):
     def setUp(self):
@@ -56,4 +93,1066 @@ class ContentStatsAPITest(TestCase):
     def test_stats_success(self):
         self.client.force_login(self.user)
         response = self.client.get('/content/1/stats?content_type=rawnews')
-        self.assertIn(response.status_code, [200, 404]) 
\ No newline at end of file
+        self.assertIn(response.status_code, [200, 404]) 
+class ContentCursorPaginationTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        now = timezone.now()
+        for i in range(7):
+            RawNews.objects.create(
+                title=f'新闻{i}', content='内容', source_url=f'https://example.com/news/{i}',
+                published_at=now - datetime.timedelta(hours=i % 3), is_processed=True,
+                importance_score=None if i % 4 == 0 else i,
+            )
+    def collect(self, url, **params):
+        ids, cursor = [], ''
+        while True:
+            response = self.client.get(url, dict(params, cursor=cursor, page_size=2))
+            self.assertEqual(response.status_code, 200)
+            data = response.json()['data']
+            ids.extend(item['id'] for item in data['results'])
+            self.assertNotIn('total', data['pagination'])
+            cursor = data['pagination']['next_cursor']
+            if not data['pagination']['has_next']:
+                self.assertIsNone(cursor)
+                return ids
+    def test_cursor_walks_all_items_in_order(self):
+        ids = self.collect('/content/recommend')
+        expected = list(RawNews.objects.order_by('-published_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+    def test_cursor_with_nullable_sort_field(self):
+        ids = self.collect('/content/recommend', sort='hot')
+        expected = RawNews.objects.order_by(F('importance_score').desc(nulls_last=True), '-id')
+        self.assertEqual(ids, list(expected.values_list('id', flat=True)))
+    def test_feed_indexes_put_nulls_last(self):
+        index = next(i for i in RawNews._meta.indexes if i.fields == ['is_processed', '-importance_score', '-id'])
+        self.assertEqual(index.clone().nulls_last, ('importance_score',))
+        editor = connection.schema_editor(collect_sql=True)
+        sql = str(index.create_sql(RawNews, editor))
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            pg_sql = str(index.create_sql(RawNews, editor))
+        self.assertNotIn('NULLS LAST', sql)
+        self.assertIn('"importance_score" DESC NULLS LAST, "id" DESC', pg_sql)
+    def test_new_items_do_not_shift_pages(self):
+        first = self.client.get('/content/public', {'cursor': '', 'page_size': 3}).json()['data']
+        RawNews.objects.create(title='插入', content='内容', source_url='https://example.com/news/new',
+                               published_at=timezone.now(), is_processed=True)
+        second = self.client.get('/content/public', {'cursor': first['pagination']['next_cursor'], 'page_size': 3}).json()['data']
+        first_ids = {item['id'] for item in first['results']}
+        self.assertFalse(first_ids & {item['id'] for item in second['results']})
+    def test_invalid_cursor(self):
+        response = self.client.get('/content/search', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+    def test_page_number_mode_unchanged(self):
+        data = self.client.get('/content/recommend', {'page_size': 2}).json()['data']
+        self.assertEqual(data['pagination']['total'], 7)
+        self.assertEqual(len(data['results']), 2)
+
+class RawNewsVideoBatchTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        now = timezone.now()
+        for i in range(12):
+            url = f'https://example.com/video/{i}'
+            RawNews.objects.create(title=f'视频{i}', content='内容', type='video', source_url=url,
+                                   published_at=now - datetime.timedelta(minutes=i), is_processed=True)
+            VideoContent.objects.create(title=f'视频{i}', source_url=url, video_url=f'{url}.mp4', duration=60)
+    def test_query_count_constant_per_page(self):
+        counts = []
+        for page_size in (2, 10):
+            cache.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get('/content/public', {'type': 'video', 'page_size': page_size})
+            counts.append(len(ctx.captured_queries))
+            results = response.json()['data']['results']
+            self.assertEqual(len(results), page_size)
+            for item in results:
+                self.assertEqual(item['video_content']['source_url'], item['source_url'])
+        self.assertEqual(counts[0], counts[1])
+        self.assertLessEqual(counts[0], 4)
+    def test_trending_resolves_videos_in_one_query(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/content/trending', {'limit': 12})
+        self.assertEqual(len(response.json()['data']['results']), 12)
+    def test_detail_still_resolves_video(self):
+        news = RawNews.objects.first()
+        data = self.client.get(f'/content/{news.id}').json()['data']
+        self.assertEqual(data['video_content']['source_url'], news.source_url)
+
+class RawNewsCardProjectionTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        self.news = RawNews.objects.create(title='卡片', content='很长的正文' * 100, summary='摘要',
+                                           source_url='https://example.com/card', keywords=['关键词'],
+                                           published_at=timezone.now(), is_processed=True, importance_score=0.5)
+    def test_list_returns_card_fields_without_loading_content(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/content/recommend')
+        item = response.json()['data']['results'][0]
+        self.assertEqual(item['title'], '卡片')
+        for name in ('content', 'keywords', 'image_urls', 'importance_score'):
+            self.assertNotIn(name, item)
+        select = [q['sql'] for q in ctx.captured_queries if 'LIMIT' in q['sql']][0]
+        self.assertNotIn('"content"', select)
+    def test_sparse_fieldset(self):
+        for url in ('/content/public', '/content/trending'):
+            item = self.client.get(url, {'fields': 'id,title,importance_score,unknown'}).json()['data']['results'][0]
+            self.assertEqual(set(item), {'id', 'title', 'importance_score'})
+    def test_detail_returns_full_content(self):
+        data = self.client.get(f'/content/{self.news.id}').json()['data']
+        self.assertEqual(data['content'], self.news.content)
+
+class MaterializedFeedTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        self.category = NewsCategory.objects.create(name='科技', slug='tech')
+        now = timezone.now()
+        for i in range(6):
+            RawNews.objects.create(title=f'新闻{i}', content='内容', source_url=f'https://example.com/feed/{i}',
+                                   published_at=now - datetime.timedelta(hours=i), is_processed=True,
+                                   category=self.category, importance_score=i % 3)
+    def get_ids(self, params):
+        data = self.client.get('/content/recommend', params).json()['data']
+        return [item['id'] for item in data['results']], data['pagination']['total']
+    def expected(self, order_field):
+        return list(RawNews.objects.filter(is_processed=True).order_by(
+            F(order_field).desc(nulls_last=True), '-id').values_list('id', flat=True))
+    def test_pages_served_from_materialized_list(self):
+        self.get_ids({'page_size': 2})
+        with self.assertNumQueries(1):
+            ids, total = self.get_ids({'page_size': 2, 'page': 2})
+        self.assertEqual(ids, self.expected('published_at')[2:4])
+        self.assertEqual(total, 6)
+    def test_incremental_maintenance(self):
+        self.get_ids({'sort': 'hot', 'category_id': self.category.id})
+        news = RawNews.objects.create(title='最新', content='内容', source_url='https://example.com/feed/new',
+                                      published_at=timezone.now(), is_processed=True, category=self.category,
+                                      importance_score=5)
+        ids, total = self.get_ids({'sort': 'hot', 'category_id': self.category.id})
+        self.assertEqual(ids[0], news.id)
+        self.assertEqual(total, 7)
+        news.is_processed = False
+        news.save()
+        ids, total = self.get_ids({'sort': 'hot', 'category_id': self.category.id})
+        self.assertNotIn(news.id, ids)
+        self.assertEqual(ids, self.expected('importance_score'))
+        RawNews.objects.filter(pk=ids[0]).delete()
+        self.assertEqual(self.get_ids({'sort': 'hot'})[1], 5)
+    def test_save_touches_only_owning_lists(self):
+        other = NewsCategory.objects.create(name='体育', slug='sports')
+        self.get_ids({'category_id': self.category.id})
+        self.get_ids({'category_id': other.id})
+        with mock.patch('apps.content.feeds.cache.set', wraps=cache.set) as cache_set:
+            RawNews.objects.create(title='最新', content='内容', source_url='https://example.com/feed/new',
+                                   published_at=timezone.now(), is_processed=True, category=self.category)
+        keys = [call.args[0] for call in cache_set.call_args_list if call.args[0].startswith('content:feed:')]
+        self.assertEqual(keys, [feed_cache_key((True, self.category.id, None, 'published_at'))])
+        self.assertEqual(self.get_ids({'category_id': other.id})[1], 0)
+    def test_locked_list_is_dropped_and_rebuilt(self):
+        self.get_ids({})
+        key = feed_cache_key((True, None, None, 'published_at'))
+        cache.add(key + ':lock', 1, 60)
+        with mock.patch('apps.content.feeds.FEED_LOCK_TIMEOUT', 0.01):
+            news = RawNews.objects.create(title='最新', content='内容', source_url='https://example.com/feed/new',
+                                          published_at=timezone.now(), is_processed=True)
+        self.assertIsNone(cache.get(key))
+        ids, total = self.get_ids({})
+        self.assertEqual((ids[0], total), (news.id, 7))
+    def test_truncated_list_falls_back_to_database(self):
+        with mock.patch('apps.content.feeds.FEED_LIST_MAX_SIZE', 3):
+            call_command('rebuild_feed_lists', stdout=StringIO())
+            ids, total = self.get_ids({'page_size': 2, 'page': 3})
+        self.assertEqual(ids, self.expected('published_at')[4:6])
+        self.assertEqual(total, 6)
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        self.category = NewsCategory.objects.create(name='科技', slug='tech')
+        self.news = RawNews.objects.create(title='新闻', content='内容', source_url='https://example.com/etag',
+                                           published_at=timezone.now(), is_processed=True)
+    def assert_revalidates(self, url, touch):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+        touch()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+    def test_detail(self):
+        def touch():
+            self.news.title = '新标题'
+            self.news.save()
+        self.assert_revalidates(f'/content/{self.news.id}', touch)
+    def test_categories(self):
+        self.assert_revalidates('/categories', lambda: NewsCategory.objects.create(name='体育', slug='sports'))
+    def test_public_feed(self):
+        def touch():
+            RawNews.objects.create(title='新增', content='内容', source_url='https://example.com/etag/2',
+                                   published_at=timezone.now(), is_processed=True)
+        self.assert_revalidates('/content/public', touch)
+    def test_etag_varies_with_query(self):
+        first = self.client.get('/content/public', {'page_size': 1})['ETag']
+        self.assertNotEqual(first, self.client.get('/content/public', {'page_size': 2})['ETag'])
+
+class ResponseCacheTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        self.news = RawNews.objects.create(title='人工智能新闻', content='内容', source_url='https://example.com/cache',
+                                           published_at=timezone.now(), is_processed=True, tags=['人工智能'])
+    def test_hit_and_invalidation_on_write(self):
+        first = self.client.get('/content/trending').json()
+        with self.assertNumQueries(0):
+            second = self.client.get('/content/trending').json()
+        self.assertEqual(first['data'], second['data'])
+        self.news.title = '更新后的标题'
+        self.news.save()
+        third = self.client.get('/content/trending').json()
+        self.assertEqual(third['data']['results'][0]['title'], '更新后的标题')
+        stats = get_response_cache_stats()['ContentTrendingView']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+    def test_normalized_query_params(self):
+        self.client.get('/search/suggestions', {'q': '人工', 'limit': 5})
+        with self.assertNumQueries(0):
+            self.client.get('/search/suggestions?limit=5&q=%E4%BA%BA%E5%B7%A5')
+        ContentTag.objects.create(name='人工', slug='rengong')
+        with self.assertNumQueries(2):
+            self.client.get('/search/suggestions', {'q': '人工', 'limit': 5})
+    def test_category_write_invalidates(self):
+        self.assertEqual(self.client.get('/categories').json()['data'], [])
+        NewsCategory.objects.create(name='科技', slug='tech')
+        self.assertEqual(len(self.client.get('/categories').json()['data']), 1)
+    def test_process_local_cache_warned_in_production(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379/1'}}
+        with override_settings(DEBUG=False, CACHES=locmem):
+            self.assertEqual([message.id for message in check_shared_cache(None)], ['content.W001'])
+        with override_settings(DEBUG=False, CACHES=redis):
+            self.assertEqual(check_shared_cache(None), [])
+    def test_stats_requires_admin(self):
+        self.assertEqual(self.client.get('/content/cache/stats').status_code, 401)
+
+class FeedQueryPlanTest(TestCase):
+    def test_feed_queries_use_indexes(self):
+        for name, plan, problems in check_feed_query_plans():
+            self.assertEqual(problems, [], f'{name}\n{plan}')
+    def test_detects_table_scan_and_temp_sort(self):
+        plan = RawNews.objects.filter(title__icontains='新闻').order_by('-crawled_at').explain()
+        self.assertTrue(plan_problems(plan))
+
+class TrendingHotnessTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        now = timezone.now()
+        self.fresh = RawNews.objects.create(title='新发布', content='内容', source_url='https://example.com/h1',
+                                            published_at=now - datetime.timedelta(hours=1), importance_score=0.2, is_processed=True)
+        self.important = RawNews.objects.create(title='重要但较早', content='内容', source_url='https://example.com/h2',
+                                                published_at=now - datetime.timedelta(hours=20), importance_score=0.9, is_processed=True)
+        self.old = RawNews.objects.create(title='三天前', content='内容', source_url='https://example.com/h3',
+                                          published_at=now - datetime.timedelta(days=3), importance_score=1, is_processed=True)
+    def titles(self, **params):
+        return [item['title'] for item in self.client.get('/content/trending', params).json()['data']['results']]
+    def test_hotness_decays_with_age(self):
+        self.assertGreater(self.fresh.hotness_score, self.important.hotness_score)
+        self.assertEqual([self.fresh.age_bucket, self.important.age_bucket, self.old.age_bucket], [0, 0, 1])
+        self.assertEqual(self.titles(period='day'), ['新发布', '重要但较早'])
+        self.assertEqual(self.titles(period='week'), ['新发布', '重要但较早', '三天前'])
+    def test_recompute_command_moves_buckets(self):
+        RawNews.objects.filter(pk=self.important.pk).update(published_at=timezone.now() - datetime.timedelta(days=2))
+        call_command('recompute_hotness', stdout=StringIO())
+        self.important.refresh_from_db()
+        self.assertEqual(self.important.age_bucket, 1)
+        self.assertEqual(self.titles(period='day'), ['新发布'])
+    def test_stale_bucket_filtered_by_window(self):
+        RawNews.objects.filter(pk=self.important.pk).update(published_at=timezone.now() - datetime.timedelta(days=2))
+        self.assertEqual(self.titles(period='day'), ['新发布'])
+    def test_stale_rows_do_not_shrink_page(self):
+        RawNews.objects.filter(pk=self.important.pk).update(published_at=timezone.now() - datetime.timedelta(days=2),
+                                                            hotness_score=100)
+        self.assertEqual(self.titles(period='day', limit=1), ['新发布'])
+    def test_sparse_fields_keep_published_at_loaded(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/content/trending', {'period': 'day', 'fields': 'id,title'})
+        self.assertEqual(len(response.json()['data']['results']), 2)
+    def test_recompute_recent_days_also_fixes_stale_buckets(self):
+        RawNews.objects.filter(pk=self.important.pk).update(published_at=timezone.now() - datetime.timedelta(days=3))
+        call_command('recompute_hotness', '--days', '1', stdout=StringIO())
+        self.important.refresh_from_db()
+        self.assertEqual(self.important.age_bucket, 1)
+
+class RawNewsTagIndexTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        now = timezone.now()
+        self.ai = RawNews.objects.create(title='AI新闻', content='内容', source_url='https://example.com/t1',
+                                         published_at=now, is_processed=True, tags=['AI', '科技'])
+        self.sport = RawNews.objects.create(title='体育新闻', content='内容', source_url='https://example.com/t2',
+                                            published_at=now, is_processed=True, tags=['体育'])
+    def titles(self, url, **params):
+        return [item['title'] for item in self.client.get(url, params).json()['data']['results']]
+    def test_tag_filter_uses_join_table(self):
+        self.assertEqual(RawNewsTag.objects.filter(news=self.ai).count(), 2)
+        self.assertTrue(ContentTag.objects.get(name='科技').is_auto_generated)
+        self.assertEqual(self.titles('/content/recommend', tag='AI'), ['AI新闻'])
+        self.assertEqual(self.titles('/content/search', q='新闻', tag='体育'), ['体育新闻'])
+        self.assertEqual(self.titles('/content/recommend', tag='不存在'), [])
+    def test_tags_update_and_relation_sync(self):
+        self.ai.tags = ['科技']
+        self.ai.save()
+        self.assertEqual(self.titles('/content/recommend', tag='AI'), [])
+        tag = ContentTag.objects.get(name='AI')
+        relation = ContentTagRelation.objects.create(content_type=ContentType.objects.get_for_model(RawNews),
+                                                     object_id=self.sport.pk, tag=tag)
+        self.assertEqual(self.titles('/content/recommend', tag='AI'), ['体育新闻'])
+        relation.delete()
+        self.assertEqual(self.titles('/content/recommend', tag='AI'), [])
+    def test_backfill_command(self):
+        RawNewsTag.objects.all().delete()
+        call_command('backfill_news_tags', stdout=StringIO())
+        self.assertEqual(RawNewsTag.objects.count(), 3)
+    def test_auto_created_tags_hidden_until_activated(self):
+        self.assertFalse(ContentTag.objects.get(name='AI').is_active)
+        names = [tag['name'] for tag in self.client.get('/content/tags').json()]
+        self.assertNotIn('AI', names)
+        self.assertEqual(self.titles('/content/recommend', tag='AI'), ['AI新闻'])
+    def test_migration_backfills_links(self):
+        from django.apps import apps
+        from importlib import import_module
+        RawNewsTag.objects.all().delete()
+        ContentTag.objects.all().delete()
+        import_module('apps.content.migrations.0015_backfill_rawnews_tags').backfill_rawnews_tags(apps, None)
+        self.assertEqual(RawNewsTag.objects.count(), 3)
+        self.assertEqual(self.titles('/content/recommend', tag='体育'), ['体育新闻'])
+    def test_raw_delete_skips_signals(self):
+        with mock.patch('apps.content.signals.enqueue_updates') as enqueue:
+            deleted = raw_delete_news(RawNews.objects.filter(source_url__startswith='https://example.com/t'))
+        self.assertEqual((deleted, RawNews.objects.count(), RawNewsTag.objects.count()), (2, 0, 0))
+        enqueue.assert_not_called()
+
+class CategoryTreeTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        self.tech = NewsCategory.objects.create(name='科技', slug='tech', sort_order=1)
+        self.ai = NewsCategory.objects.create(name='人工智能', slug='ai', parent=self.tech)
+        self.llm = NewsCategory.objects.create(name='大模型', slug='llm', parent=self.ai)
+        NewsCategory.objects.create(name='已停用', slug='off', parent=self.tech, is_active=False)
+        NewsCategory.objects.create(name='体育', slug='sport', sort_order=2)
+    def test_tree_built_in_one_query(self):
+        with self.assertNumQueries(2):  # 条件GET指纹 + 分类树
+            data = self.client.get('/categories').json()['data']
+        self.assertEqual([item['name'] for item in data], ['科技', '体育'])
+        self.assertEqual(data[0]['children'][0]['name'], '人工智能')
+        self.assertEqual(data[0]['children'][0]['children'][0]['name'], '大模型')
+        self.assertEqual(len(data[0]['children']), 1)
+        self.assertEqual(set(data[1]), {'id', 'name', 'name_en', 'description', 'icon_url', 'color_code', 'children'})
+    def test_full_name_from_cached_tree(self):
+        self.llm.get_full_name()
+        with self.assertNumQueries(0):
+            self.assertEqual(NewsCategory(name='x', parent_id=self.llm.pk).get_full_name(), '科技 > 人工智能 > 大模型 > x')
+    def test_invalidated_on_save_and_delete(self):
+        self.client.get('/categories')
+        self.tech.name = '科学技术'
+        self.tech.save()
+        self.assertEqual(self.llm.get_full_name(), '科学技术 > 人工智能 > 大模型')
+        self.ai.delete()
+        self.assertEqual(self.client.get('/categories').json()['data'][0]['children'], [])
+
+class ContentBatchTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        now = timezone.now()
+        self.items = [RawNews.objects.create(title=f'内容{i}', content='正文', source_url=f'https://example.com/b{i}',
+                                             type='video' if i % 2 else 'article', published_at=now, is_processed=True)
+                      for i in range(3)]
+        VideoContent.objects.create(title='视频', source_url=self.items[1].source_url, video_url='https://example.com/v.mp4', duration=30)
+    def test_order_missing_and_detail_shape(self):
+        ids = [self.items[2].pk, 999999, self.items[0].pk, self.items[1].pk, self.items[2].pk]
+        with self.assertNumQueries(2):
+            data = self.client.get('/content/batch', {'ids': ','.join(map(str, ids))}).json()['data']
+        self.assertEqual([item['id'] for item in data['results']], [self.items[2].pk, self.items[0].pk, self.items[1].pk])
+        self.assertEqual(data['missing'], [999999])
+        detail = self.client.get(f'/content/{self.items[1].pk}').json()['data']
+        self.assertEqual(data['results'][2], detail)
+    def test_invalid_ids(self):
+        self.assertEqual(self.client.get('/content/batch', {'ids': '1,abc'}).status_code, 400)
+        for ids in ('0', '-1', str(2 ** 63), '9' * 40):
+            self.assertEqual(self.client.get('/content/batch', {'ids': ids}).status_code, 400)
+        self.assertEqual(self.client.get('/content/batch').status_code, 400)
+        self.assertEqual(self.client.get('/content/batch', {'ids': ','.join(map(str, range(1, 202)))}).status_code, 400)
+
+class ContentExportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        for i in range(5):
+            RawNews.objects.create(title=f'导出{i}', content='正文', source_url=f'https://example.com/e{i}',
+                                   published_at=now, importance_score=0.5, is_processed=True, tags=['AI'])
+        RawNews.objects.filter(title='导出0').update(updated_at=now - datetime.timedelta(days=3))
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user('admin', password='x', is_staff=True))
+    def read(self, response):
+        body = b''.join(response.streaming_content)
+        if response.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return [json.loads(line) for line in body.decode().splitlines()]
+    def test_stream_and_since(self):
+        rows = self.read(self.client.get('/content/export'))
+        self.assertEqual(rows[0]['title'], '导出0')
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[1]['importance_score'], '0.50')
+        since = (timezone.now() - datetime.timedelta(days=1)).isoformat()
+        self.assertEqual(len(self.read(self.client.get('/content/export', {'since': since}))), 4)
+        self.assertEqual(self.client.get('/content/export', {'since': 'bad'}).status_code, 400)
+        self.assertEqual(self.client.get('/content/export', {'since': '2025-13-45T00:00:00'}).status_code, 400)
+    def test_gzip_and_admin_only(self):
+        response = self.client.get('/content/export', {'gzip': 1})
+        self.assertEqual(len(self.read(response)), 5)
+        self.assertEqual(APIClient().get('/content/export').status_code, 401)
+    def test_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'rawnews.ndjson.gz')
+            call_command('export_rawnews', output=path, gzip=True, chunk_size=2, stderr=StringIO())
+            with gzip.open(path, 'rt') as f:
+                self.assertEqual(len(f.readlines()), 5)
+
+class FastJSONRendererTest(TestCase):
+    def test_matches_drf_renderer(self):
+        from decimal import Decimal
+        import uuid
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+        data = {"success": True, "data": {"results": [{
+            "when": timezone.now(), "day": datetime.date(2025, 7, 1), "score": Decimal('0.55'),
+            "uid": uuid.uuid4(), "label": gettext_lazy('标签'), "text": '行\u2028分隔', 1: None,
+        }]}}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(data, 'application/json; indent=2'),
+                         JSONRenderer().render(data, 'application/json; indent=2'))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+    def test_used_by_default(self):
+        cache.clear()
+        response = Client().get('/content/trending')
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+
+class FeedCountCacheTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        for i in range(5):
+            RawNews.objects.create(title=f'计数新闻{i}', content='内容', source_url=f'https://example.com/c{i}',
+                                   published_at=timezone.now() - datetime.timedelta(minutes=i), is_processed=True)
+    def fetch(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            pagination = self.client.get('/content/search', dict(q='计数', page_size=2, **params)).json()['data']['pagination']
+        counts = [q['sql'] for q in ctx.captured_queries if 'COUNT(' in q['sql'].upper()]
+        return pagination, len(counts)
+    def test_count_cached_per_filter(self):
+        pagination, counts = self.fetch()
+        self.assertEqual((pagination['total'], pagination['total_exact'], counts), (5, True, 1))
+        pagination, counts = self.fetch(page=2)
+        self.assertEqual((pagination['total'], pagination['total_exact'], counts), (5, True, 0))
+        self.assertEqual(self.fetch(type='video')[0]['total'], 0)
+    def test_stale_count_refreshed(self):
+        self.fetch()
+        RawNews.objects.create(title='计数新闻new', content='内容', source_url='https://example.com/cn',
+                               published_at=timezone.now(), is_processed=True)
+        pagination, _ = self.fetch(page=3)
+        self.assertEqual((pagination['total'], pagination['total_exact'], pagination['has_next']), (5, False, False))
+        pagination, counts = self.fetch(page=3)
+        self.assertEqual((pagination['total'], pagination['total_exact'], counts), (6, True, 0))
+    def test_estimate_mode(self):
+        with mock.patch('apps.content.counts.COUNT_ESTIMATE_CAP', 3):
+            pagination, _ = self.fetch(count='estimate', page=3)
+        self.assertEqual((pagination['total'], pagination['total_exact'], pagination['has_next']), (3, False, False))
+        self.assertEqual(self.fetch(count='estimate')[0], dict(pagination, page=1, has_next=True, has_previous=False, total=5, total_pages=3, total_exact=True))
+        self.assertEqual(self.fetch(count='exact')[1], 1)
+
+@override_settings(REPLICA_DATABASES=['replica'], REPLICA_STICKY_SECONDS=10)
+class ReplicaRoutingTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+    def run_request(self, request, write=False, user=None):
+        seen = {}
+        def view(request):
+            if user is not None:
+                request.user = user  # 模拟DRF认证后回写用户
+            seen['before'] = self.router.db_for_read(RawNews)
+            if write:
+                self.router.db_for_write(RawNews)
+            seen['after'] = self.router.db_for_read(RawNews)
+            return HttpResponse()
+        response = ReplicaRoutingMiddleware(view)(request)
+        return seen, response
+    def test_safe_methods_read_replica(self):
+        self.assertEqual(self.run_request(self.factory.get('/'))[0], {'before': 'replica', 'after': 'replica'})
+        self.assertEqual(self.run_request(self.factory.post('/'))[0]['before'], 'default')
+        self.assertEqual(self.router.db_for_read(RawNews), 'default')  # 请求之外
+        self.assertEqual(self.router.db_for_write(RawNews), 'default')
+    def test_read_your_writes(self):
+        seen, response = self.run_request(self.factory.get('/'), write=True)
+        self.assertEqual(seen, {'before': 'replica', 'after': 'default'})
+        cookie = response.cookies[STICKY_COOKIE_NAME]
+        self.assertEqual(cookie['max-age'], 10)
+        request = self.factory.get('/')
+        request.COOKIES[STICKY_COOKIE_NAME] = cookie.value
+        self.assertEqual(self.run_request(request)[0]['before'], 'default')
+    def test_sticky_by_user_without_cookie(self):
+        user = mock.Mock(is_authenticated=True, pk=7)
+        self.run_request(self.factory.post('/'), write=True, user=user)
+        self.assertEqual(self.run_request(self.factory.get('/'), user=user)[0]['after'], 'default')
+        other = mock.Mock(is_authenticated=True, pk=8)
+        self.assertEqual(self.run_request(self.factory.get('/'), user=other)[0]['after'], 'replica')
+        with mock.patch('server.db_routing.time.time', return_value=time.time() + 11):
+            self.assertEqual(self.run_request(self.factory.get('/'), user=user)[0]['after'], 'replica')
+
+@override_settings(REPLICA_DATABASES=['replica'], REPLICA_STICKY_SECONDS=10)
+class ReplicaCacheFillTest(TransactionTestCase):
+    """副本库为独立的内存库，数据落后于主库：填充缓存的读取应走主库"""
+    def setUp(self):
+        cache.clear()
+        default = connections['default']
+        connections['replica'] = type(default)(dict(default.settings_dict, NAME=':memory:'), alias='replica')
+        # 只建用到的表；外键指向的表不存在，关闭外键检查并直接执行建表语句
+        connections['replica'].disable_constraint_checking()
+        editor = connections['replica'].schema_editor()
+        with connections['replica'].cursor() as cursor:
+            for model in (RawNews, VideoContent):
+                cursor.execute(*editor.table_sql(model))
+        now = timezone.now()
+        self.news = RawNews.objects.create(title='新标题', content='内容', source_url='https://example.com/r',
+                                           published_at=now, is_processed=True)
+        RawNews.objects.using('replica').bulk_create([RawNews(
+            id=self.news.pk, title='旧标题', content='内容', source_url='https://example.com/r',
+            published_at=now, is_processed=True,
+        )])
+    def tearDown(self):
+        connections['replica'].close()
+        del connections['replica']
+    def title(self, path, **params):
+        data = self.client.get(path, params).json()['data']
+        return data['results'][0]['title'] if 'results' in data else data['title']
+    def test_lagged_replica_not_cached(self):
+        self.assertEqual(self.title(f'/content/{self.news.pk}'), '旧标题')  # 不缓存的读取仍走副本
+        self.assertEqual(self.title('/content/batch', ids=self.news.pk), '新标题')
+        RawNews.objects.using('replica').update(title='新标题')
+        RawNews.objects.filter(pk=self.news.pk).update(title='更新后')  # 不触发信号，缓存版本号不变
+        self.assertEqual(self.title('/content/batch', ids=self.news.pk), '新标题')
+        self.assertEqual(self.title('/content/public'), '更新后')
+
+class FeedSnapshotTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        now = timezone.now()
+        for i in range(5):
+            RawNews.objects.create(title=f'快照{i}', content='内容', source_url=f'https://example.com/s{i}',
+                                   published_at=now - datetime.timedelta(minutes=i), is_processed=True)
+    def page(self, **params):
+        return self.client.get('/content/recommend', dict(page_size=2, **params)).json()['data']
+    def test_pages_stable_after_insert(self):
+        first = self.page(snapshot=1)
+        token = first['pagination']['snapshot']
+        self.assertEqual([item['title'] for item in first['results']], ['快照0', '快照1'])
+        RawNews.objects.create(title='新内容', content='内容', source_url='https://example.com/snew',
+                               published_at=timezone.now(), is_processed=True)
+        with self.assertNumQueries(1):
+            second = self.page(snapshot=token, page=2)
+        self.assertEqual([item['title'] for item in second['results']], ['快照2', '快照3'])
+        self.assertEqual((second['pagination']['total'], second['pagination']['snapshot']), (5, token))
+        self.assertEqual([item['title'] for item in self.page(page=2)['results']], ['快照1', '快照2'])
+    def test_pages_past_truncated_snapshot(self):
+        with mock.patch('apps.content.snapshots.SNAPSHOT_MAX_SIZE', 3):
+            first = self.page(snapshot=1)
+            token = first['pagination']['snapshot']
+            RawNews.objects.create(title='新内容', content='内容', source_url='https://example.com/snew',
+                                   published_at=timezone.now(), is_processed=True)
+            pages = [self.page(snapshot=token, page=page) for page in (2, 3)]
+        titles = [item['title'] for page in [first] + pages for item in page['results']]
+        self.assertEqual(titles, [f'快照{i}' for i in range(5)])
+        self.assertEqual(pages[0]['pagination']['total'], 5)
+    def test_token_bound_to_query(self):
+        token = self.page(snapshot=1)['pagination']['snapshot']
+        self.assertEqual(self.client.get('/content/recommend', {'snapshot': token, 'type': 'video'}).status_code, 404)
+        self.assertEqual(self.client.get('/content/recommend', {'snapshot': 'expired'}).status_code, 404)
+
+class SearchIndexTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        now = timezone.now()
+        self.ai = RawNews.objects.create(title='人工智能芯片发布', content='新款AI芯片', summary='半导体', type='video',
+                                         source_url='https://example.com/si1', published_at=now, is_processed=True)
+        self.chip = RawNews.objects.create(title='芯片产业报告', content='人工智能带动需求', source_url='https://example.com/si2',
+                                           published_at=now - datetime.timedelta(hours=1), is_processed=True)
+        RawNews.objects.create(title='人工智能草稿', content='未处理', source_url='https://example.com/si3',
+                               published_at=now, is_processed=False)
+        self.assertEqual(rebuild_search_index(segment_size=2), (3, 2))
+    def tearDown(self):
+        cache.clear()
+    def titles(self, **params):
+        return [item['title'] for item in self.client.get('/content/search', params).json()['data']['results']]
+    def test_tokenize(self):
+        self.assertEqual(tokenize('人工智能 GPT-4'), ['人工', '工智', '智能', 'gpt', '4'])
+        self.assertEqual(query_terms('ＡＩ芯片'), ['ai', '芯片'])
+        self.assertIsNone(query_terms('芯'))
+    def test_search_across_fields_and_segments(self):
+        self.assertEqual(list(search_ids('人工智能', ordering='published_at')), [self.ai.pk, self.chip.pk])
+        self.assertEqual(list(search_ids('半导体')), [self.ai.pk])
+        self.assertEqual(list(search_ids('人工智能', content_type='video')), [self.ai.pk])
+        self.assertEqual(list(search_ids('不存在的词')), [])
+        self.assertEqual(self.titles(q='芯片 人工智能'), ['人工智能芯片发布', '芯片产业报告'])
+        # 事务内每次都从数据库读取索引版本号(缓存键 + 段列表各一次)，此外为倒排表 + 回表
+        with self.assertNumQueries(4):
+            self.assertEqual(self.titles(q='产业', page_size=1), ['芯片产业报告'])
+    def test_total_matches_results(self):
+        # 不再叠加 DRF SearchFilter：search 参数不会在索引结果之外再筛一次，总数与结果一致
+        data = self.client.get('/content/search', {'q': '人工智能', 'search': '产业'}).json()['data']
+        self.assertEqual((len(data['results']), data['pagination']['total']), (2, 2))
+    def test_falls_back_to_like(self):
+        self.assertEqual(self.titles(q='芯'), ['人工智能芯片发布', '芯片产业报告'])
+        RawNews.objects.create(title='未索引的芯片新闻', content='内容', source_url='https://example.com/si4',
+                               published_at=timezone.now() + datetime.timedelta(minutes=1), is_processed=True)
+        self.assertEqual(self.titles(q='芯片', cursor='')[0], '未索引的芯片新闻')
+        rebuild_search_index(RawNews.objects.none())
+        self.assertEqual(self.titles(q='产业'), ['芯片产业报告'])
+
+class SearchSuggestionsTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        now = timezone.now()
+        RawNews.objects.create(title='人工智能芯片发布', content='内容', source_url='https://example.com/sg1',
+                               published_at=now, is_processed=True)
+        RawNews.objects.create(title='新款 ＡＩ 手机', content='内容', source_url='https://example.com/sg2',
+                               published_at=now, is_processed=True)
+        ContentTag.objects.create(name='人工智能', slug='ai', synonyms=['AI', '机器智能'], popularity_score=5)
+    def suggest(self, q, limit=5):
+        return self.client.get('/search/suggestions', {'q': q, 'limit': limit}).json()['data']['suggestions']
+    def test_prefix_ranking_and_highlight(self):
+        self.assertEqual(self.suggest('人工'), [
+            {'text': '人工智能', 'type': 'tag', 'highlight': '<em>人工</em>智能'},
+            {'text': '人工智能芯片发布', 'type': 'title', 'highlight': '<em>人工</em>智能芯片发布'},
+        ])
+        self.assertEqual(self.suggest('ai', limit=2), [
+            {'text': '人工智能', 'type': 'tag', 'highlight': '人工智能（<em>AI</em>）'},
+            {'text': '新款 ＡＩ 手机', 'type': 'title', 'highlight': '新款 <em>ＡＩ</em> 手机'},
+        ])
+        self.assertEqual(self.suggest('智能芯'), [])
+        self.assertEqual(self.suggest('智能')[0]['highlight'], '人工<em>智能</em>')
+    def test_served_from_memory_and_refreshed(self):
+        self.suggest('人工')
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.suggest('人工智', limit=3)), 2)
+        base = suggestion_index.index.prefix
+        RawNews.objects.create(title='人工降雨', content='内容', source_url='https://example.com/sg3',
+                               published_at=timezone.now(), is_processed=True)
+        self.assertIn('人工降雨', [item['text'] for item in self.suggest('人工')])
+        tag = ContentTag.objects.get(name='人工智能')
+        tag.is_active = False
+        tag.save()
+        self.assertEqual({item['text'] for item in self.suggest('人工')}, {'人工智能芯片发布', '人工降雨'})
+        # 写入只重建增量层，基础索引保持不变
+        self.assertIs(suggestion_index.index.prefix, base)
+    def test_first_request_served_from_database(self):
+        suggestion_index.index = None
+        with mock.patch('apps.content.suggestions.connection') as conn, \
+                mock.patch('apps.content.suggestions.threading.Thread') as thread:
+            conn.in_atomic_block = False
+            self.assertEqual(self.suggest('人工'), [
+                {'text': '人工智能', 'type': 'tag', 'highlight': '<em>人工</em>智能'},
+                {'text': '人工智能芯片发布', 'type': 'title', 'highlight': '<em>人工</em>智能芯片发布'},
+            ])
+        # 索引在后台线程构建，请求不等待
+        self.assertIsNone(suggestion_index.index)
+        thread.return_value.start.assert_called_once()
+        suggestion_index.refreshing = False
+    def test_database_fallback_not_cached(self):
+        suggestion_index.index = None
+        with mock.patch('apps.content.suggestions.connection') as conn, \
+                mock.patch('apps.content.suggestions.threading.Thread'):
+            conn.in_atomic_block = False
+            self.assertEqual(self.suggest('rengong'), [])  # 数据库回退只做前缀匹配，不支持拼音
+        suggestion_index.refreshing = False
+        suggestion_index.rebuild()
+        self.assertEqual(self.suggest('rengong')[0]['text'], '人工智能')
+    def test_typo_tolerant(self):
+        RawNews.objects.create(title='Quantum Computing 突破', content='内容', source_url='https://example.com/sg4',
+                               published_at=timezone.now(), is_processed=True)
+        self.assertEqual(self.suggest('quamtum'), [
+            {'text': 'Quantum Computing 突破', 'type': 'title', 'highlight': '<em>Quantum</em> Computing 突破'},
+        ])
+        self.assertEqual(self.suggest('人攻智能')[0]['text'], '人工智能')
+        self.assertEqual(self.suggest('qz'), [])
+    def test_pinyin(self):
+        self.assertEqual(self.suggest('rengong'), [
+            {'text': '人工智能', 'type': 'tag', 'highlight': '<em>人工</em>智能'},
+            {'text': '人工智能芯片发布', 'type': 'title', 'highlight': '<em>人工</em>智能芯片发布'},
+        ])
+        self.assertEqual(self.suggest('rgzn', limit=1)[0]['highlight'], '<em>人工智能</em>')
+        self.assertEqual(self.suggest('rengongzhi')[1]['highlight'], '<em>人工智</em>能芯片发布')
+        self.assertEqual(pinyin_syllable('芯'), 'xin')
+        self.assertIsNone(pinyin_syllable('A'))
+
+class SearchRelevanceTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        now = timezone.now()
+        self.body = RawNews.objects.create(title='行业动态', content='新能源汽车销量增长，新能源电池', source_url='https://example.com/r1',
+                                           published_at=now, is_processed=True)
+        self.title = RawNews.objects.create(title='新能源汽车', content='销量', source_url='https://example.com/r2',
+                                            published_at=now - datetime.timedelta(days=1), is_processed=True)
+        self.ev = RawNews.objects.create(title='电动车降价', content='价格战', source_url='https://example.com/r3',
+                                         published_at=now - datetime.timedelta(days=2), is_processed=True, tags=['电动汽车'])
+        # 抓取时自动创建的标签默认未启用，由管理员启用并维护同义词
+        self.tag = ContentTag.objects.get(name='电动汽车')
+        self.tag.is_active = True
+        self.tag.synonyms = ['新能源汽车', '电动车']
+        self.tag.save()
+        rebuild_search_index()
+    def tearDown(self):
+        cache.clear()
+    def test_title_outweighs_content(self):
+        self.assertEqual(list(search_ids('新能源'))[:2], [self.title.pk, self.body.pk])
+        self.assertEqual(list(search_ids('新能源', ordering='published_at')), [self.body.pk, self.title.pk])
+    def test_synonym_expansion_and_tag_weight(self):
+        self.assertEqual(set(search_ids('电动汽车')), {self.body.pk, self.title.pk, self.ev.pk})
+        self.tag.search_weight = 0.1
+        self.tag.save()
+        self.assertEqual(list(search_ids('新能源汽车'))[-1], self.ev.pk)
+        self.tag.search_weight = 10
+        self.tag.save()
+        self.assertEqual(list(search_ids('新能源汽车'))[0], self.ev.pk)
+    def test_tag_filter_and_boost_read_segment_tags(self):
+        RawNews.objects.create(title='无关的电动汽车标签', content='其他', source_url='https://example.com/r4',
+                               published_at=timezone.now(), is_processed=True, tags=['电动汽车'])
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(list(search_ids('新能源汽车', tag='电动汽车')), [self.ev.pk])
+            self.assertEqual(list(search_ids('电动车'))[0], self.ev.pk)
+        self.assertFalse([query for query in ctx.captured_queries if 'content_rawnewstag' in query['sql']])
+    def test_matched_rows_on_posting_arrays(self):
+        rows_by_term = {'a': array('I', [1, 3, 5, 7, 9]), 'b': array('I', [3, 4, 9]), 'c': array('I', [2, 7])}
+        self.assertEqual(matched_rows(rows_by_term, [[['a', 'b']]]), {3, 9})
+        self.assertEqual(matched_rows(rows_by_term, [[['a', 'b'], ['c']]]), {2, 3, 7, 9})
+        self.assertEqual(matched_rows(rows_by_term, [[['a']], [['b'], ['c']]]), {3, 7, 9})
+        self.assertEqual(matched_rows(rows_by_term, [[['a', 'd']]]), set())
+    def test_top_k_pages(self):
+        hits = search_ids('新能源汽车')
+        self.assertEqual(len(hits), 3)
+        self.assertEqual(hits[0:1] + hits[1:3], list(hits))
+        results = self.client.get('/content/search', {'q': '新能源汽车', 'page_size': 1, 'page': 2}).json()['data']
+        self.assertEqual((results['results'][0]['id'], results['pagination']['total']), (list(hits)[1], 3))
+
+class SearchIndexMaintenanceTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.news = RawNews.objects.create(title='量子计算突破', content='内容', source_url='https://example.com/m1',
+                                           published_at=timezone.now(), is_processed=True)
+        rebuild_search_index(segment_size=2)
+    def tearDown(self):
+        cache.clear()
+    def create(self, i, title):
+        return RawNews.objects.create(title=title, content='内容', source_url=f'https://example.com/m{i}',
+                                      published_at=timezone.now(), is_processed=True)
+    def search(self, q):
+        return [item['id'] for item in self.client.get('/content/search', {'q': q}).json()['data']['results']]
+    def test_insert_edit_delete_applied_in_batches(self):
+        fresh = self.create(2, '量子通信')
+        self.assertEqual(list(search_ids('量子')), [self.news.pk])
+        self.assertEqual(index_freshness()['pending_updates'], 1)
+        self.assertEqual(apply_pending_updates(), 1)
+        self.assertEqual(set(search_ids('量子')), {self.news.pk, fresh.pk})
+        self.news.save(update_fields=['hotness_score'])
+        self.assertEqual(index_freshness()['pending_updates'], 0)
+        self.news.title = '经典计算'
+        self.news.save()
+        fresh.delete()
+        apply_pending_updates()
+        self.assertEqual(list(search_ids('量子')), [])
+        self.assertEqual(list(search_ids('经典')), [self.news.pk])
+        self.assertEqual((index_freshness()['pending_updates'], index_freshness()['lag_seconds']), (0, 0.0))
+    def test_small_segments_merged(self):
+        ids = [self.create(10 + i, f'量子新闻{i}').pk for i in range(8)]
+        for _ in range(8):
+            apply_pending_updates(batch_size=1)
+        self.assertLess(SearchSegment.objects.count(), 8)
+        self.assertEqual(set(search_ids('量子')), set(ids) | {self.news.pk})
+        self.assertEqual(index_freshness()['documents'], 9)
+    def test_rebuild_in_other_process_visible(self):
+        self.assertEqual(list(search_ids('量子')), [self.news.pk])
+        fresh = self.create(2, '量子通信')
+        # 另一进程：独立的缓存与进程内索引版本
+        with mock.patch('apps.content.search_index.cache', LocMemCache('other-process', {})), \
+                mock.patch('apps.content.search_index.index_version', IndexVersionHolder()):
+            rebuild_search_index(segment_size=1)
+        self.assertEqual(set(search_ids('量子')), {self.news.pk, fresh.pk})
+    def test_apply_in_other_process_visible_to_web(self):
+        self.assertEqual(self.search('量子'), [self.news.pk])
+        fresh = self.create(2, '量子通信')
+        with mock.patch('apps.content.search_index.cache', LocMemCache('worker-process', {})), \
+                mock.patch('apps.content.search_index.index_version', IndexVersionHolder()):
+            self.assertEqual(apply_pending_updates(), 1)
+        self.assertEqual(set(self.search('量子')), {self.news.pk, fresh.pk})
+        self.assertIsNotNone(index_freshness()['last_applied_at'])
+    def test_index_lock_held_in_database(self):
+        with index_lock() as acquired:
+            self.assertTrue(acquired)
+            # 其他进程看不到本进程的缓存，锁仍然生效
+            cache.clear()
+            with self.assertRaises(IndexBusy):
+                apply_pending_updates()
+        self.assertTrue(acquire_index_lock('crashed'))
+        SearchIndexState.objects.filter(pk=1).update(locked_until=timezone.now() - datetime.timedelta(seconds=1))
+        with index_lock() as acquired:
+            self.assertTrue(acquired)
+    def test_rebuild_renews_lease_between_shards(self):
+        self.create(2, '量子通信')
+        def expiring_shards(tasks, workers):
+            for data in iter_shards(tasks, workers):
+                SearchIndexState.objects.filter(pk=1).update(locked_until=timezone.now())
+                yield data
+                locked_until = SearchIndexState.objects.get(pk=1).locked_until
+                self.assertGreater(locked_until, timezone.now() + INDEX_LOCK_TIMEOUT / 2)
+        with mock.patch('apps.content.search_updates.iter_shards', expiring_shards):
+            self.assertEqual(rebuild_search_index(segment_size=1), (2, 2))
+    def test_rebuild_aborts_when_lease_taken_over(self):
+        self.create(2, '量子通信')
+        segments = set(SearchSegment.objects.values_list('id', flat=True))
+        def taken_over(tasks, workers):
+            yield from iter_shards(tasks, workers)
+            SearchIndexState.objects.filter(pk=1).update(locked_by='other', locked_until=timezone.now() + INDEX_LOCK_TIMEOUT)
+        with mock.patch('apps.content.search_updates.iter_shards', taken_over):
+            with self.assertRaises(IndexLockLost):
+                rebuild_search_index(segment_size=1)
+        self.assertEqual(set(SearchSegment.objects.values_list('id', flat=True)), segments)
+        self.assertEqual(SearchIndexState.objects.get(pk=1).locked_by, 'other')
+        self.assertEqual(list(search_ids('量子')), [self.news.pk])
+    def test_rebuild_clears_queue_and_stats_endpoint(self):
+        self.create(2, '量子通信')
+        self.assertEqual(rebuild_search_index(), (2, 1))
+        self.assertEqual(index_freshness()['pending_updates'], 0)
+        admin = get_user_model().objects.create(username='search-admin', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        self.assertEqual(client.get('/content/search/stats').json()['data']['documents'], 2)
+class SearchResultCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        search_result_cache.clear()
+        search_query_log.clear()
+        popular_precomputer.version = popular_precomputer.started_at = None
+        self.news = RawNews.objects.create(title='量子计算突破', content='内容', source_url='https://example.com/c1',
+                                           published_at=timezone.now(), is_processed=True)
+        rebuild_search_index()
+        self.client = APIClient()
+    def tearDown(self):
+        cache.clear()
+        search_result_cache.clear()
+        search_query_log.clear()
+        popular_precomputer.version = popular_precomputer.started_at = None
+    def search_ids(self, params):
+        response = self.client.get('/content/search', params)
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()['data']['results']]
+    def test_repeat_query_hits_cache(self):
+        self.assertEqual(self.search_ids({'q': '量子'}), [self.news.pk])
+        with self.assertNumQueries(1):  # 仅索引版本号
+            self.assertEqual(self.search_ids({'q': ' 量子 '}), [self.news.pk])
+        self.assertEqual(search_result_cache.stats()['hits'], 1)
+        self.search_ids({'q': '量子', 'page': '1', 'page_size': '5'})
+        self.assertEqual(search_result_cache.stats()['misses'], 2)
+    def test_index_change_precomputes_popular_queries(self):
+        self.search_ids({'q': '量子'})
+        self.search_ids({'q': '量子'})
+        fresh = RawNews.objects.create(title='量子通信', content='内容', source_url='https://example.com/c2',
+                                       published_at=timezone.now(), is_processed=True)
+        apply_pending_updates()
+        self.search_ids({'q': '计算'})
+        self.assertEqual(search_result_cache.stats()['precomputed'], 1)
+        with self.assertNumQueries(1):  # 仅索引版本号
+            self.assertEqual(set(self.search_ids({'q': '量子'})), {self.news.pk, fresh.pk})
+    def test_precompute_debounced(self):
+        self.search_ids({'q': '量子'})
+        computed = []
+        def compute(params):
+            computed.append(params)
+        popular_precomputer.maybe_schedule(get_index_version() + 1, compute)
+        popular_precomputer.maybe_schedule(get_index_version() + 2, compute)
+        self.assertEqual(computed, [{'q': '量子'}])
+        with mock.patch('apps.content.search_cache.time.monotonic', return_value=time.monotonic() + 60):
+            popular_precomputer.maybe_schedule(get_index_version() + 2, compute)
+        self.assertEqual(len(computed), 2)
+    def test_bounded_memory(self):
+        bounded = SearchResultCache(max_entries=2, max_items=3)
+        for i in range(3):
+            bounded.set(('q', i), 1, {'results': [i]})
+        self.assertIsNone(bounded.get(('q', 0), 1))
+        bounded.set(('q', 3), 1, {'results': [1, 2]})
+        self.assertEqual((bounded.stats()['entries'], bounded.stats()['items']), (2, 3))
+        self.assertIsNone(bounded.get(('q', 3), 2))
+class SearchFacetsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        search_result_cache.clear()
+        search_query_log.clear()
+        self.tech = NewsCategory.objects.create(name='科技', slug='tech')
+        for slug, name in (('ai', 'AI'), ('chip', '芯片')):
+            ContentTag.objects.create(name=name, slug=slug)
+        now = timezone.now()
+        for i, (news_type, category, tags) in enumerate([('article', self.tech, ['AI']), ('article', None, ['AI', '芯片']),
+                                                         ('video', self.tech, ['芯片'])]):
+            RawNews.objects.create(title=f'量子计算{i}', content='内容', source_url=f'https://example.com/f{i}', type=news_type,
+                                   category=category, published_at=now, is_processed=True, tags=tags)
+        rebuild_search_index()
+        self.client = Client()
+    def tearDown(self):
+        cache.clear()
+        search_result_cache.clear()
+    def facets(self, **params):
+        return self.client.get('/content/search', dict(q='量子', facets='1', **params)).json()['data']['facets']
+    def counts(self, facets):
+        return {name: {item['value']: item['count'] for item in items} for name, items in facets.items()}
+    def test_counts_in_single_pass(self):
+        facets = self.facets()
+        self.assertEqual(facets['type'][0], {'value': 'article', 'label': '文章', 'count': 2})
+        self.assertEqual(self.counts(facets), {'type': {'article': 2, 'video': 1}, 'category': {self.tech.pk: 2},
+                                               'tag': {'AI': 2, '芯片': 2}})
+        self.assertEqual(facets['category'][0]['label'], '科技')
+        self.assertNotIn('facets', self.client.get('/content/search', {'q': '量子'}).json()['data'])
+    def test_each_facet_ignores_its_own_filter(self):
+        self.assertEqual(self.counts(self.facets(type='video', tag='AI')),
+                         {'type': {'article': 2}, 'category': {}, 'tag': {'芯片': 1}})
+        self.assertEqual(self.client.get('/content/search', {'q': '量子', 'facets': '1', 'type': 'video'}).json()['data']['pagination']['total'], 1)
+    def test_null_when_falling_back(self):
+        self.assertIsNone(self.facets(cursor=''))
+    def test_tag_counts_read_only_matched_documents(self):
+        RawNews.objects.create(title='其他新闻', content='内容', source_url='https://example.com/f9',
+                               published_at=timezone.now(), is_processed=True, tags=['AI', '未启用'])
+        ContentTag.objects.filter(name='芯片').update(is_active=False)
+        self.assertEqual(self.counts(self.facets())['tag'], {'AI': 2})
+    def test_tag_counts_query_count_constant(self):
+        def add_hits(count):
+            for i in range(count):
+                RawNews.objects.create(title=f'量子通信{i}', content='内容', source_url=f'https://example.com/q{count}-{i}',
+                                       published_at=timezone.now(), is_processed=True, tags=['AI'])
+            rebuild_search_index()
+            self.facets(type='article', tag='AI')
+            search_result_cache.clear()
+        add_hits(2)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.counts(self.facets(type='article'))['tag']['AI'], 4)
+        self.assertFalse([query for query in ctx.captured_queries if 'content_rawnewstag' in query['sql']])
+        num_queries = len(ctx.captured_queries)
+        add_hits(40)
+        with self.assertNumQueries(num_queries):
+            self.assertEqual(self.counts(self.facets(type='article'))['tag']['AI'], 44)
+    def test_tag_changes_reindexed(self):
+        news = RawNews.objects.get(title='量子计算2')
+        ContentTagRelation.objects.create(content_type=ContentType.objects.get_for_model(RawNews), object_id=news.pk,
+                                          tag=ContentTag.objects.get(name='AI'))
+        apply_pending_updates()
+        self.assertEqual(self.counts(self.facets())['tag'], {'AI': 3, '芯片': 2})
+
+class MediaTextSearchTest(TestCase):
+    SRT = '1\n00:00:01,000 --> 00:00:03,500\n大家好\n\n2\n00:01:02,250 --> 00:01:05,000\n今天讲<i>人工智能</i>芯片\n'
+    def setUp(self):
+        self.client = Client()
+        self.video = VideoContent.objects.create(title='芯片课程', video_url='https://example.com/m.mp4', duration=600,
+                                                 status='published', subtitles=[{'language': 'zh', 'content': self.SRT}])
+        self.audio = AudioContent.objects.create(title='播客', audio_url='https://example.com/m.mp3', duration=100, status='published',
+                                                 lyrics='[00:10.50]人工智能改变生活\n[00:20.00][01:00.00]副歌',
+                                                 transcript='开场白\n我们来聊人工智能')
+    def search(self, **params):
+        return self.client.get('/content/media/search', params).json()['data']['results']
+    def test_parse_formats(self):
+        self.assertEqual(parse_timed_text('[00:20.00][01:00.00]副歌\n[00:10.5]开头', 100)[0],
+                         [(10500, 20000, '开头'), (20000, 60000, '副歌'), (60000, None, '副歌')])
+        self.assertEqual(parse_timed_text('WEBVTT\n\n01:02.000 --> 01:03.000\n你好', 0), ([(62000, 63000, '你好')], False))
+        self.assertEqual(parse_timed_text('第一行\n第二行', 10), ([(0, None, '第一行'), (5714, None, '第二行')], True))
+        self.assertEqual(parse_subtitles({'en': [{'start': '00:00:02.5', 'end': 4, 'text': 'Hello'}]}, 0),
+                         [('en', [(2500, 4000, 'Hello')], False)])
+    def test_returns_time_offsets(self):
+        results = self.search(q='人工智能')
+        self.assertEqual([(item['type'], item['id'], item['match_count']) for item in results],
+                         [('audio', self.audio.pk, 2), ('video', self.video.pk, 1)])
+        self.assertEqual(results[0]['matches'], [
+            {'source': 'transcript', 'language': '', 'start': 33.333, 'end': None, 'estimated': True, 'text': '我们来聊人工智能'},
+            {'source': 'lyrics', 'language': '', 'start': 10.5, 'end': 20.0, 'estimated': False, 'text': '人工智能改变生活'},
+        ])
+        self.assertEqual(results[1]['matches'], [{'source': 'subtitles', 'language': 'zh', 'start': 62.25, 'end': 65.0,
+                                                  'estimated': False, 'text': '今天讲人工智能芯片'}])
+        self.assertEqual([item['id'] for item in self.search(q='人工智能', source='subtitles')], [self.video.pk])
+        self.assertEqual([item['id'] for item in self.search(q='生', type='audio')], [self.audio.pk])
+        self.assertEqual(self.search(q='芯片 大家'), [])
+    def test_segments_maintained_on_save(self):
+        self.video.subtitles = '00:00:05,000 --> 00:00:06,000\n新的字幕'
+        self.video.save()
+        self.assertEqual(self.search(q='新的字幕')[0]['matches'][0]['start'], 5.0)
+        self.assertEqual(self.search(q='人工智能', type='video'), [])
+        self.audio.status = 'archived'
+        self.audio.save(update_fields=['status'])
+        self.audio.delete()
+        self.video.delete()
+        self.assertEqual((MediaTextSegment.objects.count(), MediaTextPosting.objects.count()), (0, 0))
+        self.assertEqual(self.client.get('/content/media/search', {'q': 'x', 'type': 'image'}).json()['code'], 400)
+class SearchBenchmarkTest(TestCase):
+    def setUp(self):
+        cache.clear()
+    def tearDown(self):
+        cache.clear()
+        search_result_cache.clear()
+        search_query_log.clear()
+        suggestion_index.index = None
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual((percentile(values, 0.5), percentile(values, 0.95), percentile(values, 0.99)), (50, 95, 99))
+        self.assertEqual(percentile([], 0.5), 0.0)
+    def test_report_is_json_and_comparable(self):
+        report = SearchBenchmark(queries=30, warmup=2, segment_size=50).run([120])
+        report = json.loads(json.dumps(report))
+        level = report['levels'][0]
+        self.assertEqual(level['docs'], 120)
+        self.assertEqual(RawNews.objects.count(), 120)
+        for endpoint in ('search', 'suggestions'):
+            stats = level['endpoints'][endpoint]
+            self.assertEqual(stats['requests'], 30)
+            self.assertLessEqual(stats['p50_ms'], stats['p95_ms'])
+            self.assertLessEqual(stats['p95_ms'], stats['p99_ms'])
+        # 搜索建议由进程内索引提供，不查询数据库
+        self.assertGreater(level['endpoints']['search']['max_queries'], 0)
+        self.assertEqual(level['endpoints']['suggestions']['max_queries'], 0)
+        self.assertEqual(sum(stats['requests'] for name, stats in level['scenarios'].items() if name.startswith('search.')), 30)
+        self.assertIn('peak_rss_mb', level['memory']['after_replay'])
+        rows = compare_reports(report, report)
+        self.assertIn((120, 'search', 'p99_ms', level['endpoints']['search']['p99_ms'],
+                       level['endpoints']['search']['p99_ms'], 0.0 if level['endpoints']['search']['p99_ms'] else None), rows)
+    def test_cleanup_skips_per_row_signals(self):
+        SearchCorpus(seed=1).insert(50)
+        ids = list(RawNews.objects.values_list('id', flat=True))
+        RawNewsTag.objects.create(news_id=ids[0], tag=ContentTag.objects.create(name='基准', slug='bench-cleanup'))
+        with CaptureQueriesContext(connection) as ctx:
+            SearchCorpus.cleanup()
+        self.assertEqual(RawNews.objects.count(), 0)
+        self.assertFalse(RawNewsTag.objects.exists())
+        # 内容一条 DELETE 删除，不逐行收集级联、不入搜索队列
+        deletes = [query['sql'] for query in ctx.captured_queries if query['sql'].startswith('DELETE FROM "content_rawnews"')]
+        self.assertEqual(len(deletes), 1)
+        self.assertFalse(SearchIndexUpdate.objects.exists())
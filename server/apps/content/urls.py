@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import NewsCategoryListView, ContentRecommendView, ContentDetailView, ContentSearchView, ContentTagListView, ContentTagRelationView, ContentModerationView, ContentStatsView, ContentViewSet, ContentPublicListView, ContentTrendingView, SearchSuggestionsView
+from .views import NewsCategoryListView, ContentRecommendView, ContentDetailView, ContentSearchView, ContentTagListView, ContentTagRelationView, ContentModerationView, ContentStatsView, ContentViewSet, ContentPublicListView, ContentTrendingView, SearchSuggestionsView, ResponseCacheStatsView, ContentBatchView, ContentExportView, SearchIndexStatsView, MediaTextSearchView
 from rest_framework.routers import DefaultRouter
 
 router = DefaultRouter()
@@ -13,8 +13,13 @@ urlpatterns = router.urls + [
     path('search/suggestions', SearchSuggestionsView.as_view()),  # 搜索建议
     path('content/<int:id>', ContentDetailView.as_view()),  # 内容详情
     path('content/search', ContentSearchView.as_view()),  # 内容搜索
+    path('content/search/stats', SearchIndexStatsView.as_view()),  # 搜索索引状态与新鲜度滞后
+    path('content/media/search', MediaTextSearchView.as_view()),  # 音视频转录/歌词/字幕检索
+    path('content/batch', ContentBatchView.as_view()),  # 批量内容详情
+    path('content/export', ContentExportView.as_view()),  # NDJSON流式导出
     path('content/tags', ContentTagListView.as_view()),  # 标签列表与创建
     path('content/<int:id>/tags', ContentTagRelationView.as_view()),  # 内容打标签/获取标签
     path('content/<int:id>/moderation', ContentModerationView.as_view()),  # 内容审核
     path('content/<int:content_id>/stats', ContentStatsView.as_view()),  # 内容统计
+    path('content/cache/stats', ResponseCacheStatsView.as_view()),  # 响应缓存命中统计
 ] 
\ No newline at end of file
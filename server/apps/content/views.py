@@ -1,6 +1,6 @@
-from rest_framework import generics, viewsets, filters, status, permissions
-from .models import NewsCategory, RawNews, ContentTag, ContentTagRelation, ContentModeration, ContentInteractionStats
-from .serializers import NewsCategorySerializer, RawNewsSerializer, ContentTagSerializer, ContentTagRelationSerializer, ContentModerationSerializer, ContentInteractionStatsSerializer
+from rest_framework import generics, viewsets, status, permissions
+from .models import NewsCategory, RawNews, ContentTag, ContentTagRelation, ContentModeration, ContentInteractionStats, VideoContent, MediaTextSegment
+from .serializers import NewsCategorySerializer, RawNewsSerializer, RawNewsCardSerializer, ContentTagSerializer, ContentTagRelationSerializer, ContentModerationSerializer, ContentInteractionStatsSerializer
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -8,6 +8,22 @@ from django.contrib.contenttypes.models import ContentType
 from django.shortcuts import get_object_or_404
 from django.db import transaction
 from .permissions import IsAuthorOrAdmin, IsAdminOrReadOnly
+from .pagination import FeedPageNumberPagination, FeedCursorPagination
+from .feeds import IdListFeed, get_ranked_feed, ordered_queryset
+from .snapshots import get_snapshot_feed, is_snapshot_requested
+from .conditional import ConditionalGetMixin, fingerprint_queryset
+from .response_cache import cached_response, get_model_versions, get_response_cache_stats
+from .hotness import period_buckets
+from .tagging import filter_by_tag
+from .category_tree import get_category_tree
+from .exports import export_queryset, iter_ndjson, gzip_stream, parse_since
+from .search_index import SEARCH_ORDERINGS, get_index_version, search_ids
+from .search_cache import popular_precomputer, search_cache_key, search_query_log, search_result_cache
+from .suggestions import get_suggestions
+from .search_updates import index_freshness
+from server.db_routing import primary_reads
+from .media_text import MEDIA_TYPES, load_media_matches, search_media_text
+from django.db.models import F, Max, OrderBy, Q
 from rest_framework.decorators import action
 from rest_framework import status
 from django.shortcuts import get_object_or_404
@@ -15,8 +31,10 @@ from .models import RawNews, NewsCategory
 from .serializers import RawNewsSerializer
 from rest_framework.pagination import PageNumberPagination
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse, OpenApiExample
-import datetime
+import heapq
+import itertools
 from django.utils import timezone
+from django.http import StreamingHttpResponse
 
 # 统一响应格式工具
 def api_response(success=True, code=200, message="Success", data=None):
@@ -28,25 +46,121 @@ def api_response(success=True, code=200, message="Success", data=None):
         "timestamp": timezone.now().isoformat()
     }, status=code)
 
-class NewsCategoryListView(generics.ListAPIView):
+class FeedListMixin:
     """
-    分类列表API
+    Feed列表公共逻辑：默认页码分页，请求携带 cursor 参数时切换为游标分页，
+    结果统一包装为 api_response 格式
+    """
+    pagination_class = FeedPageNumberPagination
+    cursor_pagination_class = FeedCursorPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.cursor_pagination_class and self.cursor_pagination_class.is_requested(self.request):
+                self._paginator = self.cursor_pagination_class()
+            elif self.pagination_class:
+                self._paginator = self.pagination_class()
+            else:
+                self._paginator = None
+        return self._paginator
+
+    def get_page_source(self, queryset):
+        """分页数据源，子类可替换为物化排序列表"""
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(self.get_page_source(queryset))
+        serializer = self.get_serializer(page, many=True) if page is not None else self.get_serializer(queryset, many=True)
+        data = serializer.data
+        if page is None:
+            return api_response(success=True, code=200, message="Success", data={"results": data})
+        return api_response(
+            success=True,
+            code=200,
+            message="Success",
+            data={"results": data, "pagination": self.paginator.get_pagination_info(request)}
+        )
+
+class NewsCategoryListView(ConditionalGetMixin, generics.ListAPIView):
+    """
+    分类列表API，支持条件GET(ETag/Last-Modified)
+    分类树一次查询组装并缓存，输出与 NewsCategorySerializer 一致
     """
     queryset = NewsCategory.objects.filter(parent=None, is_active=True)
     serializer_class = NewsCategorySerializer
     permission_classes = [permissions.AllowAny]
 
+    def get_conditional_validators(self):
+        # 分类树任一节点变化都会影响输出，按全表指纹校验
+        last_modified, total = fingerprint_queryset(NewsCategory.objects.all())
+        return [last_modified, total], last_modified
+
+    @cached_response('contentcategory')
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return api_response(success=True, code=200, message="Success", data=serializer.data)
+        return api_response(success=True, code=200, message="Success", data=get_category_tree()['roots'])
+
+class CardProjectionMixin:
+    """
+    Feed卡片投影：列表默认使用卡片序列化器，并用 .only() 只查询所需列；
+    支持 fields=id,title,... 稀疏字段集，正文等完整内容由详情接口返回
+    """
+    card_serializer_class = RawNewsCardSerializer
+    full_serializer_class = RawNewsSerializer
+    fields_query_param = 'fields'
+    # 视图自身逻辑需要读取的列，总是包含在投影中
+    projection_required_fields = ()
+
+    def use_card_projection(self):
+        return True
+
+    def get_requested_fields(self):
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = None
+            raw = self.request.query_params.get(self.fields_query_param)
+            if raw:
+                allowed = self.full_serializer_class().fields
+                names = [name.strip() for name in raw.split(',') if name.strip() in allowed]
+                self._requested_fields = names or None
+        return self._requested_fields
 
-class ContentRecommendView(generics.ListAPIView):
+    def get_serializer(self, *args, **kwargs):
+        if not self.use_card_projection():
+            return super().get_serializer(*args, **kwargs)
+        kwargs.setdefault('context', self.get_serializer_context())
+        fields = self.get_requested_fields()
+        if fields is None:
+            return self.card_serializer_class(*args, **kwargs)
+        return self.full_serializer_class(*args, fields=fields, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.use_card_projection():
+            queryset = self.project_queryset(queryset)
+        return queryset
+
+    def project_queryset(self, queryset):
+        """只加载序列化与排序需要的列"""
+        fields = self.get_requested_fields() or self.card_serializer_class.Meta.fields
+        names = set(fields) | {'id'} | set(self.projection_required_fields)
+        if 'video_content' in names:
+            names |= {'type', 'source_url'}
+        for f in queryset.query.order_by or queryset.model._meta.ordering:
+            if isinstance(f, str):
+                names.add(f.lstrip('-'))
+            elif isinstance(f, OrderBy) and isinstance(f.expression, F):
+                names.add(f.expression.name)
+        concrete = {f.name for f in queryset.model._meta.concrete_fields}
+        return queryset.only(*sorted(names & concrete))
+
+class ContentRecommendView(CardProjectionMixin, FeedListMixin, generics.ListAPIView):
     """
     内容推荐API，支持多媒体类型、分类、标签筛选
+    snapshot=1 创建翻页快照，之后携带返回的 pagination.snapshot 令牌翻页
     """
     serializer_class = RawNewsSerializer
-    pagination_class = PageNumberPagination
+    sort_fields = {'hot': 'importance_score', 'popular': 'sentiment_score'}
     permission_classes = [permissions.AllowAny]
 
     def get_queryset(self):
@@ -59,99 +173,181 @@ class ContentRecommendView(generics.ListAPIView):
             queryset = queryset.filter(category_id=category_id)
         tag = self.request.query_params.get('tag')
         if tag:
-            queryset = queryset.filter(tags__contains=[tag])
+            queryset = filter_by_tag(queryset, tag)
+        return ordered_queryset(queryset, self.get_sort_field())
+
+    def get_sort_field(self):
         sort = self.request.query_params.get('sort', 'published_at')
-        if sort == 'hot':
-            queryset = queryset.order_by('-importance_score')
-        elif sort == 'popular':
-            queryset = queryset.order_by('-sentiment_score')
-        else:
-            queryset = queryset.order_by('-published_at')
-        return queryset
+        return self.sort_fields.get(sort, 'published_at')
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(queryset)
-        serializer = self.get_serializer(page, many=True) if page is not None else self.get_serializer(queryset, many=True)
-        data = serializer.data
-        pagination = None
-        if page is not None:
-            pagination = {
-                "page": self.paginator.page.number,
-                "page_size": self.paginator.get_page_size(request),
-                "total": self.paginator.page.paginator.count,
-                "total_pages": self.paginator.page.paginator.num_pages,
-                "has_next": self.paginator.page.has_next(),
-                "has_previous": self.paginator.page.has_previous(),
-            }
-        return api_response(
-            success=True,
-            code=200,
-            message="Success",
-            data={"results": data, "pagination": pagination} if pagination else {"results": data}
+    def get_page_source(self, queryset):
+        params = self.request.query_params
+        if FeedCursorPagination.is_requested(self.request):
+            return queryset
+        if is_snapshot_requested(self.request):
+            return get_snapshot_feed(self.request, type(self).__name__,
+                                     ordered_queryset(queryset, self.get_sort_field()), self.get_sort_field())
+        # 无标签筛选的页码分页走物化排序列表
+        if params.get('tag'):
+            return queryset
+        feed = get_ranked_feed(
+            queryset, self.get_sort_field(),
+            category_id=params.get('category_id'), content_type=params.get('type'), processed_only=True,
         )
+        return queryset if feed is None else feed
 
-class ContentDetailView(generics.RetrieveAPIView):
+class ContentDetailView(ConditionalGetMixin, generics.RetrieveAPIView):
     """
-    内容详情API
+    内容详情API，支持条件GET(ETag/Last-Modified)
     """
     queryset = RawNews.objects.all()
     serializer_class = RawNewsSerializer
     lookup_field = 'id'
     permission_classes = [permissions.AllowAny]
 
+    def get_conditional_validators(self):
+        row = RawNews.objects.filter(id=self.kwargs['id']).values('updated_at', 'type', 'source_url').first()
+        if row is None:
+            return None, None
+        last_modified = row['updated_at']
+        if row['type'] == 'video':
+            # 详情中嵌套的视频信息变化同样需要让缓存失效
+            video_updated = VideoContent.objects.filter(source_url=row['source_url']).aggregate(Max('updated_at'))['updated_at__max']
+            if video_updated and video_updated > last_modified:
+                last_modified = video_updated
+        return [row['updated_at'], last_modified], last_modified
+
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         serializer = self.get_serializer(instance)
         return api_response(success=True, code=200, message="Success", data=serializer.data)
 
-class ContentSearchView(generics.ListAPIView):
+class ContentBatchView(APIView):
+    """
+    批量内容详情API
+    GET /content/batch?ids=3,1,2
+    一次查询取回多条内容，按请求顺序返回详情格式的 results，不存在的ID列在 missing 中
+    """
+    permission_classes = [permissions.AllowAny]
+    max_ids = 200
+    # 主键为 64 位有符号整数，超出范围的ID在数据库驱动中会溢出
+    max_id = 2 ** 63 - 1
+
+    def parse_ids(self, request):
+        ids = []
+        for value in request.query_params.getlist('ids'):
+            for part in value.split(','):
+                part = part.strip()
+                if not part:
+                    continue
+                pk = int(part)
+                if not 1 <= pk <= self.max_id:
+                    raise ValueError(part)
+                if pk not in ids:
+                    ids.append(pk)
+        return ids
+
+    @extend_schema(
+        summary="批量获取内容详情",
+        parameters=[OpenApiParameter('ids', str, description='内容ID，逗号分隔，最多200个', required=True)],
+        responses={200: RawNewsSerializer(many=True)},
+    )
+    @cached_response('rawnews', 'videocontent')
+    def get(self, request):
+        try:
+            ids = self.parse_ids(request)
+        except ValueError:
+            return api_response(success=False, code=400, message="ids必须为正整数，以逗号分隔")
+        if not ids:
+            return api_response(success=False, code=400, message="ids为必填")
+        if len(ids) > self.max_ids:
+            return api_response(success=False, code=400, message=f"ids最多{self.max_ids}个")
+        objects = RawNews.objects.in_bulk(ids)
+        items = [objects[pk] for pk in ids if pk in objects]
+        serializer = RawNewsSerializer(items, many=True, context={'request': request})
+        return api_response(success=True, code=200, message="Success", data={
+            "results": serializer.data,
+            "missing": [pk for pk in ids if pk not in objects],
+        })
+
+def search_queryset(params):
+    """搜索的基础查询集：已处理内容按类型/分类/标签筛选"""
+    queryset = RawNews.objects.filter(is_processed=True)
+    type_param = params.get('type')
+    if type_param:
+        queryset = queryset.filter(type=type_param)
+    category_id = params.get('category_id')
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+    tag = params.get('tag')
+    if tag:
+        queryset = filter_by_tag(queryset, tag)
+    return queryset
+
+@primary_reads()
+def search_page_data(params):
+    """
+    由查询参数计算走倒排索引的一页搜索结果(响应中的 data)，不需要请求对象；
+    查询无法由索引回答或使用游标分页时返回 None。视图与热门查询预计算(search_cache.py)共用，结果按索引版本缓存，读主库
+    """
+    q = params.get('q', '').strip()
+    if not q or FeedCursorPagination.cursor_query_param in params:
+        return None
+    sort = params.get('sort')
+    facets = params.get('facets') in ('1', 'true')
+    hits = search_ids(q, content_type=params.get('type'), category_id=params.get('category_id'), tag=params.get('tag'),
+                      ordering=sort if sort in SEARCH_ORDERINGS else 'relevance', facets=facets)
+    if hits is None:
+        return None
+    paginator = FeedPageNumberPagination()
+    page = paginator.paginate_params(IdListFeed(hits, search_queryset(params)), params)
+    data = {"results": RawNewsSerializer(page, many=True).data, "pagination": paginator.get_pagination_info()}
+    if facets:
+        data['facets'] = hits.facets
+    return data
+
+class ContentSearchView(FeedListMixin, generics.ListAPIView):
     """
     内容搜索API，支持多媒体类型、分类、标签筛选
+    q 查询走倒排索引(见 search_index.py)，匹配标题/摘要/正文，默认按 BM25 相关度排序，
+    sort=published_at 时按发布时间倒序；索引为空、查询无法由索引回答或使用游标分页时回退为数据库 LIKE 查询
+    facets=1 时返回 data.facets：按类型/分类/标签的结果数(见 search_facets.py)，回退为数据库查询时为 null
     """
     serializer_class = RawNewsSerializer
-    pagination_class = PageNumberPagination
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['title', 'content', 'summary']
     permission_classes = [permissions.AllowAny]
 
     def get_queryset(self):
-        queryset = RawNews.objects.filter(is_processed=True)
-        q = self.request.query_params.get('q')
+        return search_queryset(self.request.query_params)
+
+    def filter_queryset(self, queryset):
+        # 只在不走索引时调用(见 list)
+        q = self.request.query_params.get('q', '').strip()
         if q:
-            queryset = queryset.filter(title__icontains=q)
-        type_param = self.request.query_params.get('type')
-        if type_param:
-            queryset = queryset.filter(type=type_param)
-        category_id = self.request.query_params.get('category_id')
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
-        tag = self.request.query_params.get('tag')
-        if tag:
-            queryset = queryset.filter(tags__contains=[tag])
-        return queryset
+            queryset = queryset.filter(Q(title__icontains=q) | Q(summary__icontains=q) | Q(content__icontains=q))
+        return super().filter_queryset(queryset)
+
+    def list_fallback(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get('facets') in ('1', 'true'):
+            response.data['data']['facets'] = None
+        return response
 
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(queryset)
-        serializer = self.get_serializer(page, many=True) if page is not None else self.get_serializer(queryset, many=True)
-        data = serializer.data
-        pagination = None
-        if page is not None:
-            pagination = {
-                "page": self.paginator.page.number,
-                "page_size": self.paginator.get_page_size(request),
-                "total": self.paginator.page.paginator.count,
-                "total_pages": self.paginator.page.paginator.num_pages,
-                "has_next": self.paginator.page.has_next(),
-                "has_previous": self.paginator.page.has_previous(),
-            }
-        return api_response(
-            success=True,
-            code=200,
-            message="Success",
-            data={"results": data, "pagination": pagination} if pagination else {"results": data}
-        )
+        # 走索引的结果按规范化查询缓存在进程内(见 search_cache.py)，索引变化后热门查询在后台重算
+        key = search_cache_key(request.query_params)
+        if key is None:
+            return self.list_fallback(request, *args, **kwargs)
+        version = get_index_version()
+        popular_precomputer.maybe_schedule(version, search_page_data)
+        data = search_result_cache.get(key, version)
+        if data is None:
+            data = search_page_data(request.query_params)
+            # 回退到数据库查询的结果不缓存，也不参与热门统计
+            if data is None:
+                return self.list_fallback(request, *args, **kwargs)
+            search_result_cache.set(key, version, data)
+        search_query_log.record(key)
+        return api_response(success=True, code=200, message="Success", data=data)
 
 class ContentTagListView(generics.ListCreateAPIView):
     """内容标签列表与创建API"""
@@ -249,8 +445,10 @@ class CategoryContentPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
-class ContentViewSet(viewsets.ReadOnlyModelViewSet):
+class ContentViewSet(CardProjectionMixin, viewsets.ReadOnlyModelViewSet):
     # ... existing code ...
+    pagination_class = CategoryContentPagination
+
     def get_queryset(self):
         queryset = RawNews.objects.all()
         type_param = self.request.query_params.get('type')
@@ -261,9 +459,12 @@ class ContentViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(category_id=category_id)
         tag = self.request.query_params.get('tag')
         if tag:
-            queryset = queryset.filter(tags__contains=[tag])
+            queryset = filter_by_tag(queryset, tag)
         return queryset
 
+    def use_card_projection(self):
+        return self.action == 'category_content'
+
     @extend_schema(
         summary="根据分类获取内容",
         description="获取指定分类下的内容，支持分页、排序、时长筛选。",
@@ -273,30 +474,24 @@ class ContentViewSet(viewsets.ReadOnlyModelViewSet):
             OpenApiParameter('duration_max', int, description='最大时长(秒)', required=False),
             OpenApiParameter('page', int, description='页码', required=False),
             OpenApiParameter('page_size', int, description='每页数量', required=False),
+            OpenApiParameter('fields', str, description='返回字段，逗号分隔，缺省为卡片字段', required=False),
         ],
-        responses={200: RawNewsSerializer(many=True)},
+        responses={200: RawNewsCardSerializer(many=True)},
         examples=[
             OpenApiExample(
                 '科技资讯内容示例',
                 value={
                     "id": 101,
+                    "type": "article",
                     "title": "AI驱动的新闻推荐系统上线",
-                    "content": "羊咩快报平台正式发布AI驱动的新闻推荐系统，提升用户个性化体验。",
                     "summary": "AI推荐系统助力个性化资讯推送。",
                     "author": "新闻编辑部",
+                    "source": "羊咩快报",
                     "source_url": "https://news.yangmie.com/ai/101",
-                    "image_urls": ["https://cdn.yangmie.com/images/ai-news-101.jpg"],
                     "published_at": "2025-07-20T10:00:00Z",
                     "category": 2,
                     "tags": ["AI", "推荐", "新闻"],
-                    "keywords": ["人工智能", "个性化推荐", "新闻平台"],
-                    "sentiment_score": 0.92,
-                    "importance_score": 0.95,
-                    "is_processed": True,
-                    "is_duplicate": False,
-                    "language": "zh-CN",
-                    "created_at": "2025-07-20T10:00:00Z",
-                    "updated_at": "2025-07-20T10:00:00Z"
+                    "video_content": None
                 },
                 response_only=True,
                 description="真实业务场景下的科技资讯内容示例。"
@@ -308,20 +503,20 @@ class ContentViewSet(viewsets.ReadOnlyModelViewSet):
         """
         获取指定分类下的内容，支持分页、排序、时长筛选。
         GET /content/category/{category_id}/
-        支持参数：sort, duration_min, duration_max, page, page_size
+        支持参数：sort, duration_min, duration_max, page, page_size, fields
         """
         category = get_object_or_404(NewsCategory, pk=pk)
         queryset = RawNews.objects.filter(category=category)
         # 排序
         sort = request.query_params.get('sort', 'latest')
         if sort == 'popular':
-            queryset = queryset.order_by('-importance_score')
+            queryset = ordered_queryset(queryset, 'importance_score')
         elif sort == 'hot':
-            queryset = queryset.order_by('-sentiment_score')
+            queryset = ordered_queryset(queryset, 'sentiment_score')
         elif sort == 'duration':
             queryset = queryset.order_by('-duration') if hasattr(RawNews, 'duration') else queryset
         else:
-            queryset = queryset.order_by('-published_at')
+            queryset = ordered_queryset(queryset, 'published_at')
         # 时长筛选
         duration_min = request.query_params.get('duration_min')
         duration_max = request.query_params.get('duration_max')
@@ -329,24 +524,39 @@ class ContentViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(duration__gte=int(duration_min))
         if duration_max and hasattr(RawNews, 'duration'):
             queryset = queryset.filter(duration__lte=int(duration_max))
+        queryset = self.project_queryset(queryset)
+        # 按时长排序/筛选之外的组合走物化排序列表
+        order_field = {'popular': 'importance_score', 'hot': 'sentiment_score', 'duration': None}.get(sort, 'published_at')
+        page_source = queryset
+        if order_field and not (hasattr(RawNews, 'duration') and (duration_min or duration_max)):
+            feed = get_ranked_feed(queryset, order_field, category_id=category.pk, processed_only=False)
+            page_source = queryset if feed is None else feed
         # 分页
-        page = self.paginate_queryset(queryset)
+        page = self.paginate_queryset(page_source)
         if page is not None:
-            serializer = RawNewsSerializer(page, many=True)
+            serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
-        serializer = RawNewsSerializer(queryset, many=True)
+        serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
-class ContentPublicListView(generics.ListAPIView):
+class ContentPublicListView(ConditionalGetMixin, CardProjectionMixin, FeedListMixin, generics.ListAPIView):
     """
     公开内容列表API
     GET /content/public
-    支持分页、分类、type、sort
+    支持分页、分类、type、sort，支持条件GET(ETag/Last-Modified)
     """
     serializer_class = RawNewsSerializer
-    pagination_class = PageNumberPagination
     permission_classes = [permissions.AllowAny]
 
+    def get_conditional_validators(self):
+        # 删除等行数变化由模型版本号体现，不在热路径上做 COUNT
+        last_modified = self.get_queryset().aggregate(Max('updated_at'))['updated_at__max']
+        return [last_modified, *get_model_versions(['rawnews', 'videocontent'])], last_modified
+
+    @cached_response('rawnews', 'videocontent')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def get_queryset(self):
         queryset = RawNews.objects.filter(is_processed=True)
         type_param = self.request.query_params.get('type')
@@ -357,71 +567,71 @@ class ContentPublicListView(generics.ListAPIView):
             queryset = queryset.filter(category_id=category_id)
         sort = self.request.query_params.get('sort', 'latest')
         if sort == 'popular':
-            queryset = queryset.order_by('-importance_score')
+            queryset = ordered_queryset(queryset, 'importance_score')
         elif sort == 'hot':
-            queryset = queryset.order_by('-sentiment_score')
+            queryset = ordered_queryset(queryset, 'sentiment_score')
         elif sort == 'duration' and hasattr(RawNews, 'duration'):
             queryset = queryset.order_by('-duration')
         else:
-            queryset = queryset.order_by('-published_at')
+            queryset = ordered_queryset(queryset, 'published_at')
         return queryset
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(queryset)
-        serializer = self.get_serializer(page, many=True) if page is not None else self.get_serializer(queryset, many=True)
-        data = serializer.data
-        pagination = None
-        if page is not None:
-            pagination = {
-                "page": self.paginator.page.number,
-                "page_size": self.paginator.get_page_size(request),
-                "total": self.paginator.page.paginator.count,
-                "total_pages": self.paginator.page.paginator.num_pages,
-                "has_next": self.paginator.page.has_next(),
-                "has_previous": self.paginator.page.has_previous(),
-            }
-        return api_response(
-            success=True,
-            code=200,
-            message="Success",
-            data={"results": data, "pagination": pagination} if pagination else {"results": data}
-        )
-
-class ContentTrendingView(generics.ListAPIView):
+class ContentTrendingView(CardProjectionMixin, generics.ListAPIView):
     """
     热门内容API
     GET /content/trending
     支持 period, category_id, limit
+    按预计算的时间衰减热度(hotness_score)读取：period 覆盖的每个年龄分桶各走一次
+    (分桶, 热度) 索引取前 limit 条，再按热度归并，无需排序
     """
     serializer_class = RawNewsSerializer
     permission_classes = [permissions.AllowAny]
+    # 时间窗口过滤读取发布时间，稀疏字段集下也不能延迟加载
+    projection_required_fields = ('published_at',)
 
     def get_queryset(self):
         queryset = RawNews.objects.filter(is_processed=True)
         category_id = self.request.query_params.get('category_id')
         if category_id:
             queryset = queryset.filter(category_id=category_id)
-        period = self.request.query_params.get('period', 'day')
-        now = timezone.now()
-        if period == 'day':
-            since = now - datetime.timedelta(days=1)
-        elif period == 'week':
-            since = now - datetime.timedelta(weeks=1)
-        elif period == 'month':
-            since = now - datetime.timedelta(days=30)
-        else:
-            since = None
-        if since:
-            queryset = queryset.filter(published_at__gte=since)
-        queryset = queryset.order_by('-importance_score', '-sentiment_score', '-published_at')
-        return queryset
+        return queryset.order_by('-hotness_score', '-id')
+
+    @staticmethod
+    def iter_bucket(queryset, chunk_size):
+        """按 (热度, id) 降序分块读取一个分桶；窗口过滤掉的行由后续分块补足"""
+        last = None
+        while True:
+            chunk = queryset
+            if last is not None:
+                chunk = chunk.filter(Q(hotness_score__lt=last.hotness_score)
+                                     | Q(hotness_score=last.hotness_score, id__lt=last.pk))
+            rows = list(chunk[:chunk_size])
+            yield from rows
+            if len(rows) < chunk_size:
+                return
+            last = rows[-1]
 
+    def get_bucket_querysets(self, queryset):
+        """按 period 拆分为各年龄分桶的查询集"""
+        buckets, _ = period_buckets(self.request.query_params.get('period', 'day'))
+        return [queryset.filter(age_bucket=bucket) for bucket in buckets]
+
+    # 时间窗口随时间推移，缓存时间取短
+    @cached_response('rawnews', 'videocontent', timeout=60)
     def list(self, request, *args, **kwargs):
         limit = int(request.query_params.get('limit', 20))
         limit = min(limit, 100)
-        queryset = self.get_queryset()[:limit]
-        serializer = self.get_serializer(queryset, many=True)
+        queryset = self.filter_queryset(self.get_queryset())
+        # 惰性归并：每个分桶先读一块，只有窗口过滤后不足 limit 条时才继续读取
+        parts = [self.iter_bucket(part, limit) for part in self.get_bucket_querysets(queryset)]
+        items = heapq.merge(*parts, key=lambda obj: (-obj.hotness_score, -obj.pk))
+        # 分桶由定时任务维护，可能滞后一个周期；发布时间不放进SQL，避免规划器改走发布时间索引再排序
+        _, window = period_buckets(request.query_params.get('period', 'day'))
+        if window:
+            since = timezone.now() - window
+            items = (obj for obj in items if obj.published_at and obj.published_at >= since)
+        items = list(itertools.islice(items, limit))
+        serializer = self.get_serializer(items, many=True)
         return api_response(success=True, code=200, message="Success", data={"results": serializer.data})
 
 class SearchSuggestionsView(APIView):
@@ -431,34 +641,85 @@ class SearchSuggestionsView(APIView):
     """
     permission_classes = [permissions.AllowAny]
 
+    @cached_response('rawnews', 'contenttag')
     def get(self, request):
         q = request.query_params.get('q', '').strip()
-        limit = int(request.query_params.get('limit', 5))
-        suggestions = []
-        if q:
-            # 标题建议
-            title_qs = RawNews.objects.filter(title__icontains=q).values_list('title', flat=True).distinct()[:limit]
-            for t in title_qs:
-                suggestions.append({
-                    "text": t,
-                    "type": "title",
-                    "highlight": t.replace(q, f"<em>{q}</em>") if q in t else t
-                })
-            # 标签建议
-            tag_qs = RawNews.objects.filter(tags__icontains=q).values_list('tags', flat=True)
-            tag_set = set()
-            for tags in tag_qs:
-                if tags:
-                    for tag in tags:
-                        if q in tag and tag not in tag_set:
-                            tag_set.add(tag)
-                            suggestions.append({
-                                "text": tag,
-                                "type": "tag",
-                                "highlight": tag.replace(q, f"<em>{q}</em>")
-                            })
-                            if len(suggestions) >= limit:
-                                break
-                if len(suggestions) >= limit:
-                    break
-        return api_response(success=True, code=200, message="Success", data={"suggestions": suggestions[:limit]}) 
\ No newline at end of file
+        try:
+            limit = int(request.query_params.get('limit', 5))
+        except ValueError:
+            limit = 5
+        # 前缀索引见 suggestions.py，命中时不访问数据库
+        suggestions, from_index = get_suggestions(q, limit) if q else ([], True)
+        response = api_response(success=True, code=200, message="Success", data={"suggestions": suggestions})
+        # 索引构建完成前的数据库回退结果不缓存，否则索引就绪后仍会在缓存有效期内返回回退结果
+        response.cacheable = from_index
+        return response
+
+class ResponseCacheStatsView(APIView):
+    """
+    响应缓存统计API（仅管理员）
+    GET /content/cache/stats
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return api_response(success=True, code=200, message="Success",
+                            data={"views": get_response_cache_stats(), "search": search_result_cache.stats()})
+
+class SearchIndexStatsView(APIView):
+    """
+    搜索索引状态API（仅管理员）
+    GET /content/search/stats
+    返回段数、文档数、变更队列积压与新鲜度滞后(lag_seconds)
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return api_response(success=True, code=200, message="Success", data=index_freshness())
+
+class MediaTextSearchView(APIView):
+    """
+    音视频文本检索API：在转录文本、歌词与字幕中查找，返回内容及命中段的时间偏移(秒)
+    GET /content/media/search?q=xxx&type=audio|video&source=transcript|lyrics|subtitles&page=1&page_size=20
+    文本段与倒排数据在保存时生成(见 media_text.py)，每个内容最多返回前 20 个命中段
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        q = request.query_params.get('q', '').strip()
+        media_type = request.query_params.get('type') or None
+        source = request.query_params.get('source') or None
+        if not q:
+            return api_response(success=False, code=400, message="q为必填")
+        if media_type and media_type not in MEDIA_TYPES:
+            return api_response(success=False, code=400, message="type必须为audio或video")
+        if source and source not in dict(MediaTextSegment.SOURCE_CHOICES):
+            return api_response(success=False, code=400, message="source必须为transcript、lyrics或subtitles")
+        paginator = FeedPageNumberPagination()
+        page = paginator.paginate_queryset(search_media_text(q, media_type, source), request, view=self)
+        return api_response(success=True, code=200, message="Success", data={
+            "results": load_media_matches(page), "pagination": paginator.get_pagination_info(request),
+        })
+
+class ContentExportView(APIView):
+    """
+    RawNews NDJSON 流式导出API（仅管理员，供检索/分析/训练任务拉取全量数据）
+    GET /content/export?since=2025-07-01T00:00:00Z&gzip=1
+    since 按 updated_at 增量拉取；gzip=1 时以 Content-Encoding: gzip 边读边压缩
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        since = request.query_params.get('since')
+        if since:
+            since = parse_since(since)
+            if since is None:
+                return api_response(success=False, code=400, message="since必须为ISO 8601时间")
+        chunks = iter_ndjson(export_queryset(since))
+        use_gzip = request.query_params.get('gzip') in ('1', 'true')
+        response = StreamingHttpResponse(gzip_stream(chunks) if use_gzip else chunks,
+                                         content_type='application/x-ndjson')
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+        response['Content-Disposition'] = 'attachment; filename="rawnews.ndjson"'
+        return response
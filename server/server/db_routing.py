@@ -0,0 +1,121 @@
+"""
+读写分离：只读请求走副本库，写入走主库
+
+- ReplicaRoutingMiddleware 记录当前请求；PrimaryReplicaRouter 在每次查询时判断：
+  GET/HEAD/OPTIONS 请求、请求内尚未写入、不在事务中、用户不在粘滞窗口内 -> 随机选择副本库，否则主库
+- 请求内发生写入后，该用户在 REPLICA_STICKY_SECONDS 秒内的读取都留在主库（读己之写），
+  通过 Cookie 与按用户ID的缓存标记两种方式识别（JWT 客户端未必保存 Cookie）
+- 请求之外（管理命令、后台线程）一律使用主库
+- 结果要写入缓存的读取在 primary_reads() 块内进行，固定走主库：缓存键带最新的模型/索引版本号，
+  落后的副本数据一旦以新版本号写入缓存，在下次写入前会一直被返回
+
+配置：settings.REPLICA_DATABASES 为副本库别名列表，为空时不启用。
+"""
+import contextvars
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import LazyObject
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_COOKIE_NAME = 'db_primary_until'
+STICKY_USER_KEY = 'db:primary_until:user:%s'
+
+_routing_state = contextvars.ContextVar('db_routing_state', default=None)
+_primary_reads = contextvars.ContextVar('db_primary_reads', default=False)
+
+
+class RoutingState:
+    def __init__(self, request):
+        self.request = request
+        self.wrote = False
+
+
+def replica_aliases():
+    return list(getattr(settings, 'REPLICA_DATABASES', []))
+
+
+def sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+
+def request_user_id(request):
+    # 只使用已认证出的用户（DRF 认证后会回写 request.user），不触发惰性加载以免查询递归进入路由
+    user = request.__dict__.get('user')
+    if user is None or isinstance(user, LazyObject) or not user.is_authenticated:
+        return None
+    return user.pk
+
+
+def is_sticky(request):
+    try:
+        if float(request.COOKIES.get(STICKY_COOKIE_NAME, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    user_id = request_user_id(request)
+    return user_id is not None and (cache.get(STICKY_USER_KEY % user_id) or 0) > time.time()
+
+
+@contextmanager
+def primary_reads():
+    """块内的读取固定走主库，用于填充缓存；也可用作装饰器"""
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
+
+def use_replica():
+    state = _routing_state.get()
+    if state is None or state.wrote or _primary_reads.get() or not replica_aliases():
+        return False
+    if state.request.method not in SAFE_METHODS:
+        return False
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return False
+    return not is_sticky(state.request)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if use_replica():
+            return random.choice(replica_aliases())
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 副本与主库数据相同，允许跨别名关联
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    """记录当前请求供路由判断；请求内有写入时为该用户开启主库粘滞窗口"""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RoutingState(request)
+        token = _routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing_state.reset(token)
+        if state.wrote:
+            seconds = sticky_seconds()
+            until = time.time() + seconds
+            response.set_cookie(STICKY_COOKIE_NAME, '%.3f' % until, max_age=seconds, httponly=True, samesite='Lax')
+            user_id = request_user_id(request)
+            if user_id is not None:
+                cache.set(STICKY_USER_KEY % user_id, until, seconds)
+        return response
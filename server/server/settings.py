@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -55,6 +56,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'server.db_routing.ReplicaRoutingMiddleware',  # 读写分离路由
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -90,6 +92,45 @@ DATABASES = {
     }
 }
 
+# 只读副本(读写分离，见 server/db_routing.py)
+# 本地可用第二个 SQLite 文件模拟副本：
+#   DJANGO_DB_REPLICA=replica.sqlite3 python manage.py migrate --database replica
+# 副本数据由复制同步，测试时副本指向主库的测试库
+REPLICA_DATABASES = []
+if os.environ.get('DJANGO_DB_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / os.environ['DJANGO_DB_REPLICA'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES = ['replica']
+DATABASE_ROUTERS = ['server.db_routing.PrimaryReplicaRouter']
+# 用户写入后读取留在主库的秒数
+REPLICA_STICKY_SECONDS = 10
+
+# 缓存
+# 响应缓存版本号、物化Feed列表、计数缓存、分页快照、读己之写标记等须在所有进程
+# (gunicorn 多个 worker、管理命令)之间共享，部署时通过 REDIS_URL 使用 Redis；
+# 未设置时退回进程内缓存，只适用于单进程的本地开发与测试(manage.py check --deploy 会给出警告)
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'meenews',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# 站内搜索 BM25 字段权重(见 apps/content/search_index.py)
+SEARCH_FIELD_WEIGHTS = {'title': 3.0, 'summary': 1.5, 'content': 1.0}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -134,7 +175,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # 输出与 rest_framework.renderers.JSONRenderer 一致的快速渲染器
+        'apps.content.renderers.FastJSONRenderer',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',